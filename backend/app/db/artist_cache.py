@@ -0,0 +1,107 @@
+"""
+In-process read-through cache for the artist catalog.
+
+The catalog is small and changes rarely, so DatabaseService keeps the whole
+list (and every artist by ID) in memory for ARTIST_CACHE_TTL_SECONDS and
+keeps them frozen, handing out copy-on-write views (app.db.frozen) instead
+of deep copies. Writes through
+DatabaseService invalidate it; writes from other workers become visible
+once the TTL runs out, or as soon as the change feed cache processor sees
+them (CHANGE_FEED_ENABLED, app.services.projections).
+"""
+
+import os
+import threading
+import time
+
+from app.db.frozen import freeze, view
+
+ARTIST_CACHE_TTL_SECONDS = float(os.getenv("ARTIST_CACHE_TTL_SECONDS", "300"))
+
+
+class ArtistCache:
+    def __init__(self, ttl_seconds=ARTIST_CACHE_TTL_SECONDS, clock=time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._catalog = None  # (expires_at, tuple of artists)
+        self._by_id = {}  # artist_id -> (expires_at, artist)
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self):
+        return self.ttl_seconds > 0
+
+    def _fresh(self, entry):
+        return entry is not None and entry[0] > self._clock()
+
+    async def get_all(self, load):
+        """Return the cached catalog, calling await load() on a miss."""
+        if not self.enabled:
+            return await load()
+
+        with self._lock:
+            if self._fresh(self._catalog):
+                self.hits += 1
+                return [view(artist) for artist in self._catalog[1]]
+            self.misses += 1
+            generation = self._generation
+
+        artists = tuple(freeze(artist) for artist in await load())
+        with self._lock:
+            # 로딩 중에 무효화됐다면 오래된 결과를 캐시하지 않음
+            if generation == self._generation:
+                expires_at = self._clock() + self.ttl_seconds
+                self._catalog = (expires_at, artists)
+                for artist in artists:
+                    if artist.get("artistId"):
+                        self._by_id[artist["artistId"]] = (expires_at, artist)
+        return [view(artist) for artist in artists]
+
+    async def get(self, artist_id, load):
+        """Return one cached artist, calling await load() on a miss."""
+        if not self.enabled:
+            return await load()
+
+        with self._lock:
+            entry = self._by_id.get(artist_id)
+            if self._fresh(entry):
+                self.hits += 1
+                return view(entry[1])
+            self.misses += 1
+            generation = self._generation
+
+        artist = await load()
+        if artist is None:
+            return None
+        artist = freeze(artist)
+        with self._lock:
+            if generation == self._generation:
+                self._by_id[artist_id] = (self._clock() + self.ttl_seconds, artist)
+        return view(artist)
+
+    def invalidate(self, artist_id=None):
+        """Drop the catalog list and, if given, one artist (everything if None)."""
+        with self._lock:
+            self._generation += 1
+            self.invalidations += 1
+            self._catalog = None
+            if artist_id is None:
+                self._by_id.clear()
+            else:
+                self._by_id.pop(artist_id, None)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "ttl_seconds": self.ttl_seconds,
+                "entries": len(self._by_id),
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
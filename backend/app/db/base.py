@@ -0,0 +1,156 @@
+"""
+The contract every database backend behind DatabaseService implements
+(CosmosDB, MockDB, SQLiteDB). tests/test_backend_conformance.py runs the same
+scenarios against each of them; benchmarks/backends.py times them.
+
+Shared semantics:
+- Documents are dicts. Backends may add bookkeeping fields (id, type,
+  _etag, ...). Returned documents belong to the caller, who may modify
+  them (mock records are handed out as copy-on-write views, app.db.frozen).
+- create_* raises ValueError when the key is already taken.
+- update_* returns None for a missing document, never changes the key
+  fields (userId, artistId, artistId/userId of a preference) and stamps
+  updatedAt on users and artists.
+- update_user/update_artist may be passed `current`, the document already
+  read in this request (app.db.identity_map). A backend may apply the
+  change to it instead of reading again, but must not overwrite a newer
+  version (CosmosDB replaces it only while its _etag still matches).
+- update_user adds `increments` (e.g. claimsVersion) in the same write as
+  the change, so one never lands without the other.
+- create_fan_preference increments the artist's fanCount unless
+  update_fan_count is False (the change feed projections keep it instead).
+- read_changes is the change feed: the latest version of every document
+  written after `continuation`, in write order (deletes are not reported),
+  and the continuation to resume from. Continuations are opaque strings.
+"""
+
+import inspect
+from typing import Any, Callable, Dict, List, Optional, Protocol, Tuple, runtime_checkable
+
+
+def preference_key(artist_id, user_id):
+    """Document key of a fan preference; one preference per (artist, user) pair."""
+    return f"{artist_id}:{user_id}"
+
+
+@runtime_checkable
+class Collection(Protocol):
+    """The container surface used directly by main.py and app.services."""
+
+    def create_item(self, body: dict) -> dict: ...
+
+    def upsert_item(self, body: dict) -> dict: ...
+
+    def query_items(self, query, parameters=None, **kwargs) -> Any:
+        """Iterable of results that also supports by_page(continuation_token)."""
+        ...
+
+
+@runtime_checkable
+class DatabaseBackend(Protocol):
+    # Collection operations
+    async def get_collection(self, collection_name: str) -> Optional[Collection]: ...
+
+    # User operations
+    async def create_user(self, user_data: dict) -> dict: ...
+
+    async def get_user(self, user_id: str) -> Optional[dict]: ...
+
+    async def get_all_users(self) -> List[dict]: ...
+
+    async def update_user(
+        self,
+        user_id: str,
+        user_data: dict,
+        current: Optional[dict] = None,
+        increments: Optional[Dict[str, float]] = None,
+    ) -> Optional[dict]: ...
+
+    async def increment_user_fields(
+        self, user_id: str, increments: Dict[str, float], set_fields: Optional[dict] = None
+    ) -> Optional[dict]: ...
+
+    # Artist operations
+    async def create_artist(self, artist_data: dict) -> dict: ...
+
+    async def get_artist(self, artist_id: str) -> Optional[dict]: ...
+
+    async def get_all_artists(self) -> List[dict]: ...
+
+    async def update_artist(
+        self, artist_id: str, artist_data: dict, current: Optional[dict] = None
+    ) -> Optional[dict]: ...
+
+    # Fan Preference operations
+    async def create_fan_preference(
+        self, preference_data: dict, update_fan_count: bool = True
+    ) -> dict: ...
+
+    async def get_fan_preferences_by_artist(self, artist_id: str) -> List[dict]: ...
+
+    async def get_fan_preferences_by_user(self, user_id: str) -> List[dict]: ...
+
+    async def update_fan_preference(
+        self, artist_id: str, user_id: str, preference_data: dict
+    ) -> Optional[dict]: ...
+
+    # Event Cache operations
+    async def get_event_cache(self, artist_id: str, allow_stale: bool = False) -> Optional[dict]: ...
+
+    async def create_or_update_event_cache(self, event_data: dict) -> dict: ...
+
+    async def event_cache_report(self) -> dict: ...
+
+    # User summary operations
+    async def get_user_summary(self, user_id: str) -> Optional[dict]: ...
+
+    async def upsert_user_summary(self, summary_data: dict) -> dict: ...
+
+    async def update_user_summary(
+        self, user_id: str, mutate: Callable[[Optional[dict]], dict]
+    ) -> dict: ...
+
+    async def add_savings_entry(self, entry: dict) -> dict:
+        """Returns {"summary": ..., "created": bool} (created: the summary did not exist)."""
+        ...
+
+    # Generic document and change feed operations (app.db.change_feed)
+    async def read_document(self, collection_name: str, item_id: str) -> Optional[dict]:
+        """Point read of a document partitioned by id; None if it does not exist."""
+        ...
+
+    async def create_document(self, collection_name: str, document: dict) -> dict:
+        """Insert a new document (partitioned by its id, which must be set);
+        ValueError if the id is taken. Unlike update_document it reads nothing."""
+        ...
+
+    async def update_document(
+        self, collection_name: str, item_id: str, mutate: Callable[[Optional[dict]], Optional[dict]]
+    ) -> Optional[dict]:
+        """Atomically replace a document (partitioned by id) with mutate(current or None);
+        a None result leaves it unchanged and is returned as is."""
+        ...
+
+    async def read_changes(
+        self,
+        collection_name: str,
+        continuation: Optional[str] = None,
+        max_items: int = 100,
+        start_from_beginning: bool = True,
+    ) -> Tuple[List[dict], str]: ...
+
+
+BACKEND_METHODS = tuple(
+    name
+    for name, member in vars(DatabaseBackend).items()
+    if inspect.iscoroutinefunction(member)
+)
+
+
+def missing_methods(backend) -> List[str]:
+    """Protocol methods a backend (class or instance) does not implement as coroutines."""
+    return [
+        name
+        for name in BACKEND_METHODS
+        if not inspect.iscoroutinefunction(getattr(backend, name, None))
+    ]
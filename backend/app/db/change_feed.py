@@ -0,0 +1,221 @@
+"""
+Change feed processor: follow collections and run handlers off the request path.
+
+A processor reads each followed collection through the backend's
+read_changes (the Cosmos change feed, SQLite's seq column or the mock's
+write sequence) and hands every batch to an async handler. Progress is kept
+in a lease document per (processor, collection) in the leases collection:
+- only the owner of an unexpired lease reads that collection, so several
+  workers can run the same processor and exactly one of them does the work
+- the continuation is checkpointed after the handler succeeds, so a batch is
+  retried until it is handled (at-least-once; handlers must be idempotent)
+- a worker that dies stops renewing; another takes over after lease_seconds
+
+Processors that only invalidate in-process caches use LeaseStore.local():
+every process needs to see every change, so their leases are private and
+they start from the current position instead of replaying history.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from datetime import datetime
+
+# 로깅 설정
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+LEASES_COLLECTION = "leases"
+
+CHANGE_FEED_ENABLED = os.getenv("CHANGE_FEED_ENABLED", "false").lower() == "true"
+CHANGE_FEED_POLL_SECONDS = float(os.getenv("CHANGE_FEED_POLL_SECONDS", "1"))
+CHANGE_FEED_LEASE_SECONDS = float(os.getenv("CHANGE_FEED_LEASE_SECONDS", "30"))
+CHANGE_FEED_BATCH_SIZE = int(os.getenv("CHANGE_FEED_BATCH_SIZE", "100"))
+
+
+def default_owner():
+    return f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+
+class _LocalDocuments:
+    """read_document/update_document over a dict, for leases private to this process."""
+
+    def __init__(self):
+        self._documents = {}
+
+    async def read_document(self, collection_name, item_id):
+        current = self._documents.get((collection_name, item_id))
+        return dict(current) if current is not None else None
+
+    async def update_document(self, collection_name, item_id, mutate):
+        current = self._documents.get((collection_name, item_id))
+        updated = mutate(dict(current) if current is not None else None)
+        if updated is None:
+            return None
+        updated["id"] = item_id
+        self._documents[(collection_name, item_id)] = updated
+        return dict(updated)
+
+
+class LeaseStore:
+    """
+    Lease documents: {"id", "owner", "expiresAt" (epoch seconds),
+    "continuation", "updatedAt"}. Every change is an update_document, so
+    two workers racing for a lease cannot both win.
+    """
+
+    def __init__(self, db, collection_name=LEASES_COLLECTION, clock=time.time):
+        self.db = db
+        self.collection_name = collection_name
+        self._clock = clock
+
+    @classmethod
+    def local(cls, clock=time.time):
+        return cls(_LocalDocuments(), clock=clock)
+
+    async def get(self, lease_id):
+        return await self.db.read_document(self.collection_name, lease_id)
+
+    async def acquire(self, lease_id, owner, lease_seconds):
+        """Take or renew the lease; None while another owner holds it."""
+        now = self._clock()
+
+        def take(current):
+            if (
+                current is not None
+                and current.get("owner") not in (None, owner)
+                and current.get("expiresAt", 0) > now
+            ):
+                return None
+            lease = current or {"continuation": None}
+            if lease.get("owner") != owner:
+                logger.info(f"Lease {lease_id} acquired by {owner}")
+            lease.update(
+                owner=owner,
+                expiresAt=now + lease_seconds,
+                updatedAt=datetime.utcnow().isoformat(),
+            )
+            return lease
+
+        return await self.db.update_document(self.collection_name, lease_id, take)
+
+    async def checkpoint(self, lease_id, owner, continuation, lease_seconds):
+        """Store the continuation; False if the lease was lost meanwhile."""
+        now = self._clock()
+
+        def advance(current):
+            if current is None or current.get("owner") != owner:
+                return None
+            current.update(
+                continuation=continuation,
+                expiresAt=now + lease_seconds,
+                updatedAt=datetime.utcnow().isoformat(),
+            )
+            return current
+
+        return await self.db.update_document(self.collection_name, lease_id, advance) is not None
+
+    async def release(self, lease_id, owner):
+        """Give the lease up (keeping its continuation) so another worker can take it now."""
+
+        def drop(current):
+            if current is None or current.get("owner") != owner:
+                return None
+            current.update(owner=None, expiresAt=0, updatedAt=datetime.utcnow().isoformat())
+            return current
+
+        return await self.db.update_document(self.collection_name, lease_id, drop) is not None
+
+
+class ChangeFeedProcessor:
+    """
+    Follow collections with handlers {collection_name: async handler(documents)}.
+    Documents are the latest version of each changed document; deletes are
+    not reported.
+    """
+
+    def __init__(
+        self,
+        db,
+        name,
+        handlers,
+        leases=None,
+        owner=None,
+        lease_seconds=CHANGE_FEED_LEASE_SECONDS,
+        poll_interval=CHANGE_FEED_POLL_SECONDS,
+        batch_size=CHANGE_FEED_BATCH_SIZE,
+        start_from_beginning=True,
+    ):
+        self.db = db
+        self.name = name
+        self.handlers = dict(handlers)
+        self.leases = leases or LeaseStore(db)
+        self.owner = owner or default_owner()
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.start_from_beginning = start_from_beginning
+        self.processed = 0
+        self.failures = 0
+        self._backlog = False
+
+    def lease_id(self, collection_name):
+        return f"{self.name}.{collection_name}"
+
+    async def _process(self, collection_name, handler):
+        lease_id = self.lease_id(collection_name)
+        lease = await self.leases.acquire(lease_id, self.owner, self.lease_seconds)
+        if lease is None:
+            return 0
+
+        continuation = lease.get("continuation")
+        documents, next_continuation = await self.db.read_changes(
+            collection_name, continuation, self.batch_size, self.start_from_beginning
+        )
+        if documents:
+            await handler(documents)
+        self._backlog = self._backlog or len(documents) >= self.batch_size
+        if next_continuation != continuation:
+            if not await self.leases.checkpoint(
+                lease_id, self.owner, next_continuation, self.lease_seconds
+            ):
+                # 리스를 잃었으면 새 소유자가 같은 배치를 다시 처리함
+                logger.warning(f"Lease {lease_id} lost before checkpoint")
+        return len(documents)
+
+    async def run_once(self):
+        """Process one batch per followed collection; returns the number of documents."""
+        processed = 0
+        self._backlog = False
+        for collection_name, handler in self.handlers.items():
+            try:
+                processed += await self._process(collection_name, handler)
+            except Exception as e:
+                # 체크포인트하지 않았으므로 다음 폴링에서 같은 배치를 재시도
+                self.failures += 1
+                logger.error(
+                    f"Change feed {self.lease_id(collection_name)} failed: {str(e)}"
+                )
+        self.processed += processed
+        return processed
+
+    async def release(self):
+        for collection_name in self.handlers:
+            try:
+                await self.leases.release(self.lease_id(collection_name), self.owner)
+            except Exception as e:
+                logger.error(f"Releasing lease {self.lease_id(collection_name)} failed: {str(e)}")
+
+    async def run(self):
+        """Poll until cancelled; releases the leases on the way out."""
+        try:
+            while True:
+                await self.run_once()
+                # 배치가 가득 찼다면 밀린 변경이 더 있으므로 바로 다시 읽음
+                if not self._backlog:
+                    await asyncio.sleep(self.poll_interval)
+        finally:
+            await self.release()
@@ -1,8 +1,24 @@
+import asyncio
+import contextvars
+import functools
 import os
+import threading
+from azure.core import MatchConditions
 from azure.cosmos import CosmosClient, PartitionKey, exceptions
 from dotenv import load_dotenv
+from app.db.base import preference_key
+from app.db.event_cache import FRESH, STALE, cache_state, serialize_cache
+from app.db.indexing import INDEXING_POLICIES
+from app.db.metrics import InstrumentedContainer
+from app.db.throttling import (
+    COSMOS_MAX_CONCURRENCY,
+    COSMOS_RETRY_DEADLINE_SECONDS,
+    call_with_retry,
+)
 import logging
 import json
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime
 
 # Load environment variables
@@ -22,46 +38,249 @@ USERS_CONTAINER = "users"
 ARTISTS_CONTAINER = "artists"
 FAN_PREFERENCES_CONTAINER = "fan_preferences"
 EVENT_CACHE_CONTAINER = "event_cache"
+EVENT_COSTS_CONTAINER = "event_costs"
 SAVINGS_HISTORY_CONTAINER = "savings_history"
+# Per-user financial data, partitioned by user so a user's summary is one point read
+USER_LEDGER_CONTAINER = "user_ledger"
+# Change feed leases and checkpoints (app.db.change_feed)
+LEASES_CONTAINER = "leases"
+# Hashed refresh token records (app.services.refresh_tokens)
+REFRESH_TOKENS_CONTAINER = "refresh_tokens"
+# Failed login attempts shared by all workers (app.services.login_guard)
+LOGIN_ATTEMPTS_CONTAINER = "login_attempts"
+
+# Stored procedures registered on the user ledger container
+ADD_SAVINGS_ENTRY_SPROC = "addSavingsEntry"
+SPROC_DIR = os.path.join(os.path.dirname(__file__), "sprocs")
+
+# Every container the app uses. Provisioned by `python -m app.db.migrate`;
+# at startup they are only looked up, never created.
+CONTAINER_SPECS = {
+    USERS_CONTAINER: {
+        "partition_key": "/id",
+        "indexing_policy": INDEXING_POLICIES[USERS_CONTAINER],
+    },
+    ARTISTS_CONTAINER: {
+        "partition_key": "/id",
+        "indexing_policy": INDEXING_POLICIES[ARTISTS_CONTAINER],
+    },
+    FAN_PREFERENCES_CONTAINER: {
+        "partition_key": "/id",
+        "indexing_policy": INDEXING_POLICIES[FAN_PREFERENCES_CONTAINER],
+    },
+    # TTL enabled with no default: each document sets its own ttl from expiresAt
+    EVENT_CACHE_CONTAINER: {
+        "partition_key": "/id",
+        "default_ttl": -1,
+        "indexing_policy": INDEXING_POLICIES[EVENT_CACHE_CONTAINER],
+    },
+    EVENT_COSTS_CONTAINER: {
+        "partition_key": "/id",
+        "indexing_policy": INDEXING_POLICIES[EVENT_COSTS_CONTAINER],
+    },
+    SAVINGS_HISTORY_CONTAINER: {
+        "partition_key": "/id",
+        "indexing_policy": INDEXING_POLICIES[SAVINGS_HISTORY_CONTAINER],
+    },
+    USER_LEDGER_CONTAINER: {
+        "partition_key": "/user_id",
+        "indexing_policy": INDEXING_POLICIES[USER_LEDGER_CONTAINER],
+        "stored_procedures": {ADD_SAVINGS_ENTRY_SPROC: "add_savings_entry.js"},
+    },
+    LEASES_CONTAINER: {
+        "partition_key": "/id",
+        "indexing_policy": INDEXING_POLICIES[LEASES_CONTAINER],
+    },
+    # Each record sets its own ttl, so expired sessions are deleted by Cosmos
+    REFRESH_TOKENS_CONTAINER: {
+        "partition_key": "/id",
+        "default_ttl": -1,
+        "indexing_policy": INDEXING_POLICIES[REFRESH_TOKENS_CONTAINER],
+    },
+    LOGIN_ATTEMPTS_CONTAINER: {
+        "partition_key": "/id",
+        "default_ttl": -1,
+        "indexing_policy": INDEXING_POLICIES[LOGIN_ATTEMPTS_CONTAINER],
+    },
+}
+
+# Upper bound for resolving all known containers at startup (seconds)
+INIT_TIMEOUT_SECONDS = float(os.getenv("COSMOS_INIT_TIMEOUT_SECONDS", "10"))
+# Upper bound for looking up containers that were not ready yet, per readiness probe
+READINESS_RETRY_TIMEOUT_SECONDS = float(
+    os.getenv("COSMOS_READINESS_RETRY_TIMEOUT_SECONDS", "2")
+)
+
+# Attempts for ETag-guarded read-modify-write before giving up
+MAX_CONCURRENCY_RETRIES = 5
+
+
+def _normalize_paths(entries):
+    """Comparable form of an indexing policy path list (ignores server-added fields)."""
+    normalized = []
+    for entry in entries or []:
+        if isinstance(entry, list):
+            normalized.append(
+                tuple((e["path"], e.get("order", "ascending")) for e in entry)
+            )
+        elif entry.get("path") != '/"_etag"/?':
+            normalized.append(entry["path"])
+    return sorted(normalized)
+
+
+class ConcurrentUpdateError(Exception):
+    """Raised when an optimistic update keeps losing the ETag race."""
+
+
+def _off_loop(method):
+    """
+    Run a blocking SDK method on the Cosmos thread pool (CosmosDB._run), so
+    throttling backoff and admission waits never stall the event loop.
+    """
+
+    @functools.wraps(method)
+    async def run(self, *args, **kwargs):
+        return await self._run(functools.partial(method, self, *args, **kwargs))
+
+    return run
 
 
 class CosmosDB:
-    def __init__(self):
+    def __init__(self, endpoint=None, key=None):
+        # 기본값은 환경 변수; 로컬 대체 서버 (app.db.cosmos_local) 는 직접 지정
+        self.endpoint = endpoint or COSMOS_ENDPOINT
+        self.key = key or COSMOS_KEY
         self.client = None
         self.database = None
         self.containers = {}
+        self.container_states = {}
+        self.startup_ms = None
         self.initialized = False
+        self._executor = None
+        self._resolve_lock = threading.Lock()
+
+    def _connect(self):
+        """Create the Cosmos client and a database proxy (no provisioning)."""
+        # SDK 의 429 재시도는 공개 옵션으로 끌 수 없고 (retry_total=0 은 기본값 취급),
+        # 재시도를 다 쓴 쿼리 페이지는 예외 없이 빈 결과가 됨. 그래서 SDK 재시도는 두고
+        # 대기 시간만 app.db.throttling 의 기한으로 묶음 (남는 429 는 call_with_retry 가 처리)
+        self.client = CosmosClient(
+            self.endpoint, self.key, retry_backoff_max=COSMOS_RETRY_DEADLINE_SECONDS
+        )
+        self.database = self.client.get_database_client(DATABASE_NAME)
 
     def initialize(self):
-        """Initialize the Cosmos DB client and create database and containers if they don't exist."""
-        if not COSMOS_ENDPOINT or not COSMOS_KEY:
+        """
+        Connect to Cosmos DB and resolve the known containers concurrently.
+        Nothing is created here; missing containers are reported through
+        readiness() and must be provisioned with `python -m app.db.migrate`.
+        """
+        if not self.endpoint or not self.key:
             logger.warning("Cosmos DB credentials not provided. Using mock database.")
             self.initialized = False
             return
 
+        started = time.perf_counter()
         try:
-            # Initialize Cosmos client
-            self.client = CosmosClient(COSMOS_ENDPOINT, COSMOS_KEY)
-
-            # Create database if it doesn't exist
-            self.database = self.client.create_database_if_not_exists(id=DATABASE_NAME)
-            logger.info(f"Database '{DATABASE_NAME}' initialized")
-
-            # Create all required containers
-            self._create_container_if_not_exists(USERS_CONTAINER, "/id")
-            self._create_container_if_not_exists(ARTISTS_CONTAINER, "/id")
-            self._create_container_if_not_exists(FAN_PREFERENCES_CONTAINER, "/id")
-            self._create_container_if_not_exists(EVENT_CACHE_CONTAINER, "/id")
-            self._create_container_if_not_exists(SAVINGS_HISTORY_CONTAINER, "/id")
-
+            self._connect()
             self.initialized = True
-            logger.info("Cosmos DB initialization completed successfully")
+            self._resolve_containers()
         except Exception as e:
             logger.error(f"Failed to initialize Cosmos DB: {str(e)}")
             self.initialized = False
 
+        self.startup_ms = round((time.perf_counter() - started) * 1000, 1)
+        logger.info(
+            f"Cosmos DB startup finished in {self.startup_ms} ms: {self.container_states}"
+        )
+
+    def _resolve_container(self, container_id):
+        container = self.database.get_container_client(container_id)
+        container.read()
+        return container
+
+    def _resolve_containers(self, timeout=INIT_TIMEOUT_SECONDS, names=None):
+        """Look up the known containers (or only names) in parallel, bounded by timeout."""
+        names = list(CONTAINER_SPECS if names is None else names)
+        self.container_states.update({name: "pending" for name in names})
+        executor = ThreadPoolExecutor(
+            max_workers=len(names), thread_name_prefix="cosmos-init"
+        )
+        futures = {executor.submit(self._resolve_container, name): name for name in names}
+        done, not_done = wait(futures, timeout=timeout)
+        # 시간 초과된 조회는 기다리지 않음
+        executor.shutdown(wait=False)
+
+        for future in done:
+            name = futures[future]
+            try:
+                self.containers[name] = future.result()
+                self.container_states[name] = "ready"
+            except exceptions.CosmosResourceNotFoundError:
+                self.container_states[name] = "missing"
+                logger.error(
+                    f"Container '{name}' does not exist. Run `python -m app.db.migrate`."
+                )
+            except Exception as e:
+                self.container_states[name] = "error"
+                logger.error(f"Failed to resolve container '{name}': {str(e)}")
+
+        for future in not_done:
+            self.container_states[futures[future]] = "timeout"
+
+    def readiness(self):
+        """
+        Report whether the client is connected and every known container resolved.
+        Containers that were not ready are looked up again first, so one slow or
+        failed lookup at startup does not keep the API unready.
+        """
+        pending = [
+            name for name, state in self.container_states.items() if state != "ready"
+        ]
+        # 동시에 들어온 프로브는 진행 중인 조회를 기다리지 않고 현재 상태를 보고
+        if self.initialized and pending and self._resolve_lock.acquire(blocking=False):
+            try:
+                self._resolve_containers(READINESS_RETRY_TIMEOUT_SECONDS, pending)
+            finally:
+                self._resolve_lock.release()
+        return {
+            "ready": self.initialized
+            and all(state == "ready" for state in self.container_states.values()),
+            "containers": dict(self.container_states),
+            "startup_ms": self.startup_ms,
+        }
+
+    def provision(self):
+        """
+        Create the database, every known container and their stored procedures.
+        Explicit migration step; run with `python -m app.db.migrate`.
+        """
+        if not self.endpoint or not self.key:
+            logger.error("Cosmos DB credentials not provided. Nothing to provision.")
+            return False
+
+        self.client = CosmosClient(self.endpoint, self.key)
+        self.database = self.client.create_database_if_not_exists(id=DATABASE_NAME)
+        logger.info(f"Database '{DATABASE_NAME}' initialized")
+
+        ok = True
+        for name, spec in CONTAINER_SPECS.items():
+            container = self._create_container_if_not_exists(
+                name,
+                spec["partition_key"],
+                spec.get("default_ttl"),
+                spec.get("indexing_policy"),
+            )
+            if not container:
+                ok = False
+                continue
+            self._apply_container_settings(name, container, spec)
+            for sproc_id, filename in spec.get("stored_procedures", {}).items():
+                self._register_stored_procedure(name, sproc_id, filename)
+        return ok
+
     def _create_container_if_not_exists(
-        self, container_id, partition_key_path, default_ttl=None
+        self, container_id, partition_key_path, default_ttl=None, indexing_policy=None
     ):
         """Create a container if it doesn't exist."""
         try:
@@ -71,7 +290,9 @@ class CosmosDB:
             }
 
             if default_ttl is not None:
-                container_params["default_time_to_live"] = default_ttl
+                container_params["default_ttl"] = default_ttl
+            if indexing_policy is not None:
+                container_params["indexing_policy"] = indexing_policy
 
             container = self.database.create_container_if_not_exists(**container_params)
             self.containers[container_id] = container
@@ -91,17 +312,82 @@ class CosmosDB:
                 )
                 return None
 
+    def _apply_container_settings(self, container_id, container, spec):
+        """Bring an existing container's TTL and indexing policy in line with its spec."""
+        properties = container.read()
+        default_ttl = spec.get("default_ttl")
+        indexing_policy = spec.get("indexing_policy")
+
+        ttl_matches = properties.get("defaultTtl") == default_ttl
+        policy_matches = indexing_policy is None or all(
+            _normalize_paths(properties.get("indexingPolicy", {}).get(key))
+            == _normalize_paths(indexing_policy.get(key))
+            for key in ("includedPaths", "excludedPaths", "compositeIndexes")
+        )
+        if ttl_matches and policy_matches:
+            return
+
+        self.database.replace_container(
+            container,
+            partition_key=PartitionKey(path=spec["partition_key"]),
+            indexing_policy=indexing_policy,
+            default_ttl=default_ttl,
+        )
+        logger.info(f"Updated settings of container '{container_id}'")
+
+    def _register_stored_procedure(self, container_id, sproc_id, filename):
+        """Create or refresh a stored procedure from app/db/sprocs."""
+        container = self.containers.get(container_id)
+        if not container:
+            return
+
+        with open(os.path.join(SPROC_DIR, filename), encoding="utf-8") as f:
+            body = {"id": sproc_id, "serverScript": f.read()}
+
+        try:
+            container.scripts.create_stored_procedure(body=body)
+        except exceptions.CosmosResourceExistsError:
+            container.scripts.replace_stored_procedure(sproc=sproc_id, body=body)
+        logger.info(f"Stored procedure '{sproc_id}' registered on '{container_id}'")
+
     def get_container(self, container_id):
-        """Get a container by ID. Create it if it doesn't exist."""
+        """
+        Get a container by ID without any network round trip.
+        Containers are never created on the request path.
+        """
         if not self.initialized:
             logger.warning("Cosmos DB not initialized. Using mock database.")
             return None
 
-        if container_id not in self.containers:
-            logger.info(f"Container '{container_id}' not in cache, creating it...")
-            return self._create_container_if_not_exists(container_id, "/id")
-
-        return self.containers.get(container_id)
+        container = self.containers.get(container_id)
+        if container is None:
+            if container_id not in CONTAINER_SPECS:
+                logger.warning(
+                    f"Container '{container_id}' is not declared in CONTAINER_SPECS"
+                )
+            container = self.database.get_container_client(container_id)
+            self.containers[container_id] = container
+            # 시작 시 조회가 시간 초과되거나 실패했던 컨테이너도 이제 사용 가능
+            # (없는 컨테이너는 readiness() 의 재조회가 확인할 때까지 missing 유지)
+            if self.container_states.get(container_id) not in (None, "missing"):
+                self.container_states[container_id] = "ready"
+        # RU/지연 시간 계측 (app.db.metrics)
+        return InstrumentedContainer(container)
+
+    async def _run(self, operation):
+        """
+        Run operation() on the executor. The caller's context is copied so the
+        request's RU accounting and profile still see the call.
+        """
+        if self._executor is None:
+            # 동시 실행 한도 (AdaptiveConcurrencyLimiter) 와 같은 크기
+            self._executor = ThreadPoolExecutor(
+                max_workers=COSMOS_MAX_CONCURRENCY, thread_name_prefix="cosmos"
+            )
+        context = contextvars.copy_context()
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, context.run, operation
+        )
 
     async def get_collection(self, collection_name):
         """
@@ -112,7 +398,8 @@ class CosmosDB:
         return self.get_container(collection_name)
 
     # User operations
-    async def create_user(self, user_data):
+    @_off_loop
+    def create_user(self, user_data):
         """Create a new user."""
         if not self.initialized:
             logger.warning("Cosmos DB not initialized. Using mock database.")
@@ -137,9 +424,13 @@ class CosmosDB:
         if "updatedAt" in user_data and isinstance(user_data["updatedAt"], datetime):
             user_data["updatedAt"] = user_data["updatedAt"].isoformat()
 
-        return container.create_item(body=user_data)
+        try:
+            return container.create_item(body=user_data)
+        except exceptions.CosmosResourceExistsError:
+            raise ValueError(f"User with ID {user_data['id']} already exists")
 
-    async def get_user(self, user_id):
+    @_off_loop
+    def get_user(self, user_id):
         """Get a user by ID."""
         if not self.initialized:
             logger.warning("Cosmos DB not initialized. Using mock database.")
@@ -149,13 +440,17 @@ class CosmosDB:
         if not container:
             return None
 
+        return self._find_user(container, user_id)
+
+    def _find_user(self, container, user_id):
         query = f"SELECT * FROM c WHERE c.userId = '{user_id}' AND c.type = 'user'"
         items = list(
             container.query_items(query=query, enable_cross_partition_query=True)
         )
         return items[0] if items else None
 
-    async def get_all_users(self):
+    @_off_loop
+    def get_all_users(self):
         """Get all users."""
         if not self.initialized:
             logger.warning("Cosmos DB not initialized. Using mock database.")
@@ -170,8 +465,12 @@ class CosmosDB:
             container.query_items(query=query, enable_cross_partition_query=True)
         )
 
-    async def update_user(self, user_id, user_data):
-        """Update a user."""
+    @_off_loop
+    def update_user(self, user_id, user_data, current=None, increments=None):
+        """
+        Update a user (current: the user as already read in this request).
+        increments are added in the same ETag-guarded replace.
+        """
         if not self.initialized:
             logger.warning("Cosmos DB not initialized. Using mock database.")
             return user_data
@@ -180,14 +479,121 @@ class CosmosDB:
         if not container:
             return user_data
 
-        user = await self.get_user(user_id)
-        if user:
-            user.update(user_data)
-            return container.replace_item(item=user["id"], body=user)
-        return None
+        def apply(user):
+            # userId 는 변경하지 않음 (다른 백엔드와 동일). 요청에서 읽은 문서는
+            # 호출자도 들고 있으므로 사본을 고침
+            user = dict(user)
+            user.update({k: v for k, v in user_data.items() if k != "userId"})
+            for field, value in (increments or {}).items():
+                user[field] = user.get(field, 0) + value
+            user["updatedAt"] = datetime.utcnow().isoformat()
+            return user
+
+        replaced = self._replace_loaded(container, current, apply)
+        if replaced is not None:
+            return replaced
+        user = self._find_user(container, user_id)
+        if user is None:
+            return None
+        replaced = self._replace_loaded(container, user, apply)
+        if replaced is not None:
+            return replaced
+        # 조회와 쓰기 사이에 바뀌었으면 다시 읽어 증가분을 잃지 않음
+        return self._update_with_retry(
+            container, user["id"], user["id"], lambda user: apply(user) if user else None
+        )
+
+    @_off_loop
+    def increment_user_fields(self, user_id, increments, set_fields=None):
+        """
+        Atomically increment numeric fields on a user document.
+        Uses a partial-document patch so concurrent increments are never lost.
+        """
+        if not self.initialized:
+            logger.warning("Cosmos DB not initialized. Using mock database.")
+            return None
+
+        container = self.get_container(USERS_CONTAINER)
+        if not container:
+            return None
+
+        operations = [
+            {"op": "incr", "path": f"/{field}", "value": value}
+            for field, value in increments.items()
+        ]
+        operations += [
+            {"op": "set", "path": f"/{field}", "value": value}
+            for field, value in (set_fields or {}).items()
+        ]
+
+        try:
+            return container.patch_item(
+                item=user_id, partition_key=user_id, patch_operations=operations
+            )
+        except exceptions.CosmosResourceNotFoundError:
+            return None
+
+    def _replace_loaded(self, container, current, apply):
+        """
+        Replace a document read earlier in the request without reading it
+        again, guarded by its ETag. Returns None when there is no usable copy
+        or it is outdated; the caller then reads the current version.
+        """
+        if not current or not current.get("_etag") or not current.get("id"):
+            return None
+        try:
+            return container.replace_item(
+                item=current["id"],
+                body=apply(current),
+                etag=current["_etag"],
+                match_condition=MatchConditions.IfNotModified,
+            )
+        except (
+            exceptions.CosmosAccessConditionFailedError,
+            exceptions.CosmosResourceNotFoundError,
+        ):
+            logger.info(f"Loaded copy of '{current['id']}' is outdated, reading it again")
+            return None
+
+    def _update_with_retry(self, container, item_id, partition_key, mutate):
+        """
+        Read-modify-write an item guarded by its ETag, retrying on conflicts.
+        mutate receives the current document (or None) and returns the new one
+        (None leaves the item unchanged).
+        """
+        for attempt in range(1, MAX_CONCURRENCY_RETRIES + 1):
+            try:
+                current = container.read_item(item=item_id, partition_key=partition_key)
+            except exceptions.CosmosResourceNotFoundError:
+                current = None
+
+            updated = mutate(current)
+            if updated is None:
+                return None
+            try:
+                if current is None:
+                    return container.create_item(body=updated)
+                return container.replace_item(
+                    item=item_id,
+                    body=updated,
+                    etag=current["_etag"],
+                    match_condition=MatchConditions.IfNotModified,
+                )
+            except (
+                exceptions.CosmosAccessConditionFailedError,
+                exceptions.CosmosResourceExistsError,
+            ):
+                logger.info(
+                    f"Concurrent update on '{item_id}', retrying ({attempt}/{MAX_CONCURRENCY_RETRIES})"
+                )
+
+        raise ConcurrentUpdateError(
+            f"Gave up updating '{item_id}' after {MAX_CONCURRENCY_RETRIES} attempts"
+        )
 
     # Artist operations
-    async def create_artist(self, artist_data):
+    @_off_loop
+    def create_artist(self, artist_data):
         """Create a new artist."""
         if not self.initialized:
             logger.warning("Cosmos DB not initialized. Using mock database.")
@@ -205,9 +611,13 @@ class CosmosDB:
                 "artistId", str(hash(artist_data.get("name", "")))
             )
 
-        return container.create_item(body=artist_data)
+        try:
+            return container.create_item(body=artist_data)
+        except exceptions.CosmosResourceExistsError:
+            raise ValueError(f"Artist with ID {artist_data['id']} already exists")
 
-    async def get_artist(self, artist_id):
+    @_off_loop
+    def get_artist(self, artist_id):
         """Get an artist by ID."""
         if not self.initialized:
             logger.warning("Cosmos DB not initialized. Using mock database.")
@@ -217,6 +627,9 @@ class CosmosDB:
         if not container:
             return None
 
+        return self._find_artist(container, artist_id)
+
+    def _find_artist(self, container, artist_id):
         query = (
             f"SELECT * FROM c WHERE c.artistId = '{artist_id}' AND c.type = 'artist'"
         )
@@ -225,7 +638,8 @@ class CosmosDB:
         )
         return items[0] if items else None
 
-    async def get_all_artists(self):
+    @_off_loop
+    def get_all_artists(self):
         """Get all artists."""
         if not self.initialized:
             logger.warning("Cosmos DB not initialized. Using mock database.")
@@ -240,8 +654,9 @@ class CosmosDB:
             container.query_items(query=query, enable_cross_partition_query=True)
         )
 
-    async def update_artist(self, artist_id, artist_data):
-        """Update an artist."""
+    @_off_loop
+    def update_artist(self, artist_id, artist_data, current=None):
+        """Update an artist (current: the artist as already read in this request)."""
         if not self.initialized:
             logger.warning("Cosmos DB not initialized. Using mock database.")
             return artist_data
@@ -250,14 +665,23 @@ class CosmosDB:
         if not container:
             return artist_data
 
-        artist = await self.get_artist(artist_id)
+        def apply(artist):
+            artist = dict(artist)
+            artist.update({k: v for k, v in artist_data.items() if k != "artistId"})
+            artist["updatedAt"] = datetime.utcnow().isoformat()
+            return artist
+
+        replaced = self._replace_loaded(container, current, apply)
+        if replaced is not None:
+            return replaced
+        artist = self._find_artist(container, artist_id)
         if artist:
-            artist.update(artist_data)
-            return container.replace_item(item=artist["id"], body=artist)
+            return container.replace_item(item=artist["id"], body=apply(artist))
         return None
 
     # Fan Preference operations
-    async def create_fan_preference(self, preference_data):
+    @_off_loop
+    def create_fan_preference(self, preference_data, update_fan_count=True):
         """Create a new fan preference."""
         if not self.initialized:
             logger.warning("Cosmos DB not initialized. Using mock database.")
@@ -267,22 +691,37 @@ class CosmosDB:
         if not container:
             return preference_data
 
+        artist_id = preference_data.get("artistId")
+        user_id = preference_data.get("userId")
+        if not artist_id or not user_id:
+            raise ValueError("Artist ID and User ID are required")
+
         # Add document type to distinguish between different entities
         preference_data["type"] = "fan_preference"
-        # Ensure id field exists
-        if "id" not in preference_data:
-            preference_data["id"] = preference_data.get(
-                "preferenceId",
-                str(
-                    hash(
-                        f"{preference_data.get('userId', '')}-{preference_data.get('artistId', '')}"
-                    )
-                ),
+        # (아티스트, 사용자) 로 결정되는 id: 중복 등록은 생성 충돌로 거부됨
+        preference_data["id"] = preference_key(artist_id, user_id)
+        try:
+            created = container.create_item(body=preference_data)
+        except exceptions.CosmosResourceExistsError:
+            raise ValueError(
+                f"Preference for artist {artist_id} and user {user_id} already exists"
             )
 
-        return container.create_item(body=preference_data)
+        # Update artist fan count (부분 패치라 동시 등록에도 증가분이 유실되지 않음)
+        artists = self.get_container(ARTISTS_CONTAINER) if update_fan_count else None
+        if artists:
+            try:
+                artists.patch_item(
+                    item=artist_id,
+                    partition_key=artist_id,
+                    patch_operations=[{"op": "incr", "path": "/fanCount", "value": 1}],
+                )
+            except exceptions.CosmosResourceNotFoundError:
+                pass
+        return created
 
-    async def get_fan_preference(self, preference_id):
+    @_off_loop
+    def get_fan_preference(self, preference_id):
         """Get a fan preference by ID."""
         if not self.initialized:
             logger.warning("Cosmos DB not initialized. Using mock database.")
@@ -298,7 +737,8 @@ class CosmosDB:
         )
         return items[0] if items else None
 
-    async def get_fan_preferences_by_artist(self, artist_id):
+    @_off_loop
+    def get_fan_preferences_by_artist(self, artist_id):
         """Get all fan preferences for an artist."""
         if not self.initialized:
             logger.warning("Cosmos DB not initialized. Using mock database.")
@@ -313,7 +753,8 @@ class CosmosDB:
             container.query_items(query=query, enable_cross_partition_query=True)
         )
 
-    async def get_fan_preferences_by_user(self, user_id):
+    @_off_loop
+    def get_fan_preferences_by_user(self, user_id):
         """Get all fan preferences for a user."""
         if not self.initialized:
             logger.warning("Cosmos DB not initialized. Using mock database.")
@@ -328,7 +769,8 @@ class CosmosDB:
             container.query_items(query=query, enable_cross_partition_query=True)
         )
 
-    async def update_fan_preference(self, artist_id, user_id, preference_data):
+    @_off_loop
+    def update_fan_preference(self, artist_id, user_id, preference_data):
         """Update a fan preference."""
         if not self.initialized:
             logger.warning("Cosmos DB not initialized. Using mock database.")
@@ -346,12 +788,23 @@ class CosmosDB:
         if items:
             item = items[0]
             item.update(preference_data)
+            # artistId/userId 는 키이므로 유지
+            item.update({"artistId": artist_id, "userId": user_id})
             return container.replace_item(item=item["id"], body=item)
         return None
 
     # Event Cache operations
     async def create_event_cache(self, event_data):
         """Create a new event cache."""
+        return await self.create_or_update_event_cache(event_data)
+
+    @_off_loop
+    def create_or_update_event_cache(self, event_data):
+        """
+        Create or update cached event data for an artist.
+        The document carries a per-item ttl derived from expiresAt, so Cosmos
+        deletes it on its own once the grace period has passed.
+        """
         if not self.initialized:
             logger.warning("Cosmos DB not initialized. Using mock database.")
             return event_data
@@ -360,18 +813,14 @@ class CosmosDB:
         if not container:
             return event_data
 
-        # Add document type to distinguish between different entities
-        event_data["type"] = "event_cache"
-        # Ensure id field exists
-        if "id" not in event_data:
-            event_data["id"] = event_data.get(
-                "eventId", str(hash(event_data.get("name", "")))
-            )
-
-        return container.create_item(body=event_data)
+        return container.upsert_item(body=serialize_cache(event_data))
 
-    async def get_event_cache(self, event_id):
-        """Get an event cache by ID."""
+    @_off_loop
+    def get_event_cache(self, artist_id, allow_stale=False):
+        """
+        Get cached event data for an artist with a single point read.
+        Soft-expired data is returned only when allow_stale is set.
+        """
         if not self.initialized:
             logger.warning("Cosmos DB not initialized. Using mock database.")
             return None
@@ -380,15 +829,19 @@ class CosmosDB:
         if not container:
             return None
 
-        query = (
-            f"SELECT * FROM c WHERE c.eventId = '{event_id}' AND c.type = 'event_cache'"
-        )
-        items = list(
-            container.query_items(query=query, enable_cross_partition_query=True)
-        )
-        return items[0] if items else None
+        try:
+            cache = container.read_item(item=artist_id, partition_key=artist_id)
+        except exceptions.CosmosResourceNotFoundError:
+            return None
 
-    async def get_all_event_caches(self):
+        state = cache_state(cache)
+        if state == FRESH or (state == STALE and allow_stale):
+            return cache
+        logger.info(f"Cache for artist {artist_id} is {state}")
+        return None
+
+    @_off_loop
+    def get_all_event_caches(self):
         """Get all event caches."""
         if not self.initialized:
             logger.warning("Cosmos DB not initialized. Using mock database.")
@@ -403,6 +856,221 @@ class CosmosDB:
             container.query_items(query=query, enable_cross_partition_query=True)
         )
 
+    @_off_loop
+    def event_cache_report(self):
+        """
+        Report event cache size. Expired documents are removed by TTL, so this
+        only reads the container's quota headers and counts stale documents.
+        """
+        if not self.initialized:
+            logger.warning("Cosmos DB not initialized. Using mock database.")
+            return {}
+
+        container = self.get_container(EVENT_CACHE_CONTAINER)
+        if not container:
+            return {}
+
+        container.read(populate_quota_info=True)
+        usage = container.client_connection.last_response_headers.get(
+            "x-ms-resource-usage", ""
+        )
+        quota = dict(
+            part.split("=", 1) for part in usage.split(";") if "=" in part
+        )
+
+        stale = list(
+            container.query_items(
+                query="SELECT VALUE COUNT(1) FROM c WHERE c.expiresAt < @now",
+                parameters=[{"name": "@now", "value": datetime.utcnow().isoformat()}],
+                enable_cross_partition_query=True,
+            )
+        )
+        return {
+            "documents": int(quota.get("documentsCount", 0)),
+            "size_kb": int(quota.get("documentsSize", 0)),
+            "stale": sum(stale),
+            "purged": 0,
+        }
+
+    # User summary operations
+    @_off_loop
+    def get_user_summary(self, user_id):
+        """Get a user's financial summary with a single point read."""
+        if not self.initialized:
+            logger.warning("Cosmos DB not initialized. Using mock database.")
+            return None
+
+        container = self.get_container(USER_LEDGER_CONTAINER)
+        if not container:
+            return None
+
+        try:
+            return container.read_item(item=user_id, partition_key=user_id)
+        except exceptions.CosmosResourceNotFoundError:
+            return None
+
+    @_off_loop
+    def upsert_user_summary(self, summary_data):
+        """Create or replace a user's financial summary."""
+        if not self.initialized:
+            logger.warning("Cosmos DB not initialized. Using mock database.")
+            return summary_data
+
+        container = self.get_container(USER_LEDGER_CONTAINER)
+        if not container:
+            return summary_data
+
+        summary_data["type"] = "user_summary"
+        summary_data["id"] = summary_data["user_id"]
+        return container.upsert_item(body=summary_data)
+
+    @_off_loop
+    def update_user_summary(self, user_id, mutate):
+        """
+        Apply mutate to a user's summary with optimistic concurrency.
+        mutate receives the current summary (or None) and returns the new one.
+        """
+        if not self.initialized:
+            logger.warning("Cosmos DB not initialized. Using mock database.")
+            return None
+
+        container = self.get_container(USER_LEDGER_CONTAINER)
+        if not container:
+            return None
+
+        def apply(current):
+            summary = mutate(current)
+            summary["type"] = "user_summary"
+            summary["id"] = user_id
+            return summary
+
+        return self._update_with_retry(container, user_id, user_id, apply)
+
+    @_off_loop
+    def add_savings_entry(self, entry):
+        """
+        Write a savings ledger entry and fold it into the user's summary in one
+        server-side transaction scoped to the user's partition.
+        Returns {"summary": ..., "created": bool}.
+        """
+        if not self.initialized:
+            logger.warning("Cosmos DB not initialized. Using mock database.")
+            return {"summary": None, "created": False}
+
+        container = self.get_container(USER_LEDGER_CONTAINER)
+        if not container:
+            return {"summary": None, "created": False}
+
+        result = container.scripts.execute_stored_procedure(
+            sproc=ADD_SAVINGS_ENTRY_SPROC,
+            partition_key=entry["user_id"],
+            params=[entry],
+        )
+        # 다른 백엔드와 같이 중복 항목은 ValueError
+        if result.get("duplicate"):
+            raise ValueError(f"Savings entry {entry.get('id')} already exists")
+        return result
+
+    # Generic document and change feed operations
+    @_off_loop
+    def read_document(self, collection_name, item_id):
+        """Point read of a document in an /id partitioned container."""
+        if not self.initialized:
+            logger.warning("Cosmos DB not initialized. Using mock database.")
+            return None
+
+        container = self.get_container(collection_name)
+        if not container:
+            return None
+
+        try:
+            return container.read_item(item=item_id, partition_key=item_id)
+        except exceptions.CosmosResourceNotFoundError:
+            return None
+
+    @_off_loop
+    def create_document(self, collection_name, document):
+        """Insert a new document into an /id partitioned container (a single write)."""
+        if not self.initialized:
+            logger.warning("Cosmos DB not initialized. Using mock database.")
+            return None
+
+        container = self.get_container(collection_name)
+        if not container:
+            return None
+
+        try:
+            return container.create_item(body=document)
+        except exceptions.CosmosResourceExistsError:
+            raise ValueError(f"Document {document['id']} already exists in {collection_name}")
+
+    @_off_loop
+    def update_document(self, collection_name, item_id, mutate):
+        """ETag-guarded read-modify-write of a document in an /id partitioned container."""
+        if not self.initialized:
+            logger.warning("Cosmos DB not initialized. Using mock database.")
+            return None
+
+        container = self.get_container(collection_name)
+        if not container:
+            return None
+
+        def apply(current):
+            updated = mutate(current)
+            if updated is not None:
+                updated["id"] = item_id
+            return updated
+
+        return self._update_with_retry(container, item_id, item_id, apply)
+
+    @_off_loop
+    def read_changes(
+        self, collection_name, continuation=None, max_items=100, start_from_beginning=True
+    ):
+        """
+        Change feed of a container, one page per partition key range in turn.
+        The continuation is a JSON map of range id -> that range's ETag; a range
+        missing from it (new, or split) is read from the beginning.
+        """
+        if not self.initialized:
+            logger.warning("Cosmos DB not initialized. Using mock database.")
+            return [], continuation
+
+        container = self.get_container(collection_name)
+        if not container:
+            return [], continuation
+
+        tokens = json.loads(continuation) if continuation else {}
+        # 파티션 키 범위 id 는 컨테이너의 범위별 통계 (공개 API) 에서 가져옴
+        properties = call_with_retry(
+            lambda: container.read(populate_partition_key_range_statistics=True)
+        )
+        range_ids = [stats["id"] for stats in properties.get("statistics") or []]
+        documents = []
+        for range_id in range_ids:
+            remaining = max_items - len(documents)
+            if remaining <= 0:
+                break
+
+            def fetch():
+                # 훅은 페이지마다 호출되므로 마지막 응답의 ETag 가 다음 위치
+                etags = []
+                pages = container.query_items_change_feed(
+                    partition_key_range_id=range_id,
+                    is_start_from_beginning=start_from_beginning or continuation is not None,
+                    continuation=tokens.get(range_id),
+                    max_item_count=remaining,
+                    response_hook=lambda headers, _: etags.append(headers.get("etag")),
+                ).by_page()
+                page = list(next(pages, []))
+                return page, etags[-1] if etags else None
+
+            page, etag = call_with_retry(fetch)
+            documents.extend(page)
+            if etag:
+                tokens[range_id] = etag
+        return documents, json.dumps(tokens, sort_keys=True)
+
 
 # Create a singleton instance
 cosmos_db = CosmosDB()
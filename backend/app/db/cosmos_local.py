@@ -0,0 +1,673 @@
+"""
+Local stand-in for the Cosmos DB gateway, so the real CosmosDB code path
+(azure-cosmos SDK, InstrumentedContainer, throttling) runs without an account.
+
+Implements the subset of the REST API the app uses:
+- database account read, database and container create/read/replace/delete
+- documents: create, upsert, point read, replace (If-Match), patch, delete,
+  read feed and SQL queries with x-ms-max-item-count / x-ms-continuation
+  (SQL is evaluated by app.db.mock_query, so the same subset is supported)
+- the change feed (A-IM: Incremental feed, If-None-Match LSN continuation)
+- stored procedures: registration stores the JavaScript body, execution runs
+  the Python twin registered in STORED_PROCEDURES
+- per-item ttl when the container has defaultTtl, x-ms-resource-usage quota
+  headers on container reads
+- x-ms-request-charge on every response (approximate RU model below)
+
+Faults for load tests: a fixed `latency_ms` on every request, and 429
+responses (with x-ms-retry-after-ms) on document and stored procedure
+requests, either with probability `throttle_rate` or for the next n requests
+(throttle_next). The master key signature is not verified; any base64 key works.
+
+    cd backend
+    python -m app.db.cosmos_local --port 8081 --latency-ms 5 --throttle-rate 0.05
+    AZURE_COSMOS_DB_ENDPOINT=http://127.0.0.1:8081/ AZURE_COSMOS_DB_KEY=<KEY> \\
+        python -m app.db.migrate
+"""
+
+import argparse
+import base64
+import copy
+import json
+import random
+import threading
+import time
+import uuid
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlparse
+
+from app.db.indexing import DEFAULT_INDEXING_POLICY, estimate_write_ru
+from app.db.ledger import USER_SUMMARY_TYPE, apply_savings, empty_summary
+from app.db.mock_query import (
+    QuerySyntaxError,
+    bind_parameters,
+    execute,
+    parse_query,
+)
+
+# Cosmos DB Emulator 의 공개 키 (서명은 검증하지 않음)
+KEY = "C2y6yDjf5/R+ob0N8A7Cgv30VRDJIWEHLM+4QDU5DE2nQ9nDuVTqobD4b8mGGyPMbIZnqyMsEcaGQy67XIw/Jw=="
+
+DEFAULT_PAGE_SIZE = 100
+DEFAULT_RETRY_AFTER_MS = 100
+
+# Approximate RU model: point reads ~1 RU/KB, writes per app.db.indexing
+# (estimate_write_ru, replace/patch count double), queries pay a fixed cost
+# plus a little per scanned document
+READ_RU_PER_KB = 1.0
+QUERY_BASE_RU = 2.79
+QUERY_RU_PER_SCANNED = 0.05
+SPROC_BASE_RU = 3.0
+
+_SYSTEM_FIELDS = ("_rid", "_self", "_etag", "_attachments", "_ts", "_lsn")
+
+
+class CosmosError(Exception):
+    """An error response (status, Cosmos error code, message)."""
+
+    def __init__(self, status, code, message, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+        self.headers = headers or {}
+
+
+def _not_found(what):
+    return CosmosError(404, "NotFound", f"{what} does not exist")
+
+
+def _kb(document):
+    return max(1.0, len(json.dumps(document, default=str)) / 1024)
+
+
+def _rid():
+    return base64.b64encode(uuid.uuid4().bytes[:8]).decode()
+
+
+def _resolve_path(document, path):
+    """Parent container and final key of a JSON patch path such as /monthly/2024-01."""
+    parts = [unquote(p) for p in path.strip("/").split("/")]
+    parent = document
+    for part in parts[:-1]:
+        parent = parent[int(part)] if isinstance(parent, list) else parent[part]
+    return parent, parts[-1]
+
+
+def apply_patch(document, operations):
+    """Apply Cosmos partial-update operations (add, set, replace, remove, incr)."""
+    for operation in operations:
+        op, path = operation["op"], operation["path"]
+        try:
+            parent, key = _resolve_path(document, path)
+            if isinstance(parent, list):
+                index = len(parent) if key == "-" else int(key)
+                if op == "add":
+                    parent.insert(index, operation["value"])
+                elif op == "remove":
+                    del parent[index]
+                elif op == "incr":
+                    parent[index] += operation["value"]
+                else:
+                    parent[index] = operation["value"]
+            elif op in ("add", "set"):
+                parent[key] = operation["value"]
+            elif op == "replace":
+                if key not in parent:
+                    raise KeyError(key)
+                parent[key] = operation["value"]
+            elif op == "remove":
+                del parent[key]
+            elif op == "incr":
+                current = parent.get(key, 0)
+                if isinstance(current, bool) or not isinstance(current, (int, float)):
+                    raise TypeError(f"{path} is not a number")
+                parent[key] = current + operation["value"]
+            else:
+                raise CosmosError(400, "BadRequest", f"Unsupported patch operation {op}")
+        except (KeyError, IndexError, ValueError, TypeError) as e:
+            raise CosmosError(400, "BadRequest", f"Patch {op} {path} failed: {e}")
+    return document
+
+
+class Container:
+    """Documents of one container keyed by (partition key JSON, id)."""
+
+    def __init__(self, database_id, properties):
+        self.properties = properties
+        self.database_id = database_id
+        self.documents = {}
+        self.sprocs = {}
+        self.lock = threading.RLock()
+        self.lsn = 0
+
+    @property
+    def id(self):
+        return self.properties["id"]
+
+    @property
+    def partition_key_path(self):
+        return self.properties["partitionKey"]["paths"][0]
+
+    def partition_key_of(self, document):
+        value = document
+        for part in self.partition_key_path.strip("/").split("/"):
+            value = value.get(part) if isinstance(value, dict) else None
+        return json.dumps([value])
+
+    def _expired(self, document, now):
+        default_ttl = self.properties.get("defaultTtl")
+        if default_ttl is None:
+            return False
+        ttl = document.get("ttl", default_ttl)
+        return ttl not in (None, -1) and document["_ts"] + ttl <= now
+
+    def live_documents(self, partition_key=None):
+        """Documents that have not outlived their ttl (expired ones are purged)."""
+        now = time.time()
+        expired = [k for k, doc in self.documents.items() if self._expired(doc, now)]
+        for key in expired:
+            del self.documents[key]
+        if partition_key is None:
+            return list(self.documents.values())
+        return [doc for (pk, _), doc in self.documents.items() if pk == partition_key]
+
+    def _current(self, key):
+        document = self.documents.get(key)
+        if document is not None and self._expired(document, time.time()):
+            del self.documents[key]
+            return None
+        return document
+
+    def get(self, partition_key, document_id):
+        document = self._current((partition_key, document_id))
+        if document is None:
+            raise _not_found(f"Document {document_id}")
+        return document
+
+    def write(self, document, partition_key=None, mode="create", if_match=None):
+        """create / upsert / replace; returns the stored document."""
+        if not isinstance(document.get("id"), str) or not document["id"]:
+            raise CosmosError(400, "BadRequest", "The input content is invalid: missing id")
+        partition_key = partition_key or self.partition_key_of(document)
+        key = (partition_key, document["id"])
+        current = self._current(key)
+        if mode == "create" and current is not None:
+            raise CosmosError(409, "Conflict", f"Document {document['id']} already exists")
+        if mode == "replace" and current is None:
+            raise _not_found(f"Document {document['id']}")
+        if if_match and current is not None and current["_etag"] != if_match:
+            raise CosmosError(412, "PreconditionFailed", "The etag does not match")
+
+        stored = {k: v for k, v in document.items() if k not in _SYSTEM_FIELDS}
+        self.lsn += 1
+        stored.update(
+            {
+                "_rid": current["_rid"] if current else _rid(),
+                "_self": f"dbs/{self.database_id}/colls/{self.id}/docs/{document['id']}",
+                "_etag": f'"{uuid.uuid4()}"',
+                "_attachments": "attachments/",
+                "_ts": int(time.time()),
+                "_lsn": self.lsn,
+            }
+        )
+        self.documents[key] = stored
+        return stored
+
+    def delete(self, partition_key, document_id):
+        self.get(partition_key, document_id)
+        del self.documents[(partition_key, document_id)]
+
+    def quota_usage(self):
+        documents = self.live_documents()
+        size = sum(len(json.dumps(doc, default=str)) for doc in documents)
+        return f"documentsCount={len(documents)};documentsSize={size // 1024};collectionSize={size // 1024}"
+
+
+# 저장 프로시저는 JavaScript 대신 같은 동작의 Python 구현을 실행
+def _add_savings_entry(container, partition_key, entry):
+    """Python twin of app/db/sprocs/add_savings_entry.js."""
+    entry = dict(entry)
+    entry.setdefault("id", str(uuid.uuid4()))
+    user_id = entry["user_id"]
+    try:
+        summary = copy.deepcopy(container.get(partition_key, user_id))
+        created = False
+    except CosmosError:
+        summary = empty_summary(user_id)
+        summary.update({"id": user_id, "type": USER_SUMMARY_TYPE})
+        created = True
+
+    apply_savings(summary, entry)
+    summary["updatedAt"] = datetime.utcnow().isoformat()
+    try:
+        container.write(entry, partition_key, mode="create")
+    except CosmosError as e:
+        if e.status != 409:
+            raise
+        return {"summary": None, "created": False, "duplicate": True}
+    saved = container.write(summary, partition_key, mode="upsert")
+    return {"summary": saved, "created": created}
+
+
+STORED_PROCEDURES = {"addSavingsEntry": _add_savings_entry}
+
+
+class LocalCosmosAccount:
+    """In-memory state of the emulated account: databases -> containers."""
+
+    def __init__(self):
+        self.databases = {}
+        self.lock = threading.RLock()
+
+    def database(self, database_id):
+        with self.lock:
+            if database_id not in self.databases:
+                raise _not_found(f"Database {database_id}")
+            return self.databases[database_id]
+
+    def container(self, database_id, container_id):
+        containers = self.database(database_id)["containers"]
+        with self.lock:
+            if container_id not in containers:
+                raise _not_found(f"Container {container_id}")
+            return containers[container_id]
+
+
+class LocalCosmosServer:
+    """
+    Threaded HTTP server speaking the Cosmos DB REST subset described above.
+    Use as a context manager or call start()/stop(); `endpoint` and `key`
+    are what CosmosClient (or CosmosDB(endpoint, key)) needs.
+    """
+
+    def __init__(
+        self,
+        host="127.0.0.1",
+        port=0,
+        latency_ms=0.0,
+        throttle_rate=0.0,
+        retry_after_ms=DEFAULT_RETRY_AFTER_MS,
+        seed=None,
+    ):
+        self.account = LocalCosmosAccount()
+        self.latency_ms = latency_ms
+        self.throttle_rate = throttle_rate
+        self.retry_after_ms = retry_after_ms
+        self.key = KEY
+        self.requests = 0
+        self.throttled = 0
+        self._forced_throttles = 0
+        self._random = random.Random(seed)
+        self._counter_lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), _handler_for(self))
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def endpoint(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever,
+            kwargs={"poll_interval": 0.05},
+            name="cosmos-local",
+            daemon=True,
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def throttle_next(self, count):
+        """Answer the next `count` document/sproc requests with 429."""
+        with self._counter_lock:
+            self._forced_throttles += count
+
+    def _should_throttle(self):
+        with self._counter_lock:
+            self.requests += 1
+            throttle = self._forced_throttles > 0 or (
+                self.throttle_rate > 0 and self._random.random() < self.throttle_rate
+            )
+            if self._forced_throttles > 0:
+                self._forced_throttles -= 1
+            if throttle:
+                self.throttled += 1
+            return throttle
+
+    def stats(self):
+        with self._counter_lock:
+            return {"requests": self.requests, "throttled": self.throttled}
+
+    # Request handling: (method, path segments, headers, body) -> (status, body, headers)
+    def handle(self, method, segments, headers, body):
+        if not segments:
+            return 200, self._account_properties(), {}
+        if segments[0] != "dbs":
+            raise _not_found("/".join(segments))
+
+        data_plane = segments[4:5] == ["docs"] or (
+            segments[4:5] == ["sprocs"] and len(segments) == 6 and method == "POST"
+        )
+        if data_plane and self._should_throttle():
+            raise CosmosError(
+                429,
+                "TooManyRequests",
+                "Request rate is large. More Request Units may be needed.",
+                {"x-ms-retry-after-ms": str(self.retry_after_ms), "x-ms-substatus": "3200"},
+            )
+
+        if len(segments) == 1:
+            return self._databases(method, body)
+        if len(segments) == 2:
+            return self._database(method, segments[1])
+        if len(segments) == 3 and segments[2] == "colls":
+            return self._create_container(method, segments[1], body)
+        container = self.account.container(segments[1], segments[3])
+        if len(segments) == 4:
+            return self._container(method, segments[1], container, headers, body)
+
+        with container.lock:
+            if segments[4] == "pkranges":
+                ranges = [{"id": "0", "minInclusive": "", "maxExclusive": "FF"}]
+                return 200, {"_rid": _rid(), "PartitionKeyRanges": ranges, "_count": 1}, {}
+            if segments[4] == "docs" and len(segments) == 5:
+                return self._documents(method, container, headers, body)
+            if segments[4] == "docs":
+                return self._document(method, container, segments[5], headers, body)
+            if segments[4] == "sprocs":
+                return self._sprocs(method, container, segments[5:], headers, body)
+        raise _not_found("/".join(segments))
+
+    def _account_properties(self):
+        return {
+            "id": "localhost",
+            "_rid": "localhost",
+            "media": "//media/",
+            "addresses": "//addresses/",
+            "_dbs": "//dbs/",
+            "writableLocations": [],
+            "readableLocations": [],
+            "enableMultipleWriteLocations": False,
+            "userConsistencyPolicy": {"defaultConsistencyLevel": "Session"},
+        }
+
+    def _databases(self, method, body):
+        with self.account.lock:
+            if method == "GET":
+                databases = [db["properties"] for db in self.account.databases.values()]
+                return 200, {"Databases": databases, "_count": len(databases)}, {}
+            if body["id"] in self.account.databases:
+                raise CosmosError(409, "Conflict", f"Database {body['id']} already exists")
+            properties = {"id": body["id"], "_rid": _rid(), "_self": f"dbs/{body['id']}/"}
+            self.account.databases[body["id"]] = {"properties": properties, "containers": {}}
+            return 201, properties, {}
+
+    def _database(self, method, database_id):
+        database = self.account.database(database_id)
+        if method == "DELETE":
+            with self.account.lock:
+                del self.account.databases[database_id]
+            return 204, None, {}
+        return 200, database["properties"], {}
+
+    def _create_container(self, method, database_id, body):
+        containers = self.account.database(database_id)["containers"]
+        with self.account.lock:
+            if method == "GET":
+                collections = [c.properties for c in containers.values()]
+                return 200, {"DocumentCollections": collections, "_count": len(collections)}, {}
+            if body["id"] in containers:
+                raise CosmosError(409, "Conflict", f"Container {body['id']} already exists")
+            containers[body["id"]] = Container(
+                database_id, self._container_properties(database_id, body)
+            )
+            return 201, containers[body["id"]].properties, {}
+
+    def _container_properties(self, database_id, body):
+        properties = dict(body, _self=f"dbs/{database_id}/colls/{body['id']}/")
+        properties.setdefault("partitionKey", {"paths": ["/id"], "kind": "Hash"})
+        properties.setdefault("indexingPolicy", {"indexingMode": "consistent", "automatic": True})
+        properties.update({"_rid": _rid(), "_etag": f'"{uuid.uuid4()}"', "_ts": int(time.time())})
+        return properties
+
+    def _container(self, method, database_id, container, headers, body):
+        if method == "DELETE":
+            with self.account.lock:
+                del self.account.database(database_id)["containers"][container.id]
+            return 204, None, {}
+        if method == "PUT":
+            with container.lock:
+                container.properties = self._container_properties(database_id, body)
+        response_headers = {}
+        if headers.get("x-ms-documentdb-populatequotainfo", "").lower() == "true":
+            with container.lock:
+                response_headers["x-ms-resource-usage"] = container.quota_usage()
+        if headers.get("x-ms-documentdb-populatepartitionstatistics", "").lower() == "true":
+            with container.lock:
+                count = len(container.live_documents())
+            statistics = [{"id": "0", "documentCount": count, "partitionKeys": []}]
+            return 200, dict(container.properties, statistics=statistics), response_headers
+        return 200, container.properties, response_headers
+
+    def _documents(self, method, container, headers, body):
+        partition_key = _partition_key(headers)
+        if method == "GET" and headers.get("a-im", "").lower() == "incremental feed":
+            return self._change_feed(container, partition_key, headers)
+        if method == "GET" or headers.get("x-ms-documentdb-isquery", "").lower() == "true":
+            return self._query(container, partition_key, headers, body)
+
+        upsert = headers.get("x-ms-documentdb-is-upsert", "").lower() == "true"
+        document = container.write(body, partition_key, mode="upsert" if upsert else "create")
+        return 201, document, {"x-ms-request-charge": _write_charge(container, document)}
+
+    def _query(self, container, partition_key, headers, body):
+        if isinstance(body, str):
+            body = {"query": body}
+        documents = container.live_documents(partition_key)
+        try:
+            query = parse_query((body or {}).get("query") or "SELECT * FROM c")
+            rows = execute(query, documents, bind_parameters((body or {}).get("parameters")))
+        except QuerySyntaxError as e:
+            raise CosmosError(400, "BadRequest", f"Syntax error: {e}")
+
+        # 연속 토큰은 다음 결과의 위치 (요청마다 쿼리를 다시 평가)
+        token = headers.get("x-ms-continuation") or "0"
+        if not token.isdigit():
+            raise CosmosError(400, "BadRequest", "Invalid continuation token")
+        offset = int(token)
+        page_size = int(headers.get("x-ms-max-item-count") or -1)
+        if page_size <= 0:
+            page_size = DEFAULT_PAGE_SIZE
+        page = rows[offset : offset + page_size]
+        charge = QUERY_BASE_RU + QUERY_RU_PER_SCANNED * len(documents)
+        response_headers = {
+            "x-ms-request-charge": f"{charge + sum(_kb(row) for row in page) - 1:.2f}",
+            "x-ms-item-count": str(len(page)),
+        }
+        if offset + page_size < len(rows):
+            response_headers["x-ms-continuation"] = str(offset + page_size)
+        return 200, {"_rid": container.properties["_rid"], "Documents": page, "_count": len(page)}, response_headers
+
+    def _change_feed(self, container, partition_key, headers):
+        """Latest version of each document written after If-None-Match (an LSN), in order."""
+        since = headers.get("if-none-match")
+        since = container.lsn if since == "*" else int(since or 0)
+        changed = sorted(
+            (doc for doc in container.live_documents(partition_key) if doc["_lsn"] > since),
+            key=lambda doc: doc["_lsn"],
+        )
+        page_size = int(headers.get("x-ms-max-item-count") or -1)
+        page = changed[: page_size if page_size > 0 else DEFAULT_PAGE_SIZE]
+        last = page[-1]["_lsn"] if page else since
+        response_headers = {
+            "etag": str(last),
+            "x-ms-item-count": str(len(page)),
+            "x-ms-request-charge": f"{QUERY_BASE_RU + sum(_kb(doc) for doc in page) - 1:.2f}",
+        }
+        return 200, {"_rid": container.properties["_rid"], "Documents": page, "_count": len(page)}, response_headers
+
+    def _document(self, method, container, document_id, headers, body):
+        partition_key = _partition_key(headers) or json.dumps([document_id])
+        if method == "GET":
+            document = container.get(partition_key, document_id)
+            return 200, document, {"x-ms-request-charge": _charge(READ_RU_PER_KB, document)}
+        if method == "DELETE":
+            container.delete(partition_key, document_id)
+            return 204, None, {"x-ms-request-charge": _write_charge(container, {})}
+        if method == "PATCH":
+            document = copy.deepcopy(container.get(partition_key, document_id))
+            patched = apply_patch(document, body.get("operations", []))
+            stored = container.write(
+                patched, partition_key, mode="replace", if_match=headers.get("if-match")
+            )
+            return 200, stored, {"x-ms-request-charge": _write_charge(container, stored, 2)}
+        if body.get("id") != document_id:
+            raise CosmosError(400, "BadRequest", "The id of the body does not match the link")
+        stored = container.write(
+            body, partition_key, mode="replace", if_match=headers.get("if-match")
+        )
+        return 200, stored, {"x-ms-request-charge": _write_charge(container, stored, 2)}
+
+    def _sproc_properties(self, container, body):
+        return dict(
+            body,
+            _rid=_rid(),
+            _self=f"{container.properties['_self']}sprocs/{body['id']}/",
+            _etag=f'"{uuid.uuid4()}"',
+        )
+
+    def _sprocs(self, method, container, rest, headers, body):
+        if not rest:
+            if body["id"] in container.sprocs:
+                raise CosmosError(409, "Conflict", f"Stored procedure {body['id']} already exists")
+            container.sprocs[body["id"]] = self._sproc_properties(container, body)
+            return 201, container.sprocs[body["id"]], {}
+
+        sproc_id = rest[0]
+        if sproc_id not in container.sprocs:
+            raise _not_found(f"Stored procedure {sproc_id}")
+        if method == "PUT":
+            container.sprocs[sproc_id] = self._sproc_properties(container, body)
+            return 200, container.sprocs[sproc_id], {}
+        if method == "GET":
+            return 200, container.sprocs[sproc_id], {}
+
+        implementation = STORED_PROCEDURES.get(sproc_id)
+        if implementation is None:
+            raise CosmosError(400, "BadRequest", f"No Python implementation for {sproc_id}")
+        partition_key = _partition_key(headers)
+        params = body if isinstance(body, list) else [body]
+        # 저장 프로시저는 파티션 안에서 원자적: 컨테이너 락을 잡은 채 실행
+        snapshot = dict(container.documents)
+        try:
+            result = implementation(container, partition_key, *params)
+        except CosmosError:
+            container.documents = snapshot
+            raise
+        return 200, result, {"x-ms-request-charge": _charge(SPROC_BASE_RU, result)}
+
+
+def _partition_key(headers):
+    """Normalized x-ms-documentdb-partitionkey header (None when absent)."""
+    value = headers.get("x-ms-documentdb-partitionkey")
+    return json.dumps(json.loads(value)) if value else None
+
+
+def _charge(ru_per_kb, document):
+    return f"{ru_per_kb * _kb(document):.2f}"
+
+
+def _write_charge(container, document, multiplier=1):
+    """Write RU from the container's indexing policy (app.db.indexing)."""
+    policy = container.properties.get("indexingPolicy") or {}
+    if "includedPaths" not in policy:
+        policy = DEFAULT_INDEXING_POLICY
+    size = len(json.dumps(document, default=str).encode())
+    return f"{multiplier * estimate_write_ru(document, policy, size):.2f}"
+
+
+def _handler_for(server):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # 헤더와 본문을 한 번에 보냄 (분할 전송 시 delayed ACK 로 수십 ms 지연)
+        wbufsize = 64 * 1024
+        disable_nagle_algorithm = True
+
+        def log_message(self, format, *args):  # noqa: A002 - 요청 로그는 남기지 않음
+            pass
+
+        def _dispatch(self):
+            if server.latency_ms:
+                time.sleep(server.latency_ms / 1000)
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length) if length else b""
+            headers = {k.lower(): v for k, v in self.headers.items()}
+            segments = [unquote(s) for s in urlparse(self.path).path.split("/") if s]
+            try:
+                body = json.loads(raw) if raw else None
+                if isinstance(body, dict) and "query" in body:
+                    headers.setdefault("x-ms-documentdb-isquery", "true")
+                status, payload, response_headers = server.handle(
+                    self.command, segments, headers, body
+                )
+            except CosmosError as e:
+                status, response_headers = e.status, dict(e.headers)
+                payload = {"code": e.code, "message": str(e)}
+                response_headers.setdefault("x-ms-request-charge", "1.00")
+            except (ValueError, KeyError, TypeError) as e:
+                status, response_headers = 400, {"x-ms-request-charge": "0.00"}
+                payload = {"code": "BadRequest", "message": f"Malformed request: {e}"}
+
+            data = b"" if payload is None else json.dumps(payload, default=str).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.send_header("x-ms-activity-id", str(uuid.uuid4()))
+            response_headers.setdefault("x-ms-request-charge", "1.00")
+            if isinstance(payload, dict) and "_etag" in payload:
+                response_headers.setdefault("etag", payload["_etag"])
+            for name, value in response_headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _dispatch
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after-ms", type=int, default=DEFAULT_RETRY_AFTER_MS)
+    args = parser.parse_args()
+
+    server = LocalCosmosServer(
+        args.host, args.port, args.latency_ms, args.throttle_rate, args.retry_after_ms
+    )
+    print(f"Cosmos DB stand-in listening on {server.endpoint} (key: {server.key})")
+    try:
+        server.start()._thread.join()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,13 @@
 import os
 import logging
-from app.db.cosmos_db import cosmos_db
+from app.db.artist_cache import ArtistCache
+from app.db.change_feed import CHANGE_FEED_ENABLED
+from app.db.identity_map import current_identity_map
+from app.db.profiler import REQUEST_PROFILER_ENABLED, ProfiledBackend
+from app.db.principal_cache import PRINCIPAL_CACHE_TTL_SECONDS, ClaimsVersions, PrincipalCache
+from app.db.cosmos_db import ARTISTS_CONTAINER, USERS_CONTAINER, cosmos_db
 from app.db.mock_db import mock_db
+from app.db.sqlite_db import sqlite_db
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -10,53 +16,159 @@ logger = logging.getLogger(__name__)
 # Check if Cosmos DB credentials are provided
 COSMOS_ENDPOINT = os.getenv("AZURE_COSMOS_DB_ENDPOINT")
 COSMOS_KEY = os.getenv("AZURE_COSMOS_DB_KEY")
+# cosmos / sqlite / mock; 지정하지 않으면 Cosmos 자격 증명이 있을 때만 cosmos
+DATABASE_BACKEND = os.getenv("DATABASE_BACKEND", "").lower()
+
+BACKENDS = {"cosmos": cosmos_db, "sqlite": sqlite_db, "mock": mock_db}
+BACKEND_NAMES = {"cosmos": "Cosmos DB", "sqlite": "SQLite", "mock": "Mock DB"}
+
+# 액세스 토큰에 담기는 사용자 필드 (app.services.auth.get_current_claims);
+# 바뀌면 claimsVersion 이 올라가 이전 토큰의 클레임은 더 이상 쓰이지 않음
+CLAIM_FIELDS = ("area", "content_interests", "preferences")
+CLAIMS_VERSION_FIELD = "claimsVersion"
 
 
 class DatabaseService:
     """Database service that uses either Cosmos DB or the mock database."""
 
-    def __init__(self):
-        self.use_cosmos = bool(COSMOS_ENDPOINT and COSMOS_KEY)
-        self.db = cosmos_db if self.use_cosmos else mock_db
+    def __init__(self, backend=DATABASE_BACKEND, profile=REQUEST_PROFILER_ENABLED):
+        if not backend:
+            backend = "cosmos" if COSMOS_ENDPOINT and COSMOS_KEY else "mock"
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown DATABASE_BACKEND: {backend}")
+        self.backend = backend
+        self.use_cosmos = backend == "cosmos"
+        self.db = BACKENDS[backend]
+        if profile:
+            # 개발용: 요청마다 백엔드 호출을 기록 (app.db.profiler)
+            self.db = ProfiledBackend(self.db)
+        # 아티스트 카탈로그는 거의 바뀌지 않으므로 메모리에서 읽음
+        self.artist_cache = ArtistCache()
+        # 인증된 요청마다 사용자를 다시 읽지 않도록 짧은 TTL 로 캐시
+        self.principal_cache = PrincipalCache()
+        # 변경 피드가 모든 프로세스의 버전을 갱신하지 않으면 principal 캐시와
+        # 같은 TTL 뒤에는 사용자를 다시 읽어 확인
+        self.claims_versions = ClaimsVersions(
+            ttl_seconds=None if CHANGE_FEED_ENABLED else PRINCIPAL_CACHE_TTL_SECONDS
+        )
         logger.info(
-            f"Using {'Cosmos DB' if self.use_cosmos else 'Mock DB'} for database operations"
+            f"Using {BACKEND_NAMES[backend]} for database operations"
         )
 
+    def readiness(self):
+        """Report whether the database backend is ready to serve traffic."""
+        if self.use_cosmos:
+            return {"backend": "cosmos", **cosmos_db.readiness()}
+        if self.backend == "sqlite":
+            return {"backend": "sqlite", **sqlite_db.readiness()}
+        return {"backend": "mock", "ready": True}
+
+    async def _load(self, collection_name, item_id, load):
+        """Read through the request's identity map (a second read is answered from it)."""
+        identity_map = current_identity_map()
+        if identity_map is None:
+            return await load()
+        return await identity_map.load(collection_name, item_id, load)
+
+    @staticmethod
+    def _loaded(collection_name, item_id):
+        identity_map = current_identity_map()
+        return identity_map.get(collection_name, item_id) if identity_map else None
+
+    @staticmethod
+    def _remember(collection_name, item_id, document):
+        identity_map = current_identity_map()
+        if identity_map is None:
+            return
+        if document is None:
+            identity_map.discard(collection_name, item_id)
+        else:
+            identity_map.put(collection_name, item_id, document)
+
     async def create_user(self, user_data):
         """Create a new user."""
         return await self.db.create_user(user_data)
 
     async def get_user(self, user_id):
-        """Get a user by ID."""
-        return await self.db.get_user(user_id)
+        """Get a user by ID (once per request)."""
+        return await self._load(USERS_CONTAINER, user_id, lambda: self.db.get_user(user_id))
+
+    async def get_principal(self, user_id):
+        """Get the authenticated user (cached for a short TTL)."""
+
+        async def load():
+            user = await self.db.get_user(user_id)
+            if user is not None:
+                self.claims_versions.observe(user_id, user.get(CLAIMS_VERSION_FIELD, 0))
+            return user
+
+        return await self._load(
+            USERS_CONTAINER, user_id, lambda: self.principal_cache.get(user_id, load)
+        )
 
     async def get_all_users(self):
         """Get all users."""
         return await self.db.get_all_users()
 
     async def update_user(self, user_id, user_data):
-        """Update a user."""
-        return await self.db.update_user(user_id, user_data)
+        """Update a user (bumping claimsVersion when a claim field changes)."""
+        # 이번 요청에서 이미 읽은 문서가 있으면 백엔드가 다시 읽지 않음
+        current = self._loaded(USERS_CONTAINER, user_id)
+        claims_changed = any(field in user_data for field in CLAIM_FIELDS)
+        # 버전은 변경과 같은 쓰기에서 올림 (따로 쓰면 그 사이에 실패할 때 이전
+        # 토큰이 바뀐 클레임을 계속 씀)
+        increments = {CLAIMS_VERSION_FIELD: 1} if claims_changed else None
+        updated = await self.db.update_user(user_id, user_data, current, increments)
+        if updated is not None and claims_changed:
+            self.claims_versions.observe(user_id, updated.get(CLAIMS_VERSION_FIELD))
+        self.principal_cache.invalidate(user_id)
+        self._remember(USERS_CONTAINER, user_id, updated)
+        return updated
+
+    async def increment_user_fields(self, user_id, increments, set_fields=None):
+        """Atomically increment numeric fields (and optionally set others) on a user."""
+        updated = await self.db.increment_user_fields(user_id, increments, set_fields)
+        self.principal_cache.invalidate(user_id)
+        self._remember(USERS_CONTAINER, user_id, updated)
+        return updated
 
     async def create_artist(self, artist_data):
         """Create a new artist."""
-        return await self.db.create_artist(artist_data)
+        created = await self.db.create_artist(artist_data)
+        self.artist_cache.invalidate(artist_data.get("artistId"))
+        self._remember(ARTISTS_CONTAINER, artist_data.get("artistId"), None)
+        return created
 
     async def get_artist(self, artist_id):
-        """Get an artist by ID."""
-        return await self.db.get_artist(artist_id)
+        """Get an artist by ID (cached)."""
+        return await self._load(
+            ARTISTS_CONTAINER,
+            artist_id,
+            lambda: self.artist_cache.get(artist_id, lambda: self.db.get_artist(artist_id)),
+        )
 
     async def get_all_artists(self):
-        """Get all artists."""
-        return await self.db.get_all_artists()
+        """Get all artists (cached)."""
+        return await self.artist_cache.get_all(self.db.get_all_artists)
 
     async def update_artist(self, artist_id, artist_data):
         """Update an artist."""
-        return await self.db.update_artist(artist_id, artist_data)
+        current = self._loaded(ARTISTS_CONTAINER, artist_id)
+        updated = await self.db.update_artist(artist_id, artist_data, current)
+        self.artist_cache.invalidate(artist_id)
+        self._remember(ARTISTS_CONTAINER, artist_id, updated)
+        return updated
 
     async def create_fan_preference(self, preference_data):
         """Create a new fan preference."""
-        return await self.db.create_fan_preference(preference_data)
+        if CHANGE_FEED_ENABLED:
+            # 팬 수는 변경 피드 프로젝션(app.services.projections)이 갱신
+            return await self.db.create_fan_preference(preference_data, update_fan_count=False)
+        created = await self.db.create_fan_preference(preference_data)
+        # 팬 수(fanCount)가 바뀌므로 해당 아티스트 캐시도 무효화
+        self.artist_cache.invalidate(preference_data.get("artistId"))
+        self._remember(ARTISTS_CONTAINER, preference_data.get("artistId"), None)
+        return created
 
     async def get_fan_preferences_by_artist(self, artist_id):
         """Get all fan preferences for an artist."""
@@ -70,14 +182,54 @@ class DatabaseService:
         """Update a fan preference."""
         return await self.db.update_fan_preference(artist_id, user_id, preference_data)
 
-    async def get_event_cache(self, artist_id):
-        """Get cached event data for an artist."""
-        return await self.db.get_event_cache(artist_id)
+    async def get_event_cache(self, artist_id, allow_stale=False):
+        """Get cached event data for an artist (stale data only if allowed)."""
+        return await self.db.get_event_cache(artist_id, allow_stale)
 
     async def create_or_update_event_cache(self, event_data):
         """Create or update cached event data."""
         return await self.db.create_or_update_event_cache(event_data)
 
+    async def event_cache_report(self):
+        """Report event cache size and purge what the backend cannot expire itself."""
+        return await self.db.event_cache_report()
+
+    async def get_user_summary(self, user_id):
+        """Get a user's financial summary."""
+        return await self.db.get_user_summary(user_id)
+
+    async def upsert_user_summary(self, summary_data):
+        """Create or replace a user's financial summary."""
+        return await self.db.upsert_user_summary(summary_data)
+
+    async def update_user_summary(self, user_id, mutate):
+        """Atomically apply mutate(current_summary_or_None) to a user's summary."""
+        return await self.db.update_user_summary(user_id, mutate)
+
+    async def add_savings_entry(self, entry):
+        """Write a savings entry and update the user's summary in one transaction."""
+        return await self.db.add_savings_entry(entry)
+
+    async def read_document(self, collection_name, item_id):
+        """Point read of a document (partitioned by id); None if it does not exist."""
+        return await self.db.read_document(collection_name, item_id)
+
+    async def create_document(self, collection_name, document):
+        """Insert a new document (partitioned by id) without reading first."""
+        return await self.db.create_document(collection_name, document)
+
+    async def update_document(self, collection_name, item_id, mutate):
+        """Atomically replace a document (partitioned by id) with mutate(current or None)."""
+        return await self.db.update_document(collection_name, item_id, mutate)
+
+    async def read_changes(
+        self, collection_name, continuation=None, max_items=100, start_from_beginning=True
+    ):
+        """Read a collection's change feed: (documents, next continuation)."""
+        return await self.db.read_changes(
+            collection_name, continuation, max_items, start_from_beginning
+        )
+
     async def get_collection(self, collection_name):
         """Get a specific collection from the database."""
         if hasattr(self.db, "get_collection"):
@@ -113,3 +265,15 @@ def get_collection(collection_name):
 def init_db():
     if db_service.use_cosmos:
         cosmos_db.initialize()
+    elif db_service.backend == "sqlite":
+        sqlite_db.initialize()
+    else:
+        # MOCK_DB_PERSIST_DIR 가 설정된 경우에만 디스크에서 복원
+        mock_db.open_persistence()
+
+
+def close_db():
+    if db_service.backend == "sqlite":
+        sqlite_db.close()
+    elif db_service.backend == "mock":
+        mock_db.close_persistence()
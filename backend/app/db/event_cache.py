@@ -0,0 +1,56 @@
+import os
+from datetime import datetime, timezone
+
+# Expiry policy for event_cache documents, shared by every backend:
+# - fresh: before expiresAt, served normally
+# - stale (soft-expired): after expiresAt, served only to callers that allow stale data
+# - expired (hard-expired): after expiresAt + grace, deleted by the store itself
+#   (Cosmos per-item ttl, purge-on-read/compaction in the mock)
+EVENT_CACHE_GRACE_SECONDS = int(os.getenv("EVENT_CACHE_GRACE_SECONDS", "3600"))
+
+FRESH = "fresh"
+STALE = "stale"
+EXPIRED = "expired"
+
+
+def _to_utc(value) -> datetime:
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def cache_state(cache: dict, now: datetime = None) -> str:
+    """Classify a cache document as fresh, stale or expired."""
+    now = _to_utc(now or datetime.utcnow())
+    expires_at = _to_utc(cache["expiresAt"])
+    if now < expires_at:
+        return FRESH
+    if (now - expires_at).total_seconds() < EVENT_CACHE_GRACE_SECONDS:
+        return STALE
+    return EXPIRED
+
+
+def item_ttl(expires_at, now: datetime = None) -> int:
+    """Seconds until a cache document should be hard-deleted (Cosmos per-item ttl)."""
+    now = _to_utc(now or datetime.utcnow())
+    remaining = (_to_utc(expires_at) - now).total_seconds()
+    return max(1, int(remaining) + EVENT_CACHE_GRACE_SECONDS)
+
+
+def serialize_cache(event_data: dict) -> dict:
+    """Prepare an event cache document for storage (id, type, ISO dates, ttl)."""
+    if not event_data.get("artistId"):
+        raise ValueError("Artist ID is required")
+    if not event_data.get("expiresAt"):
+        raise ValueError("expiresAt is required")
+
+    for field in ("computedAt", "expiresAt"):
+        if isinstance(event_data.get(field), datetime):
+            event_data[field] = event_data[field].isoformat()
+
+    event_data["id"] = event_data["artistId"]
+    event_data["type"] = "event_cache"
+    event_data["ttl"] = item_ttl(event_data["expiresAt"])
+    return event_data
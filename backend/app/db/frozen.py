@@ -0,0 +1,154 @@
+"""
+Immutable records and copy-on-write views of them, so stored and cached
+documents can be shared between requests without defensive deep copies.
+
+Records are kept frozen (FrozenDict / tuples). Callers never see them: they
+get view(record), an ordinary mutable dict that copies only the top-level
+entries; nested dicts and lists are copied the first time they are read
+from the view. Changing a view never changes the record, and parts of a
+document nobody touches are never copied.
+"""
+
+
+class FrozenDict(dict):
+    """A dict that rejects mutation (still a dict for JSON/pydantic)."""
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("FrozenDict is read-only; use view() to get a mutable copy")
+
+    __setitem__ = __delitem__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+    __ior__ = _readonly
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        # 깊은 복사는 수정하려는 의도이므로 변경 가능한 사본을 돌려줌
+        return thaw(self)
+
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+
+
+_SCALARS = frozenset((str, int, float, bool, type(None)))
+
+
+def freeze(value):
+    """Recursively convert dicts to FrozenDict and lists to tuples."""
+    cls = type(value)
+    if cls in _SCALARS or cls is FrozenDict:
+        return value
+    if isinstance(value, dict):
+        # dict.items: 뷰의 아직 읽지 않은 (고정된) 하위 값은 그대로 공유
+        return FrozenDict({key: freeze(item) for key, item in dict.items(value)})
+    if isinstance(value, (list, tuple)):
+        return tuple([freeze(item) for item in value])
+    return value
+
+
+def thaw(value):
+    """Mutable deep copy of a (possibly frozen) document."""
+    if isinstance(value, dict):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [thaw(item) for item in value]
+    return value
+
+
+def view(value):
+    """
+    What callers get for a stored value: dicts become CopyOnWriteDicts and
+    frozen arrays become lists of views; anything else is returned as is.
+    """
+    if isinstance(value, dict):
+        return value if type(value) is CopyOnWriteDict else CopyOnWriteDict(value)
+    if type(value) is tuple:
+        return [view(item) for item in value]
+    return value
+
+
+class CopyOnWriteDict(dict):
+    """
+    Mutable dict over a frozen record. Nested values are still the record's
+    until they are read; reading one replaces it with its own view. Code that
+    walks the raw dict storage (pydantic-core validating a Dict field) can
+    still see frozen nested values, which compare and serialize the same.
+    """
+
+    __slots__ = ()
+
+    def _own(self, key, value):
+        if type(value) is FrozenDict or type(value) is tuple:
+            value = view(value)
+            dict.__setitem__(self, key, value)
+        return value
+
+    def _own_all(self):
+        for key, value in list(dict.items(self)):
+            self._own(key, value)
+        return self
+
+    def __getitem__(self, key):
+        return self._own(key, dict.__getitem__(self, key))
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def pop(self, key, *default):
+        if key in self:
+            value = self[key]
+            dict.__delitem__(self, key)
+            return value
+        return dict.pop(self, key, *default)
+
+    def popitem(self):
+        return dict.popitem(self._own_all())
+
+    def setdefault(self, key, default=None):
+        if key in self:
+            return self[key]
+        dict.__setitem__(self, key, default)
+        return default
+
+    # 전체를 꺼내는 연산은 하위 값을 모두 뷰로 바꾼 뒤 수행 ({**d}, dict(d) 포함)
+    def __iter__(self):
+        return dict.__iter__(self)
+
+    def values(self):
+        return dict.values(self._own_all())
+
+    def items(self):
+        return dict.items(self._own_all())
+
+    def copy(self):
+        return dict(self._own_all())
+
+    def __eq__(self, other):
+        if isinstance(other, CopyOnWriteDict):
+            other._own_all()
+        return dict.__eq__(self._own_all(), other)
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    __hash__ = None
+
+    def __or__(self, other):
+        return dict.__or__(self._own_all(), other)
+
+    def __ror__(self, other):
+        return dict.__ror__(self._own_all(), other)
+
+    def __repr__(self):
+        return dict.__repr__(self._own_all())
+
+    def __copy__(self):
+        return self.copy()
+
+    def __deepcopy__(self, memo):
+        return thaw(self)
+
+    def __reduce__(self):
+        return (dict, (thaw(self),))
@@ -0,0 +1,119 @@
+"""
+Request-scoped identity map for documents loaded through DatabaseService.
+
+Within one HTTP request a handler often reads a document that a dependency
+already loaded (get_user_profile reads the user get_current_user just
+authenticated; update_artist reads the artist and the backend used to read
+it again before replacing it). The middleware in main.py opens an
+IdentityMap per request; DatabaseService.get_user/get_artist/get_principal
+answer repeated reads from it, writes replace the entry with the stored
+document, and update_user/update_artist hand the loaded document (with its
+_etag) to the backend so it can replace it without reading it again.
+
+Every read answered from the map is a read the code asked for twice; they
+are counted per route in identity_map_stats (GET /metrics/db), and with
+IDENTITY_MAP_DEBUG=true each one is also logged so the call site can be
+fixed. Outside a request (startup, background jobs) reads go straight to
+the backend.
+"""
+
+import contextvars
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+IDENTITY_MAP_DEBUG = os.getenv("IDENTITY_MAP_DEBUG", "false").lower() == "true"
+
+_MISSING = object()
+
+
+class IdentityMap:
+    """Documents loaded during one request, keyed by (collection, id)."""
+
+    def __init__(self):
+        self._documents = {}
+        self.loads = 0
+        self.hits = 0
+        self.redundant = {}  # (collection, id) -> repeated reads
+
+    def get(self, collection_name, item_id):
+        """The document loaded in this request (None if not loaded or missing)."""
+        return self._documents.get((collection_name, item_id))
+
+    def put(self, collection_name, item_id, document):
+        self._documents[(collection_name, item_id)] = document
+
+    def discard(self, collection_name, item_id):
+        self._documents.pop((collection_name, item_id), None)
+
+    async def load(self, collection_name, item_id, load):
+        """Return the document loaded earlier in this request, else await load()."""
+        key = (collection_name, item_id)
+        document = self._documents.get(key, _MISSING)
+        if document is not _MISSING:
+            self.hits += 1
+            self.redundant[key] = self.redundant.get(key, 0) + 1
+            if IDENTITY_MAP_DEBUG:
+                logger.warning(f"Redundant read of {collection_name}/{item_id} in one request")
+            return document
+        self.loads += 1
+        document = await load()
+        self._documents[key] = document
+        return document
+
+
+_current_map = contextvars.ContextVar("db_identity_map", default=None)
+
+
+def begin_request():
+    """Open the identity map of the current request."""
+    identity_map = IdentityMap()
+    return identity_map, _current_map.set(identity_map)
+
+
+def end_request(token):
+    _current_map.reset(token)
+
+
+def current_identity_map():
+    return _current_map.get()
+
+
+class IdentityMapStats:
+    """Per-route counts of reads served from the request's identity map."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.routes = {}
+
+    def record_request(self, route, identity_map):
+        with self._lock:
+            stats = self.routes.setdefault(
+                route, {"requests": 0, "loads": 0, "redundant_reads": 0, "collections": {}}
+            )
+            stats["requests"] += 1
+            stats["loads"] += identity_map.loads
+            stats["redundant_reads"] += identity_map.hits
+            for (collection_name, _), count in identity_map.redundant.items():
+                collections = stats["collections"]
+                collections[collection_name] = collections.get(collection_name, 0) + count
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "debug": IDENTITY_MAP_DEBUG,
+                "routes": {
+                    route: {**stats, "collections": dict(stats["collections"])}
+                    for route, stats in self.routes.items()
+                    if stats["loads"] or stats["redundant_reads"]
+                },
+            }
+
+
+identity_map_stats = IdentityMapStats()
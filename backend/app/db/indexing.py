@@ -0,0 +1,134 @@
+"""
+Indexing policies for every Cosmos DB container.
+
+Cosmos indexes every property by default, and each indexed term adds to the
+RU charge of a write. Our documents embed large payloads we never filter on
+(LLM-generated event and goods lists), so each container only indexes the
+paths its queries actually use. Composite indexes back the
+"filter by user, ORDER BY saved_at DESC" history queries.
+
+Policies are applied by `python -m app.db.migrate` (see CosmosDB.provision).
+"""
+
+
+def _policy(included, composites=()):
+    return {
+        "indexingMode": "consistent",
+        "automatic": True,
+        "includedPaths": [{"path": f"/{path}/?"} for path in included],
+        "excludedPaths": [{"path": "/*"}, {"path": '/"_etag"/?'}],
+        "compositeIndexes": [
+            [
+                {"path": f"/{path}", "order": "descending" if desc else "ascending"}
+                for path, desc in composite
+            ]
+            for composite in composites
+        ],
+    }
+
+
+# Cosmos default: index everything, no composite indexes
+DEFAULT_INDEXING_POLICY = {
+    "indexingMode": "consistent",
+    "automatic": True,
+    "includedPaths": [{"path": "/*"}],
+    "excludedPaths": [{"path": '/"_etag"/?'}],
+    "compositeIndexes": [],
+}
+
+USER_SAVED_AT_DESC = (("user_id", False), ("saved_at", True))
+
+INDEXING_POLICIES = {
+    "users": _policy(["userId", "email", "type"]),
+    "artists": _policy(["artistId", "type"]),
+    "fan_preferences": _policy(["artistId", "userId", "preferenceId", "type"]),
+    "event_cache": _policy(["artistId", "type", "expiresAt"]),
+    "event_costs": _policy(
+        ["user_id", "artist", "saved_at"],
+        composites=[USER_SAVED_AT_DESC],
+    ),
+    "savings_history": _policy(["user_id", "saved_at"], composites=[USER_SAVED_AT_DESC]),
+    "user_ledger": _policy(
+        ["user_id", "type", "saved_at"],
+        composites=[(("user_id", False), ("type", False), ("saved_at", True))],
+    ),
+    # 변경 피드 리스 (app.db.change_feed): 포인트 읽기만 사용
+    "leases": _policy([]),
+    # 리프레시 토큰 (app.services.refresh_tokens): 포인트 읽기만 사용
+    "refresh_tokens": _policy([]),
+    # 로그인 실패 기록 (app.services.login_guard): 포인트 읽기만 사용
+    "login_attempts": _policy([]),
+}
+
+
+def document_paths(document, prefix=""):
+    """Yield the Cosmos index path of every scalar value in a document."""
+    if isinstance(document, dict):
+        for key, value in document.items():
+            if prefix == "" and key.startswith("_"):
+                continue  # system properties
+            yield from document_paths(value, f"{prefix}/{key}")
+    elif isinstance(document, list):
+        for value in document:
+            yield from document_paths(value, f"{prefix}/[]")
+    else:
+        yield prefix
+
+
+def _match_length(pattern, path):
+    """Length of the pattern if it covers path, otherwise -1."""
+    if pattern.endswith("/?"):
+        return len(pattern) if path == pattern[:-2] else -1
+    if pattern.endswith("/*"):
+        base = pattern[:-2]
+        return len(pattern) if path == base or path.startswith(base + "/") else -1
+    return -1
+
+
+def is_indexed(path, policy):
+    """Whether a scalar path is indexed; the most specific rule wins."""
+    best_include = max(
+        (_match_length(p["path"], path) for p in policy["includedPaths"]), default=-1
+    )
+    best_exclude = max(
+        (_match_length(p["path"], path) for p in policy["excludedPaths"]), default=-1
+    )
+    return best_include > best_exclude
+
+
+def indexed_terms(document, policy):
+    """Number of index terms a write of this document produces."""
+    return sum(1 for path in document_paths(document) if is_indexed(path, policy))
+
+
+def estimate_write_ru(document, policy, document_size):
+    """
+    Rough RU model for writing a document: a fixed base charge, a share per KB
+    and a share per indexed term. Used for relative before/after comparisons
+    (and by the local Cosmos stand-in); live charges come from the
+    x-ms-request-charge response header.
+    """
+    return round(
+        5.0 + 1.0 * (document_size / 1024) + 0.2 * indexed_terms(document, policy), 2
+    )
+
+
+def supports_query(policy, filters, order_by=None):
+    """
+    Whether a query shape is fully index-served: every equality/range filter
+    path is indexed and, when ordering, a composite index matches
+    (filters..., order_by).
+    """
+    if not all(is_indexed(f"/{path}", policy) for path in filters):
+        return False
+    if order_by is None:
+        return True
+
+    order_path, descending = order_by
+    wanted = [f"/{path}" for path in filters] + [f"/{order_path}"]
+    for composite in policy["compositeIndexes"]:
+        paths = [entry["path"] for entry in composite]
+        last_desc = composite[-1].get("order") == "descending"
+        if paths == wanted and last_desc == descending:
+            return True
+    return False
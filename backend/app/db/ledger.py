@@ -0,0 +1,63 @@
+from datetime import datetime
+
+# Document types stored in the user_ledger container (partitioned by /user_id)
+USER_SUMMARY_TYPE = "user_summary"
+SAVINGS_ENTRY_TYPE = "savings_entry"
+
+# Ids of the documents most recently folded in by the change feed projection,
+# so a batch delivered twice is only counted once
+PROJECTED_IDS_FIELD = "projected_ids"
+
+
+def empty_summary(user_id: str) -> dict:
+    """Build a summary document for a user with no history."""
+    return {
+        "user_id": user_id,
+        "total_estimated": 0,
+        "cost_count": 0,
+        "last_cost_saved_at": None,
+        "total_savings": 0,
+        "savings_count": 0,
+        "last_saved_at": None,
+        "monthly": {},
+    }
+
+
+def _month_bucket(summary: dict, saved_at) -> dict:
+    """Get (or create) the monthly bucket for a saved_at timestamp."""
+    month = str(saved_at or datetime.utcnow().isoformat())[:7]
+    return summary["monthly"].setdefault(
+        month, {"estimated": 0, "cost_count": 0, "savings": 0, "savings_count": 0}
+    )
+
+
+def apply_cost(summary: dict, cost_item: dict) -> dict:
+    """Fold one saved event_costs document into a summary."""
+    amount = cost_item.get("total_estimated", 0) or 0
+    saved_at = cost_item.get("saved_at")
+
+    summary["total_estimated"] += amount
+    summary["cost_count"] += 1
+    if saved_at and (summary["last_cost_saved_at"] or "") < saved_at:
+        summary["last_cost_saved_at"] = saved_at
+
+    bucket = _month_bucket(summary, saved_at)
+    bucket["estimated"] += amount
+    bucket["cost_count"] += 1
+    return summary
+
+
+def apply_savings(summary: dict, savings_item: dict) -> dict:
+    """Fold one savings_history entry into a summary."""
+    amount = savings_item.get("amount", 0) or 0
+    saved_at = savings_item.get("saved_at")
+
+    summary["total_savings"] += amount
+    summary["savings_count"] += 1
+    if saved_at and (summary["last_saved_at"] or "") < saved_at:
+        summary["last_saved_at"] = saved_at
+
+    bucket = _month_bucket(summary, saved_at)
+    bucket["savings"] += amount
+    bucket["savings_count"] += 1
+    return summary
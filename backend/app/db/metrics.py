@@ -0,0 +1,371 @@
+"""
+Request-unit (RU) and latency accounting for Cosmos DB operations.
+
+Every container returned by CosmosDB.get_container is wrapped in an
+InstrumentedContainer, which reads `x-ms-request-charge` from each response
+and times the call. Operations are collected on the RequestCost of the
+current HTTP request (a context variable set by the middleware in main.py)
+and folded into per-route and per-query-shape histograms when the request
+finishes. Operations outside a request (startup, background jobs) are
+attributed to BACKGROUND_ROUTE.
+"""
+
+import contextvars
+import os
+import re
+import threading
+import time
+
+from app.db.throttling import RetryingQuery, call_with_retry, limiter
+
+# Server-Timing 헤더는 기본적으로 끔 (내부 비용 정보가 노출되므로)
+DB_SERVER_TIMING = os.getenv("DB_SERVER_TIMING", "false").lower() == "true"
+# /metrics/db, /metrics/auth 도 인증 없이 내부 정보를 보여주므로 기본적으로 끔
+METRICS_ENDPOINTS_ENABLED = (
+    os.getenv("METRICS_ENDPOINTS_ENABLED", "false").lower() == "true"
+)
+
+BACKGROUND_ROUTE = "<background>"
+
+LATENCY_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+RU_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+REQUEST_CHARGE_HEADER = "x-ms-request-charge"
+
+_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+_NUMBER_LITERAL = re.compile(r"(?<![\w@.])-?\d+(?:\.\d+)?\b")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(query):
+    """Reduce a query to its shape: literals become ?, whitespace is collapsed."""
+    if isinstance(query, dict):
+        query = query.get("query", "")
+    shape = _STRING_LITERAL.sub("?", query or "")
+    shape = _NUMBER_LITERAL.sub("?", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+
+def _request_charge(headers):
+    try:
+        return float((headers or {}).get(REQUEST_CHARGE_HEADER, 0) or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class Histogram:
+    """Fixed-bucket histogram (cumulative counts are computed on snapshot)."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def snapshot(self):
+        buckets = {}
+        cumulative = 0
+        for bound, count in zip(list(self.buckets) + ["+Inf"], self.counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 2),
+            "avg": round(self.sum / self.count, 2) if self.count else 0.0,
+            "max": round(self.max, 2),
+            "buckets": buckets,
+        }
+
+
+class RequestCost:
+    """Database operations issued while serving one HTTP request."""
+
+    def __init__(self):
+        self.operations = []  # (container, operation, shape, charge, duration_ms)
+
+    def add(self, container, operation, shape, charge, duration_ms):
+        self.operations.append((container, operation, shape, charge, duration_ms))
+
+    @property
+    def request_charge(self):
+        return round(sum(op[3] for op in self.operations), 2)
+
+    @property
+    def duration_ms(self):
+        return round(sum(op[4] for op in self.operations), 2)
+
+    def server_timing(self):
+        return (
+            f'db;dur={self.duration_ms};desc="{len(self.operations)} ops, '
+            f'{self.request_charge} RU"'
+        )
+
+
+_current_request = contextvars.ContextVar("db_request_cost", default=None)
+
+
+def begin_request():
+    """Start collecting database cost for the current request."""
+    cost = RequestCost()
+    return cost, _current_request.set(cost)
+
+
+def end_request(token):
+    _current_request.reset(token)
+
+
+def current_request():
+    return _current_request.get()
+
+
+class DBMetrics:
+    """Per-route and per-query-shape RU/latency aggregates."""
+
+    def __init__(self, server_timing=DB_SERVER_TIMING):
+        self._lock = threading.Lock()
+        self.server_timing = server_timing
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.routes = {}
+            self.shapes = {}
+
+    def _route(self, route):
+        stats = self.routes.get(route)
+        if stats is None:
+            stats = self.routes[route] = {
+                "requests": 0,
+                "operations": 0,
+                "request_charge": Histogram(RU_BUCKETS),
+                "db_latency_ms": Histogram(LATENCY_BUCKETS_MS),
+            }
+        return stats
+
+    def _observe_operation(self, route, container, operation, shape, charge, duration_ms):
+        key = (route, container, operation, shape)
+        stats = self.shapes.get(key)
+        if stats is None:
+            stats = self.shapes[key] = {
+                "request_charge": Histogram(RU_BUCKETS),
+                "latency_ms": Histogram(LATENCY_BUCKETS_MS),
+            }
+        stats["request_charge"].observe(charge)
+        stats["latency_ms"].observe(duration_ms)
+
+    def record_operation(self, container, operation, shape, charge, duration_ms):
+        """Record one operation against the current request (or the background bucket)."""
+        cost = current_request()
+        if cost is not None:
+            cost.add(container, operation, shape, charge, duration_ms)
+            return
+        with self._lock:
+            stats = self._route(BACKGROUND_ROUTE)
+            stats["operations"] += 1
+            stats["request_charge"].observe(charge)
+            stats["db_latency_ms"].observe(duration_ms)
+            self._observe_operation(
+                BACKGROUND_ROUTE, container, operation, shape, charge, duration_ms
+            )
+
+    def record_request(self, route, cost):
+        """Fold a finished request's operations into the route aggregates."""
+        with self._lock:
+            stats = self._route(route)
+            stats["requests"] += 1
+            stats["operations"] += len(cost.operations)
+            stats["request_charge"].observe(cost.request_charge)
+            stats["db_latency_ms"].observe(cost.duration_ms)
+            for operation in cost.operations:
+                self._observe_operation(route, *operation)
+
+    def snapshot(self, top=20):
+        """Route histograms plus the most expensive query shapes by total RU."""
+        with self._lock:
+            routes = {
+                route: {
+                    "requests": stats["requests"],
+                    "operations": stats["operations"],
+                    "request_charge": stats["request_charge"].snapshot(),
+                    "db_latency_ms": stats["db_latency_ms"].snapshot(),
+                }
+                for route, stats in self.routes.items()
+            }
+            shapes = [
+                {
+                    "route": route,
+                    "container": container,
+                    "operation": operation,
+                    "query": shape,
+                    "request_charge": stats["request_charge"].snapshot(),
+                    "latency_ms": stats["latency_ms"].snapshot(),
+                }
+                for (route, container, operation, shape), stats in self.shapes.items()
+            ]
+        shapes.sort(key=lambda s: s["request_charge"]["sum"], reverse=True)
+        return {
+            "routes": routes,
+            "top_queries": shapes[:top],
+            "throttling": limiter.snapshot(),
+        }
+
+
+db_metrics = DBMetrics()
+
+
+class _ResponseTimer:
+    """response_hook that records each response; query pages are timed back to back."""
+
+    def __init__(self, container, operation, shape, user_hook=None):
+        self.container = container
+        self.operation = operation
+        self.shape = shape
+        self.user_hook = user_hook
+        self.mark = time.perf_counter()
+        self.called = False
+        # query_items 생성 중에 오는 호출은 이전 작업의 헤더이므로 기록하지 않음
+        self.creating = False
+
+    def record(self, headers):
+        now = time.perf_counter()
+        db_metrics.record_operation(
+            self.container,
+            self.operation,
+            self.shape,
+            _request_charge(headers),
+            round((now - self.mark) * 1000, 2),
+        )
+        self.mark = now
+        self.called = True
+
+    def __call__(self, headers, result):
+        if not self.creating:
+            self.record(headers)
+        if self.user_hook:
+            self.user_hook(headers, result)
+
+
+class InstrumentedContainer:
+    """
+    ContainerProxy wrapper that reports RU charge and latency of each call
+    and runs it under the throttling policy (app.db.throttling).
+    """
+
+    OPERATIONS = (
+        "create_item",
+        "read_item",
+        "upsert_item",
+        "replace_item",
+        "patch_item",
+        "delete_item",
+    )
+
+    def __init__(self, container):
+        self._container = container
+        self._name = getattr(container, "id", "unknown")
+
+    def __getattr__(self, name):
+        attr = getattr(self._container, name)
+        if name in self.OPERATIONS:
+            return self._instrument(attr, name)
+        return attr
+
+    def _instrument(self, method, operation):
+        def call(*args, **kwargs):
+            user_hook = kwargs.pop("response_hook", None)
+
+            def attempt():
+                timer = _ResponseTimer(self._name, operation, "", user_hook)
+                try:
+                    return method(*args, response_hook=timer, **kwargs)
+                except Exception as e:
+                    # 404/412/429 등 실패한 요청도 RU 를 소비함
+                    if not timer.called:
+                        timer.record(getattr(e, "headers", None))
+                    raise
+
+            return call_with_retry(attempt)
+
+        return call
+
+    def query_items(self, query, *args, **kwargs):
+        # 쿼리는 지연 실행이므로 페이지마다 response_hook 이 호출됨. SDK 는 쿼리를
+        # 만들 때도 한 번 호출하는데 (직전 작업의 last_response_headers), 아직
+        # 페이지를 가져오기 전이므로 그 호출은 건너뜀
+        timer = _ResponseTimer(
+            self._name,
+            "query_items",
+            normalize_query(query),
+            kwargs.pop("response_hook", None),
+        )
+
+        def start():
+            timer.creating = True
+            try:
+                return self._container.query_items(
+                    query, *args, response_hook=timer, **kwargs
+                )
+            finally:
+                timer.creating = False
+                timer.mark = time.perf_counter()
+
+        return RetryingQuery(start)
+
+    @property
+    def scripts(self):
+        return _InstrumentedScripts(self._container, self._name)
+
+
+class _InstrumentedScripts:
+    """
+    Stored procedures do not call response_hook, and the client's
+    last_response_headers are shared by every thread; the headers of each
+    call are captured with azure-core's per-call raw_response_hook instead.
+    """
+
+    def __init__(self, container, name):
+        self._scripts = container.scripts
+        self._name = name
+
+    def __getattr__(self, name):
+        return getattr(self._scripts, name)
+
+    def execute_stored_procedure(self, sproc, *args, **kwargs):
+        user_hook = kwargs.pop("raw_response_hook", None)
+
+        def attempt():
+            started = time.perf_counter()
+            responses = []
+
+            def hook(response):
+                responses.append(response.http_response.headers)
+                if user_hook:
+                    user_hook(response)
+
+            try:
+                return self._scripts.execute_stored_procedure(
+                    sproc, *args, raw_response_hook=hook, **kwargs
+                )
+            finally:
+                # SDK 내부 재시도가 있었다면 모든 응답의 RU 를 합산
+                db_metrics.record_operation(
+                    self._name,
+                    "execute_stored_procedure",
+                    sproc if isinstance(sproc, str) else sproc.get("id", ""),
+                    round(sum(_request_charge(h) for h in responses), 2),
+                    round((time.perf_counter() - started) * 1000, 2),
+                )
+
+        return call_with_retry(attempt)
@@ -0,0 +1,39 @@
+"""
+Provision the Cosmos DB database, containers and stored procedures.
+
+Run once per environment (and after adding a container to CONTAINER_SPECS):
+
+    python -m app.db.migrate
+
+The API itself never creates containers; at startup it only resolves them.
+Afterwards entries of the old savings_history container are copied into the
+user ledger (safe to repeat; already copied entries are overwritten as is).
+"""
+import asyncio
+import logging
+import sys
+from azure.cosmos import exceptions
+from app.db.cosmos_db import cosmos_db
+from app.db.database import init_db
+from app.services.summary import migrate_legacy_savings
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    if not cosmos_db.provision():
+        logger.error("Provisioning finished with errors")
+        sys.exit(1)
+    logger.info("Provisioning completed successfully")
+
+    init_db()
+    try:
+        asyncio.run(migrate_legacy_savings())
+    except exceptions.CosmosResourceNotFoundError:
+        logger.info("No savings_history container, nothing to migrate")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,85 +1,435 @@
+import bisect
 import logging
 from datetime import datetime
-import copy
+import json
+import threading
 import uuid
+from app.db.base import preference_key
+from app.db.cosmos_db import CONTAINER_SPECS
+from app.db.event_cache import EXPIRED, FRESH, STALE, cache_state, serialize_cache
+from app.db.frozen import freeze, view
+from app.db.ledger import USER_SUMMARY_TYPE, apply_savings, empty_summary
+from app.db.mock_persistence import (
+    CLEAR,
+    DELETE,
+    MOCK_DB_PERSIST_DIR,
+    SET,
+    MockJournal,
+    PendingTable,
+)
+from app.db.mock_query import bind_parameters, equality_filters, execute, parse_query
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+class MockTable(dict):
+    """
+    id -> document map with hash indexes on frequently filtered fields.
+    Documents are stored frozen (app.db.frozen), so reads can hand out a
+    copy-on-write view instead of a deep copy; writes always store a new record.
+    Indexes only narrow the candidates of a query; every candidate is still
+    checked against the full WHERE clause. Once attached to a journal
+    (MOCK_DB_PERSIST_DIR) every write is also logged, under the table lock so
+    the log order matches the in-memory order.
+
+    Every write also gets a sequence number for the change feed (changes()).
+    Sequence numbers restart with each table instance, so continuations carry
+    the table's epoch and a stale one replays the feed from the beginning.
+    """
+
+    INDEXED_FIELDS = ("user_id", "userId", "artistId", "type")
+
+    def __init__(self, items=(), indexed_fields=INDEXED_FIELDS, key=None):
+        super().__init__()
+        self._lock = threading.RLock()
+        self.indexed_fields = indexed_fields
+        self._indexes = {field: {} for field in indexed_fields}
+        self.name = None
+        self._journal = None
+        self.epoch = uuid.uuid4().hex[:8]
+        self._sequence = 0
+        self._latest = {}  # item_id -> sequence of its last write
+        self._change_log = []  # (sequence, item_id); superseded entries are skipped
+        self._fill(items, key)
+
+    def _fill(self, items, key=None):
+        if isinstance(items, dict):
+            for item_id, item in items.items():
+                self[item_id] = item
+            return
+        for item in items:
+            if key is not None:
+                self[key(item)] = item
+                continue
+            if not item.get("id"):
+                item = {**item, "id": str(uuid.uuid4())}
+            self[item["id"]] = item
+
+    def _load(self, items):
+        """Bulk insert of restored documents (no per-item locking or journaling)."""
+        with self._lock:
+            for item_id, item in items.items():
+                item = freeze(item)
+                dict.__setitem__(self, item_id, item)
+                self._index(item_id, item)
+                self._record_change(item_id)
+
+    def attach(self, name, journal):
+        """Log this table's writes to journal under name (None detaches)."""
+        with self._lock:
+            self.name = name
+            self._journal = journal
+
+    def _index(self, item_id, item):
+        for field, index in self._indexes.items():
+            value = item.get(field)
+            if value is not None and isinstance(value, (str, int, float)):
+                index.setdefault(value, {})[item_id] = None
+
+    def _record_change(self, item_id):
+        self._sequence += 1
+        self._latest[item_id] = self._sequence
+        self._change_log.append((self._sequence, item_id))
+        # 덮어쓴 항목이 쌓이면 최신 항목만 남김
+        if len(self._change_log) > 2 * len(self._latest) + 1024:
+            self._change_log = [
+                (sequence, key)
+                for sequence, key in self._change_log
+                if self._latest.get(key) == sequence
+            ]
+
+    def changes(self, continuation=None, max_items=100, start_from_beginning=True):
+        """Change feed: (documents written after continuation, next continuation)."""
+        with self._lock:
+            epoch, _, sequence = (continuation or "").partition(":")
+            if continuation is None:
+                since = 0 if start_from_beginning else self._sequence
+            elif epoch != self.epoch or not sequence.isdigit():
+                since = 0
+            else:
+                since = int(sequence)
+
+            start = bisect.bisect_right(self._change_log, since, key=lambda entry: entry[0])
+            documents = []
+            for sequence, item_id in self._change_log[start:]:
+                if self._latest.get(item_id) != sequence:
+                    continue
+                documents.append(dict.__getitem__(self, item_id))
+                since = sequence
+                if len(documents) >= max_items:
+                    break
+            return documents, f"{self.epoch}:{since}"
+
+    def _unindex(self, item_id, item):
+        for field, index in self._indexes.items():
+            value = item.get(field)
+            bucket = index.get(value) if isinstance(value, (str, int, float)) else None
+            if bucket is not None:
+                bucket.pop(item_id, None)
+                if not bucket:
+                    del index[value]
+
+    def __setitem__(self, item_id, item):
+        item = freeze(item)
+        with self._lock:
+            previous = dict.get(self, item_id)
+            if previous is not None:
+                self._unindex(item_id, previous)
+            super().__setitem__(item_id, item)
+            self._index(item_id, item)
+            self._record_change(item_id)
+            if self._journal is not None:
+                self._journal.append(SET, self.name, item_id, item)
+
+    def __delitem__(self, item_id):
+        with self._lock:
+            self._unindex(item_id, self[item_id])
+            super().__delitem__(item_id)
+            self._latest.pop(item_id, None)
+            if self._journal is not None:
+                self._journal.append(DELETE, self.name, item_id)
+
+    def pop(self, item_id, *default):
+        with self._lock:
+            if item_id in self:
+                item = self[item_id]
+                del self[item_id]
+                return item
+            if default:
+                return default[0]
+            raise KeyError(item_id)
+
+    def clear(self):
+        with self._lock:
+            super().clear()
+            self._indexes = {field: {} for field in self.indexed_fields}
+            self._latest = {}
+            self._change_log = []
+            if self._journal is not None:
+                self._journal.append(CLEAR, self.name)
+
+    def update(self, *args, **kwargs):
+        for item_id, item in dict(*args, **kwargs).items():
+            self[item_id] = item
+
+    def setdefault(self, item_id, item=None):
+        with self._lock:
+            if item_id not in self:
+                self[item_id] = item
+            return self[item_id]
+
+    def candidates(self, filters):
+        """Documents that may match the given equality filters (smallest index bucket)."""
+        with self._lock:
+            if "id" in filters:
+                item = dict.get(self, filters["id"])
+                return [item] if item is not None else []
+
+            buckets = [
+                self._indexes[field].get(value, {})
+                for field, value in filters.items()
+                if field in self._indexes and isinstance(value, (str, int, float))
+            ]
+            if not buckets:
+                return list(self.values())
+            bucket = min(buckets, key=len)
+            return [self[item_id] for item_id in bucket]
+
+
+def _preference_key(preference):
+    return preference_key(preference["artistId"], preference["userId"])
+
+
+# 키가 id 가 아닌 컬렉션: (기본 키 함수, 인덱스 필드)
+TABLE_OPTIONS = {
+    "fan_preferences": (_preference_key, ("artistId", "userId")),
+}
+
+
 # Mock database storage
 mock_data = {
-    "users": {
-        "1": {
-            "userId": "1",
-            "username": "testuser",
-            "email": "test@example.com",
-            "password": "password123",
-            "fullName": "Test User",
-            "profileImage": "https://example.com/profile.jpg",
-            "createdAt": "2024-01-01T00:00:00Z",
-            "updatedAt": "2024-01-01T00:00:00Z",
-            "preferences": ["music", "travel", "food"],
-        },
-    },
-    "artists": {},
-    "fan_preferences": [],
-    "event_cache": {},
-    "event_cost_calculations": [],  # 이벤트 비용 계산 결과를 저장하기 위한 컬렉션
+    "users": MockTable(
+        {
+            "1": {
+                "userId": "1",
+                "username": "testuser",
+                "email": "test@example.com",
+                "password": "password123",
+                "fullName": "Test User",
+                "profileImage": "https://example.com/profile.jpg",
+                "createdAt": "2024-01-01T00:00:00Z",
+                "updatedAt": "2024-01-01T00:00:00Z",
+                "preferences": ["music", "travel", "food"],
+            },
+        }
+    ),
+    "artists": MockTable(),
+    # (artistId, userId) -> preference, artistId/userId 로 인덱싱
+    "fan_preferences": MockTable(
+        key=TABLE_OPTIONS["fan_preferences"][0],
+        indexed_fields=TABLE_OPTIONS["fan_preferences"][1],
+    ),
+    "event_cache": MockTable(),
+    "event_cost_calculations": MockTable(),  # 이벤트 비용 계산 결과를 저장하기 위한 컬렉션
+    "user_ledger": MockTable(),  # 사용자별 요약 문서(id = user_id)와 저금 이력 항목
 }
 
 
+# 영속화 모드에서 테이블 쓰기를 기록하는 저널 (MockDB.open_persistence)
+_journal = None
+_tables_lock = threading.Lock()
+
+
+def _table(collection_name):
+    """
+    A collection's storage as a MockTable. Creates missing collections,
+    decodes tables restored from disk on first use, and converts a plain
+    dict/list that replaced a table.
+    """
+    data = mock_data.get(collection_name)
+    if isinstance(data, MockTable):
+        return data
+
+    with _tables_lock:
+        data = mock_data.get(collection_name)
+        if isinstance(data, MockTable):
+            return data
+        key, indexed_fields = TABLE_OPTIONS.get(
+            collection_name, (None, MockTable.INDEXED_FIELDS)
+        )
+        if isinstance(data, PendingTable):
+            # 디스크에서 복원된 내용은 다시 기록하지 않음
+            table = MockTable(indexed_fields=indexed_fields)
+            table._load(data.load())
+            table.attach(collection_name, _journal)
+        else:
+            table = MockTable(indexed_fields=indexed_fields)
+            table.attach(collection_name, _journal)
+            if _journal is not None:
+                table.clear()
+            table._fill(data or (), key)
+        mock_data[collection_name] = table
+        return table
+
+
+def _persisted_tables():
+    """Current tables for a journal snapshot (restored tables not yet decoded stay pending)."""
+    return dict(mock_data)
+
+
+class MockPageIterator:
+    """Page iterator mimicking the Cosmos SDK's by_page() result."""
+
+    def __init__(self, items, page_size, continuation_token=None):
+        self.items = items
+        self.page_size = page_size or len(items) or 1
+        self.continuation_token = continuation_token
+        self._offset = int(continuation_token) if continuation_token else 0
+        self._done = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._done:
+            raise StopIteration
+
+        page = self.items[self._offset : self._offset + self.page_size]
+        self._offset += self.page_size
+        # 마지막 페이지면 continuation token 없음
+        self._done = self._offset >= len(self.items)
+        self.continuation_token = None if self._done else str(self._offset)
+        return iter(page)
+
+
+class MockQueryIterable(list):
+    """Query result that can be consumed as a list or page by page."""
+
+    def __init__(self, items, max_item_count=None):
+        super().__init__(items)
+        self.max_item_count = max_item_count
+
+    def by_page(self, continuation_token=None):
+        """Return a page iterator starting at the given continuation token."""
+        if continuation_token is not None and not str(continuation_token).isdigit():
+            raise ValueError(f"Invalid continuation token: {continuation_token}")
+        return MockPageIterator(list(self), self.max_item_count, continuation_token)
+
+
 class MockCollection:
     """Mock collection class to simulate Cosmos DB container operations."""
 
     def __init__(self, collection_name):
         self.collection_name = collection_name
 
+    def _partition_field(self):
+        spec = CONTAINER_SPECS.get(self.collection_name, {})
+        return spec.get("partition_key", "/id").lstrip("/")
+
     def create_item(self, body):
         """Create a new item in the collection."""
         logger.info(f"Creating item in mock collection: {self.collection_name}")
 
-        # 컬렉션 타입에 따라 처리
-        if isinstance(mock_data[self.collection_name], list):
-            # ID가 없으면 생성
-            if "id" not in body:
-                body["id"] = str(uuid.uuid4())
-            mock_data[self.collection_name].append(copy.deepcopy(body))
-        elif isinstance(mock_data[self.collection_name], dict):
-            # 딕셔너리 타입 컬렉션인 경우
-            item_id = body.get("id")
-            if not item_id:
-                item_id = str(uuid.uuid4())
-                body["id"] = item_id
-            mock_data[self.collection_name][item_id] = copy.deepcopy(body)
-
-        return copy.deepcopy(body)
-
-    def query_items(self, query, enable_cross_partition_query=True):
-        """Query items from the collection."""
+        # ID가 없으면 생성
+        item_id = body.setdefault("id", str(uuid.uuid4()))
+        table = _table(self.collection_name)
+        table[item_id] = body
+        return view(table[item_id])
+
+    def upsert_item(self, body):
+        """Create or replace an item in the collection by its id."""
+        return self.create_item(body)
+
+    def query_items(
+        self,
+        query,
+        parameters=None,
+        enable_cross_partition_query=True,
+        max_item_count=None,
+        partition_key=None,
+        **kwargs,
+    ):
+        """
+        Query items from the collection. The SQL is evaluated (app.db.mock_query)
+        over the candidates picked by the table's hash indexes.
+        """
         logger.info(
             f"Querying items in mock collection: {self.collection_name} with query: {query}"
         )
+        parsed = parse_query(query)
+        bound = bind_parameters(parameters)
 
-        # 매우 단순화된 쿼리 처리 (실제 SQL 쿼리 처리는 복잡하지만 여기서는 간단하게 구현)
-        # 실제 애플리케이션에서는 더 복잡한 쿼리 파싱이 필요할 수 있음
-
-        # 컬렉션의 모든 아이템 반환
-        if isinstance(mock_data[self.collection_name], list):
-            # 리스트 타입 컬렉션인 경우
-            items = mock_data[self.collection_name]
-        elif isinstance(mock_data[self.collection_name], dict):
-            # 딕셔너리 타입 컬렉션인 경우
-            items = list(mock_data[self.collection_name].values())
-        else:
-            items = []
+        filters = equality_filters(parsed, bound)
+        candidates = _table(self.collection_name).candidates(filters)
+        if partition_key is not None:
+            field = self._partition_field()
+            candidates = [item for item in candidates if item.get(field) == partition_key]
 
-        # 딥 카피하여 원본 데이터 변경 방지
-        return copy.deepcopy(items)
+        # 저장된 문서는 불변이므로 결과 행만 copy-on-write 뷰로 감싸서 반환
+        rows = execute(parsed, candidates, bound)
+        return MockQueryIterable([view(row) for row in rows], max_item_count)
 
 
 class MockDB:
-    """Mock database for development and testing when Cosmos DB is not available."""
+    """
+    Mock database for development and testing when Cosmos DB is not available.
+    Records are stored frozen; returned documents are copy-on-write views of
+    them (app.db.frozen.view), so callers may modify them freely.
+    """
+
+    def __init__(self):
+        # Read-modify-write operations hold this lock so they are atomic, like
+        # Cosmos patch operations and ETag-guarded replaces
+        self._lock = threading.RLock()
+
+    # Persistence
+    def open_persistence(self, directory=MOCK_DB_PERSIST_DIR, **options):
+        """
+        Restore mock_data from directory and log every later write there
+        (app.db.mock_persistence). Tables found on disk replace the in-memory
+        defaults; on first use the defaults are written as the first snapshot.
+        """
+        global _journal
+        if not directory or _journal is not None:
+            return _journal
+
+        journal = MockJournal(directory, **options)
+        restored = journal.open()
+        with _tables_lock:
+            for name, data in list(mock_data.items()):
+                if name in restored:
+                    mock_data[name] = restored[name]
+                elif isinstance(data, MockTable):
+                    data.attach(name, journal)
+            for name, pending in restored.items():
+                mock_data.setdefault(name, pending)
+            _journal = journal
+        journal.start(_persisted_tables)
+        if not restored:
+            journal.compact()
+        else:
+            # 부팅은 막지 않고, 복원된 테이블을 백그라운드에서 미리 디코딩
+            threading.Thread(
+                target=lambda: [_table(name) for name in restored],
+                name="mock-db-restore",
+                daemon=True,
+            ).start()
+        logger.info(f"Mock DB persistence enabled in {directory}")
+        return journal
+
+    def close_persistence(self, compact=True):
+        """Flush the journal (and write a final snapshot) and stop logging writes."""
+        global _journal
+        journal = _journal
+        if journal is None:
+            return
+        journal.close(compact=compact)
+        with _tables_lock:
+            _journal = None
+            for data in mock_data.values():
+                if isinstance(data, MockTable):
+                    data.attach(None, None)
 
     # Collection operations
     async def get_collection(self, collection_name):
@@ -87,8 +437,8 @@ class MockDB:
         logger.info(f"Getting mock collection: {collection_name}")
         # 컬렉션이 존재하지 않는 경우 빈 컬렉션 생성
         if collection_name not in mock_data:
-            mock_data[collection_name] = []
             logger.info(f"Created new mock collection: {collection_name}")
+        _table(collection_name)
 
         # 컬렉션 프록시 객체 반환
         return MockCollection(collection_name)
@@ -100,40 +450,59 @@ class MockDB:
         if not user_id:
             raise ValueError("User ID is required")
 
-        # Check if user already exists
-        if user_id in mock_data["users"]:
-            raise ValueError(f"User with ID {user_id} already exists")
+        users = _table("users")
+        with self._lock:
+            # Check if user already exists
+            if user_id in users:
+                raise ValueError(f"User with ID {user_id} already exists")
 
-        # Store user data
-        mock_data["users"][user_id] = copy.deepcopy(user_data)
+            # Store user data
+            users[user_id] = user_data
         logger.info(f"Created user with ID: {user_id}")
-        return mock_data["users"][user_id]
+        return view(users[user_id])
 
     async def get_user(self, user_id):
         """Get a user by ID from the mock database."""
-        user = mock_data["users"].get(user_id)
-        if user:
-            return copy.deepcopy(user)
-        return None
+        return view(_table("users").get(user_id))
 
     async def get_all_users(self):
         """Get all users from the mock database."""
-        return list(copy.deepcopy(mock_data["users"].values()))
-
-    async def update_user(self, user_id, user_data):
-        """Update a user in the mock database."""
-        if user_id not in mock_data["users"]:
-            return None
-
-        # Update user data
-        user = mock_data["users"][user_id]
-        for key, value in user_data.items():
-            if key != "userId":  # Don't update the ID
-                user[key] = value
+        return [view(user) for user in _table("users").values()]
+
+    async def update_user(self, user_id, user_data, current=None, increments=None):
+        """Update a user in the mock database (current is unused: the read is local)."""
+        users = _table("users")
+        with self._lock:
+            user = users.get(user_id)
+            if user is None:
+                return None
 
-        user["updatedAt"] = datetime.utcnow().isoformat()
+            # Update user data (userId 는 변경하지 않음)
+            changes = {k: v for k, v in user_data.items() if k != "userId"}
+            for field, value in (increments or {}).items():
+                changes[field] = user.get(field, 0) + value
+            users[user_id] = {
+                **user,
+                **changes,
+                "updatedAt": datetime.utcnow().isoformat(),
+            }
         logger.info(f"Updated user with ID: {user_id}")
-        return copy.deepcopy(user)
+        return view(users[user_id])
+
+    async def increment_user_fields(self, user_id, increments, set_fields=None):
+        """Atomically increment numeric fields on a user in the mock database."""
+        users = _table("users")
+        with self._lock:
+            user = users.get(user_id)
+            if user is None:
+                return None
+
+            updated = dict(user)
+            for field, value in increments.items():
+                updated[field] = updated.get(field, 0) + value
+            updated.update(set_fields or {})
+            users[user_id] = updated
+            return view(users[user_id])
 
     # Artist operations
     async def create_artist(self, artist_data):
@@ -142,43 +511,45 @@ class MockDB:
         if not artist_id:
             raise ValueError("Artist ID is required")
 
-        # Check if artist already exists
-        if artist_id in mock_data["artists"]:
-            raise ValueError(f"Artist with ID {artist_id} already exists")
+        artists = _table("artists")
+        with self._lock:
+            # Check if artist already exists
+            if artist_id in artists:
+                raise ValueError(f"Artist with ID {artist_id} already exists")
 
-        # Store artist data
-        mock_data["artists"][artist_id] = copy.deepcopy(artist_data)
+            # Store artist data
+            artists[artist_id] = artist_data
         logger.info(f"Created artist with ID: {artist_id}")
-        return mock_data["artists"][artist_id]
+        return view(artists[artist_id])
 
     async def get_artist(self, artist_id):
         """Get an artist by ID from the mock database."""
-        artist = mock_data["artists"].get(artist_id)
-        if artist:
-            return copy.deepcopy(artist)
-        return None
+        return view(_table("artists").get(artist_id))
 
     async def get_all_artists(self):
         """Get all artists from the mock database."""
-        return list(copy.deepcopy(mock_data["artists"].values()))
-
-    async def update_artist(self, artist_id, artist_data):
-        """Update an artist in the mock database."""
-        if artist_id not in mock_data["artists"]:
-            return None
-
-        # Update artist data
-        artist = mock_data["artists"][artist_id]
-        for key, value in artist_data.items():
-            if key != "artistId":  # Don't update the ID
-                artist[key] = value
+        return [view(artist) for artist in _table("artists").values()]
+
+    async def update_artist(self, artist_id, artist_data, current=None):
+        """Update an artist in the mock database (current is unused: the read is local)."""
+        artists = _table("artists")
+        with self._lock:
+            artist = artists.get(artist_id)
+            if artist is None:
+                return None
 
-        artist["updatedAt"] = datetime.utcnow().isoformat()
+            # Update artist data (artistId 는 변경하지 않음)
+            changes = {k: v for k, v in artist_data.items() if k != "artistId"}
+            artists[artist_id] = {
+                **artist,
+                **changes,
+                "updatedAt": datetime.utcnow().isoformat(),
+            }
         logger.info(f"Updated artist with ID: {artist_id}")
-        return copy.deepcopy(artist)
+        return view(artists[artist_id])
 
     # Fan Preference operations
-    async def create_fan_preference(self, preference_data):
+    async def create_fan_preference(self, preference_data, update_fan_count=True):
         """Create a new fan preference in the mock database."""
         artist_id = preference_data.get("artistId")
         user_id = preference_data.get("userId")
@@ -186,75 +557,197 @@ class MockDB:
         if not artist_id or not user_id:
             raise ValueError("Artist ID and User ID are required")
 
-        # Check if preference already exists
-        for pref in mock_data["fan_preferences"]:
-            if pref["artistId"] == artist_id and pref["userId"] == user_id:
+        key = preference_key(artist_id, user_id)
+        with self._lock:
+            preferences = _table("fan_preferences")
+            # Check if preference already exists
+            if key in preferences:
                 raise ValueError(
                     f"Preference for artist {artist_id} and user {user_id} already exists"
                 )
 
-        # Store preference data
-        mock_data["fan_preferences"].append(copy.deepcopy(preference_data))
-        logger.info(f"Created fan preference for artist {artist_id} and user {user_id}")
+            # Store preference data
+            preferences[key] = preference_data
 
-        # Update artist fan count
-        if artist_id in mock_data["artists"]:
-            mock_data["artists"][artist_id]["fanCount"] += 1
+            # Update artist fan count
+            artists = _table("artists")
+            artist = artists.get(artist_id) if update_fan_count else None
+            if artist is not None:
+                artists[artist_id] = {**artist, "fanCount": artist.get("fanCount", 0) + 1}
+        logger.info(f"Created fan preference for artist {artist_id} and user {user_id}")
 
         return preference_data
 
     async def get_fan_preferences_by_artist(self, artist_id):
         """Get all fan preferences for an artist from the mock database."""
-        return [
-            copy.deepcopy(pref)
-            for pref in mock_data["fan_preferences"]
-            if pref["artistId"] == artist_id
-        ]
+        return [view(p) for p in _table("fan_preferences").candidates({"artistId": artist_id})]
 
     async def get_fan_preferences_by_user(self, user_id):
         """Get all fan preferences for a user from the mock database."""
-        return [
-            copy.deepcopy(pref)
-            for pref in mock_data["fan_preferences"]
-            if pref["userId"] == user_id
-        ]
+        return [view(p) for p in _table("fan_preferences").candidates({"userId": user_id})]
 
     async def update_fan_preference(self, artist_id, user_id, preference_data):
         """Update a fan preference in the mock database."""
-        # Find the preference to update
-        for i, pref in enumerate(mock_data["fan_preferences"]):
-            if pref["artistId"] == artist_id and pref["userId"] == user_id:
-                # Update preference data
-                mock_data["fan_preferences"][i].update(preference_data)
-                logger.info(
-                    f"Updated fan preference for artist {artist_id} and user {user_id}"
-                )
-                return copy.deepcopy(mock_data["fan_preferences"][i])
-        return None
+        key = preference_key(artist_id, user_id)
+        with self._lock:
+            preferences = _table("fan_preferences")
+            pref = preferences.get(key)
+            if pref is None:
+                return None
+            # Update preference data (artistId/userId 는 키이므로 유지)
+            preferences[key] = {
+                **pref,
+                **preference_data,
+                "artistId": artist_id,
+                "userId": user_id,
+            }
+            updated = preferences[key]
+        logger.info(f"Updated fan preference for artist {artist_id} and user {user_id}")
+        return view(updated)
 
     # Event Cache operations
-    async def get_event_cache(self, artist_id):
-        """Get cached event data for an artist from the mock database."""
-        cache = mock_data["event_cache"].get(artist_id)
-        if cache:
-            # Check if cache is expired
-            expires_at = datetime.fromisoformat(cache["expiresAt"])
-            if expires_at < datetime.utcnow():
-                logger.info(f"Cache for artist {artist_id} is expired")
-                return None
-            return copy.deepcopy(cache)
+    async def get_event_cache(self, artist_id, allow_stale=False):
+        """
+        Get cached event data for an artist from the mock database.
+        Soft-expired data is returned only when allow_stale is set; hard-expired
+        data is purged on read, like Cosmos TTL would have done.
+        """
+        caches = _table("event_cache")
+        cache = caches.get(artist_id)
+        if not cache:
+            return None
+
+        state = cache_state(cache)
+        if state == EXPIRED:
+            with self._lock:
+                caches.pop(artist_id, None)
+        if state == FRESH or (state == STALE and allow_stale):
+            return view(cache)
+        logger.info(f"Cache for artist {artist_id} is {state}")
         return None
 
     async def create_or_update_event_cache(self, event_data):
         """Create or update cached event data in the mock database."""
-        artist_id = event_data.get("artistId")
-        if not artist_id:
-            raise ValueError("Artist ID is required")
+        cache = serialize_cache(event_data)
+        artist_id = cache["artistId"]
 
         # Store cache data
-        mock_data["event_cache"][artist_id] = copy.deepcopy(event_data)
+        caches = _table("event_cache")
+        caches[artist_id] = cache
         logger.info(f"Created/updated event cache for artist {artist_id}")
-        return mock_data["event_cache"][artist_id]
+        return view(caches[artist_id])
+
+    async def event_cache_report(self):
+        """Compact the mock event cache (drop hard-expired entries) and report its size."""
+        with self._lock:
+            caches = _table("event_cache")
+            expired = [
+                artist_id
+                for artist_id, cache in caches.items()
+                if cache_state(cache) == EXPIRED
+            ]
+            for artist_id in expired:
+                del caches[artist_id]
+
+            size = sum(len(json.dumps(cache, default=str)) for cache in caches.values())
+            return {
+                "documents": len(caches),
+                "size_kb": size // 1024,
+                "stale": sum(1 for c in caches.values() if cache_state(c) == STALE),
+                "purged": len(expired),
+            }
+
+    # User summary operations
+    async def get_user_summary(self, user_id):
+        """Get a user's financial summary from the mock database."""
+        return view(_table("user_ledger").get(user_id) or None)
+
+    async def upsert_user_summary(self, summary_data):
+        """Create or replace a user's financial summary in the mock database."""
+        user_id = summary_data.get("user_id")
+        if not user_id:
+            raise ValueError("User ID is required")
+
+        summary_data["type"] = USER_SUMMARY_TYPE
+        summary_data["id"] = user_id
+        ledger = _table("user_ledger")
+        ledger[user_id] = summary_data
+        return view(ledger[user_id])
+
+    async def update_user_summary(self, user_id, mutate):
+        """Atomically apply mutate to a user's summary in the mock database."""
+        ledger = _table("user_ledger")
+        with self._lock:
+            current = ledger.get(user_id)
+            # mutate 는 변경 가능한 사본을 받음
+            summary = mutate(view(current) if current else None)
+            summary["type"] = USER_SUMMARY_TYPE
+            summary["id"] = user_id
+            ledger[user_id] = summary
+            return view(ledger[user_id])
+
+    async def add_savings_entry(self, entry):
+        """
+        Write a savings ledger entry and update the user's summary in the mock
+        database. Both changes are applied together or not at all.
+        """
+        user_id = entry.get("user_id")
+        if not user_id:
+            raise ValueError("User ID is required")
+
+        ledger = _table("user_ledger")
+        with self._lock:
+            entry_id = entry.setdefault("id", str(uuid.uuid4()))
+            if entry_id in ledger:
+                raise ValueError(f"Savings entry {entry_id} already exists")
+
+            # 새 상태를 모두 계산한 뒤에 한꺼번에 반영
+            current = ledger.get(user_id)
+            summary = view(current) if current else empty_summary(user_id)
+            apply_savings(summary, entry)
+            summary["type"] = USER_SUMMARY_TYPE
+            summary["id"] = user_id
+            summary["updatedAt"] = datetime.utcnow().isoformat()
+
+            ledger[entry_id] = entry
+            ledger[user_id] = summary
+            return {"summary": view(ledger[user_id]), "created": current is None}
+
+    # Generic document and change feed operations
+    async def read_document(self, collection_name, item_id):
+        """Get a document by id from the mock database."""
+        return view(_table(collection_name).get(item_id))
+
+    async def create_document(self, collection_name, document):
+        """Insert a new document; ValueError if the id is taken."""
+        item_id = document["id"]
+        table = _table(collection_name)
+        with self._lock:
+            if item_id in table:
+                raise ValueError(f"Document {item_id} already exists in {collection_name}")
+            table[item_id] = document
+            return view(table[item_id])
+
+    async def update_document(self, collection_name, item_id, mutate):
+        """Atomically replace a document with mutate(current or None)."""
+        table = _table(collection_name)
+        with self._lock:
+            current = table.get(item_id)
+            updated = mutate(view(current) if current is not None else None)
+            if updated is None:
+                return None
+            updated["id"] = item_id
+            table[item_id] = updated
+            return view(table[item_id])
+
+    async def read_changes(
+        self, collection_name, continuation=None, max_items=100, start_from_beginning=True
+    ):
+        """Change feed of a collection (polls the table's write sequence)."""
+        documents, continuation = _table(collection_name).changes(
+            continuation, max_items, start_from_beginning
+        )
+        return [view(document) for document in documents], continuation
 
 
 # Create a singleton instance
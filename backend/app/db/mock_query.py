@@ -0,0 +1,434 @@
+"""
+Evaluator for the subset of Cosmos DB SQL the app uses, so the mock database
+returns the same rows Cosmos would.
+
+Supported:
+- SELECT * | SELECT VALUE <expr> | SELECT <expr> [AS name], ... (optionally TOP n)
+- FROM <alias>
+- WHERE with =, !=, <>, <, <=, >, >=, AND, OR, NOT and parentheses
+- ARRAY_LENGTH(), IS_DEFINED() and COUNT(1) (as SELECT VALUE COUNT(1))
+- ORDER BY <path> [ASC|DESC], ...
+- OFFSET n LIMIT m
+- string/number/true/false/null literals and @parameters
+
+Semantics follow Cosmos: a comparison with a missing property is undefined
+and filters the document out, values of different types are never equal,
+and ORDER BY ranks undefined < null < booleans < numbers < strings.
+"""
+
+import re
+from functools import lru_cache
+
+
+class QuerySyntaxError(Exception):
+    """The query uses SQL the mock evaluator does not support."""
+
+
+class _Undefined:
+    def __repr__(self):
+        return "undefined"
+
+
+UNDEFINED = _Undefined()
+
+_TOKEN = re.compile(
+    r"""
+    \s*(?:
+        (?P<number>-?\d+(?:\.\d+)?)
+      | (?P<string>'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")
+      | (?P<param>@\w+)
+      | (?P<op><>|!=|<=|>=|=|<|>)
+      | (?P<punct>[(),.*\[\]])
+      | (?P<word>[A-Za-z_]\w*)
+    )""",
+    re.VERBOSE,
+)
+
+_KEYWORDS = {
+    "SELECT", "TOP", "VALUE", "AS", "FROM", "WHERE", "AND", "OR", "NOT",
+    "ORDER", "BY", "ASC", "DESC", "OFFSET", "LIMIT", "TRUE", "FALSE", "NULL",
+}
+_FUNCTIONS = {"ARRAY_LENGTH", "IS_DEFINED", "COUNT"}
+
+
+def _tokenize(sql):
+    tokens = []
+    position = 0
+    sql = sql.rstrip()
+    while position < len(sql):
+        match = _TOKEN.match(sql, position)
+        if not match or match.end() == position:
+            raise QuerySyntaxError(f"Unexpected input at {position}: {sql[position:position + 20]!r}")
+        kind = match.lastgroup
+        text = raw = match.group(kind)
+        if kind == "word" and text.upper() in _KEYWORDS | _FUNCTIONS:
+            kind, text = "keyword", text.upper()
+        tokens.append((kind, text, raw))
+        position = match.end()
+    return tokens
+
+
+class _Parser:
+    def __init__(self, sql):
+        self.tokens = _tokenize(sql)
+        self.position = 0
+        self.alias = None
+
+    def peek(self):
+        if self.position < len(self.tokens):
+            return self.tokens[self.position][:2]
+        return (None, None)
+
+    def _name(self):
+        """Property name after '.' (keywords such as c.value are valid names)."""
+        if self.position >= len(self.tokens) or self.tokens[self.position][0] not in ("word", "keyword"):
+            raise QuerySyntaxError("Expected a property name")
+        name = self.tokens[self.position][2]
+        self.position += 1
+        return name
+
+    def accept(self, text):
+        kind, value = self.peek()
+        if value == text and kind in ("keyword", "op", "punct"):
+            self.position += 1
+            return True
+        return False
+
+    def expect(self, text):
+        if not self.accept(text):
+            raise QuerySyntaxError(f"Expected {text!r}, got {self.peek()[1]!r}")
+
+    def parse(self):
+        self.expect("SELECT")
+        top = self._integer() if self.accept("TOP") else None
+
+        # 별칭은 FROM 뒤에 오므로 SELECT 목록은 나중에 파싱
+        select_start = self.position
+        depth = 0
+        while not (depth == 0 and self.peek()[1] == "FROM"):
+            if self.peek()[0] is None:
+                raise QuerySyntaxError("Missing FROM clause")
+            if self.peek()[1] == "(":
+                depth += 1
+            elif self.peek()[1] == ")":
+                depth -= 1
+            self.position += 1
+        select_end = self.position
+
+        self.expect("FROM")
+        kind, alias = self.peek()
+        if kind != "word":
+            raise QuerySyntaxError("Expected a collection alias after FROM")
+        self.alias = alias
+        self.position += 1
+
+        where = self._expression() if self.accept("WHERE") else None
+
+        order_by = []
+        if self.accept("ORDER"):
+            self.expect("BY")
+            while True:
+                expr = self._primary()
+                descending = self.accept("DESC")
+                if not descending:
+                    self.accept("ASC")
+                order_by.append((expr, descending))
+                if not self.accept(","):
+                    break
+
+        offset = limit = None
+        if self.accept("OFFSET"):
+            offset = self._integer()
+            self.expect("LIMIT")
+            limit = self._integer()
+
+        if self.peek()[0] is not None:
+            raise QuerySyntaxError(f"Unexpected {self.peek()[1]!r}")
+        end = self.position
+
+        self.position = select_start
+        select = self._select_list()
+        if self.position != select_end:
+            raise QuerySyntaxError("Unsupported SELECT list")
+        self.position = end
+
+        return ParsedQuery(select, where, tuple(order_by), top, offset, limit)
+
+    def _integer(self):
+        kind, value = self.peek()
+        if kind != "number" or not value.isdigit():
+            raise QuerySyntaxError(f"Expected an integer, got {value!r}")
+        self.position += 1
+        return int(value)
+
+    def _select_list(self):
+        if self.accept("*"):
+            return ("star",)
+        if self.accept("VALUE"):
+            return ("value", self._expression())
+        fields = []
+        while True:
+            expr = self._expression()
+            if self.accept("AS"):
+                name = self._name()
+            elif expr[0] == "path" and expr[1]:
+                name = expr[1][-1]
+            else:
+                name = f"${len(fields) + 1}"
+            fields.append((name, expr))
+            if not self.accept(","):
+                break
+        return ("fields", tuple(fields))
+
+    def _expression(self):
+        left = self._and()
+        while self.accept("OR"):
+            left = ("or", left, self._and())
+        return left
+
+    def _and(self):
+        left = self._not()
+        while self.accept("AND"):
+            left = ("and", left, self._not())
+        return left
+
+    def _not(self):
+        if self.accept("NOT"):
+            return ("not", self._not())
+        return self._comparison()
+
+    def _comparison(self):
+        left = self._primary()
+        kind, op = self.peek()
+        if kind == "op":
+            self.position += 1
+            return ("cmp", "!=" if op == "<>" else op, left, self._primary())
+        return left
+
+    def _primary(self):
+        kind, value = self.peek()
+        if kind is None:
+            raise QuerySyntaxError("Unexpected end of query")
+        self.position += 1
+
+        if kind == "number":
+            return ("lit", float(value) if "." in value else int(value))
+        if kind == "string":
+            body = value[1:-1]
+            return ("lit", re.sub(r"\\(.)", r"\1", body))
+        if kind == "param":
+            return ("param", value)
+        if kind == "keyword" and value in ("TRUE", "FALSE", "NULL"):
+            return ("lit", {"TRUE": True, "FALSE": False, "NULL": None}[value])
+        if kind == "keyword" and value in _FUNCTIONS:
+            self.expect("(")
+            args = []
+            if not self.accept(")"):
+                while True:
+                    args.append(self._expression())
+                    if not self.accept(","):
+                        break
+                self.expect(")")
+            return ("call", value, tuple(args))
+        if kind == "punct" and value == "(":
+            expr = self._expression()
+            self.expect(")")
+            return expr
+        if kind == "word":
+            if value != self.alias:
+                raise QuerySyntaxError(f"Unknown identifier {value!r}")
+            keys = []
+            while True:
+                if self.accept("."):
+                    keys.append(self._name())
+                elif self.accept("["):
+                    kind, key = self.peek()
+                    if kind != "string":
+                        raise QuerySyntaxError("Only quoted property names are supported in []")
+                    keys.append(key[1:-1])
+                    self.position += 1
+                    self.expect("]")
+                else:
+                    break
+            return ("path", tuple(keys))
+        raise QuerySyntaxError(f"Unexpected {value!r}")
+
+
+class ParsedQuery:
+    __slots__ = ("select", "where", "order_by", "top", "offset", "limit")
+
+    def __init__(self, select, where, order_by, top, offset, limit):
+        self.select = select
+        self.where = where
+        self.order_by = order_by
+        self.top = top
+        self.offset = offset
+        self.limit = limit
+
+
+@lru_cache(maxsize=512)
+def parse_query(sql):
+    """Parse (and memoize) a query string."""
+    return _Parser(sql).parse()
+
+
+def _resolve(path, document):
+    value = document
+    for key in path:
+        if not isinstance(value, dict) or key not in value:
+            return UNDEFINED
+        value = value[key]
+    return value
+
+
+def _type_rank(value):
+    if value is UNDEFINED:
+        return 0
+    if value is None:
+        return 1
+    if isinstance(value, bool):
+        return 2
+    if isinstance(value, (int, float)):
+        return 3
+    if isinstance(value, str):
+        return 4
+    return 5
+
+
+def _compare(op, left, right):
+    if left is UNDEFINED or right is UNDEFINED:
+        return UNDEFINED
+    same_type = _type_rank(left) == _type_rank(right)
+    if op == "=":
+        return same_type and left == right
+    if op == "!=":
+        return not (same_type and left == right)
+    if not same_type or _type_rank(left) > 4:
+        return UNDEFINED
+    if op == "<":
+        return left < right
+    if op == "<=":
+        return left <= right
+    if op == ">":
+        return left > right
+    return left >= right
+
+
+def evaluate(expr, document, parameters):
+    kind = expr[0]
+    if kind == "lit":
+        return expr[1]
+    if kind == "param":
+        if expr[1] not in parameters:
+            raise QuerySyntaxError(f"Missing parameter {expr[1]}")
+        return parameters[expr[1]]
+    if kind == "path":
+        return _resolve(expr[1], document)
+    if kind == "cmp":
+        return _compare(
+            expr[1],
+            evaluate(expr[2], document, parameters),
+            evaluate(expr[3], document, parameters),
+        )
+    if kind == "and":
+        left = evaluate(expr[1], document, parameters)
+        if left is False:
+            return False
+        right = evaluate(expr[2], document, parameters)
+        if right is False:
+            return False
+        return True if left is True and right is True else UNDEFINED
+    if kind == "or":
+        left = evaluate(expr[1], document, parameters)
+        if left is True:
+            return True
+        right = evaluate(expr[2], document, parameters)
+        if right is True:
+            return True
+        return False if left is False and right is False else UNDEFINED
+    if kind == "not":
+        value = evaluate(expr[1], document, parameters)
+        return not value if isinstance(value, bool) else UNDEFINED
+    if kind == "call":
+        name, args = expr[1], expr[2]
+        values = [evaluate(arg, document, parameters) for arg in args]
+        if name == "ARRAY_LENGTH":
+            # 저장된 문서의 배열은 tuple 로 고정되어 있음 (app.db.frozen)
+            return len(values[0]) if isinstance(values[0], (list, tuple)) else UNDEFINED
+        if name == "IS_DEFINED":
+            return values[0] is not UNDEFINED
+        raise QuerySyntaxError(f"{name}() is only supported as SELECT VALUE COUNT(1)")
+    raise QuerySyntaxError(f"Unsupported expression {kind}")
+
+
+def bind_parameters(parameters):
+    """Cosmos-style [{"name": "@x", "value": ...}] to a name -> value dict."""
+    return {p["name"]: p["value"] for p in parameters or []}
+
+
+def equality_filters(query, parameters):
+    """
+    Top-level `c.field = value` conditions joined by AND, as {field: value}.
+    Used to pick a hash index; results are still checked against the full WHERE.
+    """
+    filters = {}
+    pending = [query.where] if query.where else []
+    while pending:
+        expr = pending.pop()
+        if expr[0] == "and":
+            pending.extend((expr[1], expr[2]))
+        elif expr[0] == "cmp" and expr[1] == "=":
+            for path, value in ((expr[2], expr[3]), (expr[3], expr[2])):
+                if path[0] == "path" and len(path[1]) == 1 and value[0] in ("lit", "param"):
+                    filters[path[1][0]] = evaluate(value, {}, parameters)
+                    break
+    return filters
+
+
+def _sort_key(value):
+    rank = _type_rank(value)
+    return (rank, value if 1 < rank < 5 else 0)
+
+
+def execute(query, documents, parameters):
+    """Run a parsed query over candidate documents (not copied)."""
+    if query.where is not None:
+        rows = [
+            doc for doc in documents if evaluate(query.where, doc, parameters) is True
+        ]
+    else:
+        rows = list(documents)
+
+    # 여러 정렬 키는 마지막 키부터 안정 정렬
+    for expr, descending in reversed(query.order_by):
+        rows.sort(
+            key=lambda doc: _sort_key(evaluate(expr, doc, parameters)),
+            reverse=descending,
+        )
+
+    select = query.select
+    if select[0] == "value" and select[1][0] == "call" and select[1][1] == "COUNT":
+        return [len(rows)]
+
+    if query.offset is not None:
+        rows = rows[query.offset : query.offset + query.limit]
+    if query.top is not None:
+        rows = rows[: query.top]
+
+    if select[0] == "star":
+        return rows
+    if select[0] == "value":
+        return [
+            value
+            for value in (evaluate(select[1], doc, parameters) for doc in rows)
+            if value is not UNDEFINED
+        ]
+    results = []
+    for doc in rows:
+        row = {}
+        for name, expr in select[1]:
+            value = evaluate(expr, doc, parameters)
+            if value is not UNDEFINED:
+                row[name] = value
+        results.append(row)
+    return results
@@ -0,0 +1,74 @@
+import base64
+import binascii
+import logging
+from azure.cosmos import exceptions
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Page size limits for paginated endpoints
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+class InvalidContinuationToken(ValueError):
+    """Raised when a client sends a continuation token we did not issue."""
+
+
+def encode_continuation(token):
+    """Wrap a backend continuation token into an opaque, URL-safe string."""
+    if not token:
+        return None
+    return base64.urlsafe_b64encode(token.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_continuation(token):
+    """Unwrap an opaque continuation token back into the backend token."""
+    if not token:
+        return None
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        return base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8")
+    except (binascii.Error, UnicodeError, ValueError):
+        raise InvalidContinuationToken("Invalid continuation token")
+
+
+def query_page(
+    collection,
+    query,
+    parameters=None,
+    limit=DEFAULT_PAGE_SIZE,
+    continuation=None,
+    partition_key=None,
+):
+    """
+    Fetch a single page of query results.
+    Works with both Cosmos DB containers and mock collections, which expose the
+    same query_items(...).by_page(continuation_token) surface.
+    Pass partition_key to keep the query inside one logical partition.
+    Returns (items, next_continuation); next_continuation is None on the last page.
+    """
+    backend_token = decode_continuation(continuation)
+    scope = (
+        {"partition_key": partition_key}
+        if partition_key is not None
+        else {"enable_cross_partition_query": True}
+    )
+    try:
+        pages = collection.query_items(
+            query=query,
+            parameters=parameters,
+            max_item_count=limit,
+            **scope,
+        ).by_page(backend_token)
+        items = list(next(pages, []))
+    except ValueError:
+        raise InvalidContinuationToken("Invalid continuation token")
+    except exceptions.CosmosHttpResponseError as e:
+        # Cosmos DB 는 변조되었거나 만료된 토큰을 400 으로 거부함
+        if e.status_code != 400 or not backend_token:
+            raise
+        raise InvalidContinuationToken("Invalid continuation token")
+
+    return items, encode_continuation(pages.continuation_token)
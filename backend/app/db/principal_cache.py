@@ -0,0 +1,207 @@
+"""
+In-process cache of authenticated principals (user documents by userId).
+
+get_current_user runs on every authenticated request and a page load sends
+several back-to-back, so DatabaseService keeps recently seen users in a
+bounded LRU for PRINCIPAL_CACHE_TTL_SECONDS. Concurrent misses for the same
+user share one load instead of all querying the database. Writes through
+DatabaseService invalidate the entry; writes from other workers become
+visible after the (short) TTL or when the change feed cache processor sees
+them.
+
+ClaimsVersions backs the claims-carrying access tokens (get_current_claims):
+it remembers each user's latest claimsVersion so a token issued before a
+profile change can be rejected from memory; users it does not know are read.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from app.db.frozen import freeze, view
+
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "30"))
+PRINCIPAL_CACHE_MAX_ENTRIES = int(os.getenv("PRINCIPAL_CACHE_MAX_ENTRIES", "10000"))
+
+
+class _LoadAbandoned(Exception):
+    """The request loading a user was cancelled; a waiting request loads it instead."""
+
+
+class PrincipalCache:
+    def __init__(
+        self,
+        ttl_seconds=PRINCIPAL_CACHE_TTL_SECONDS,
+        max_entries=PRINCIPAL_CACHE_MAX_ENTRIES,
+        clock=time.monotonic,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # user_id -> (expires_at, user), oldest first
+        self._loading = {}  # user_id -> (loop, future) of the load in flight
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self):
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    def _cached(self, user_id):
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        if entry[0] <= self._clock():
+            del self._entries[user_id]
+            return None
+        self._entries.move_to_end(user_id)
+        return entry
+
+    async def get(self, user_id, load):
+        """Return the cached user, calling await load() on a miss (None is not cached)."""
+        if not self.enabled:
+            return await load()
+
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._lock:
+                entry = self._cached(user_id)
+                if entry is not None:
+                    self.hits += 1
+                    return view(entry[1])
+                in_flight = self._loading.get(user_id)
+                if in_flight is not None and in_flight[0] is loop:
+                    self.coalesced += 1
+                    future = in_flight[1]
+                else:
+                    self.misses += 1
+                    future = loop.create_future()
+                    self._loading[user_id] = (loop, future)
+                    in_flight = None
+                generation = self._generation
+
+            if in_flight is None:
+                break
+            try:
+                # 같은 사용자를 읽는 중인 요청의 결과를 함께 사용
+                return view(await asyncio.shield(future))
+            except _LoadAbandoned:
+                # 읽던 요청이 취소됨: 다시 확인하고, 필요하면 직접 읽음
+                continue
+
+        try:
+            user = await load()
+            user = freeze(user) if user is not None else None
+        except BaseException as e:
+            with self._lock:
+                if self._loading.get(user_id, (None, None))[1] is future:
+                    del self._loading[user_id]
+            # 취소 (클라이언트 연결 끊김 등) 는 이 요청만의 일이므로 기다리던
+            # 다른 요청에는 전하지 않고 다시 읽게 함
+            future.set_exception(e if isinstance(e, Exception) else _LoadAbandoned())
+            # 기다리는 요청이 없어도 경고가 남지 않도록 결과를 소비
+            future.exception()
+            raise
+
+        with self._lock:
+            if self._loading.get(user_id, (None, None))[1] is future:
+                del self._loading[user_id]
+            # 로딩 중에 무효화됐다면 오래된 결과를 캐시하지 않음
+            if user is not None and generation == self._generation:
+                self._entries[user_id] = (self._clock() + self.ttl_seconds, user)
+                self._entries.move_to_end(user_id)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        future.set_result(user)
+        return view(user)
+
+    def invalidate(self, user_id=None):
+        """Drop one user (everything if None)."""
+        with self._lock:
+            self._generation += 1
+            self.invalidations += 1
+            if user_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(user_id, None)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "ttl_seconds": self.ttl_seconds,
+                "max_entries": self.max_entries,
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate": round((self.hits + self.coalesced) / lookups, 3) if lookups else 0.0,
+            }
+
+
+class ClaimsVersions:
+    """
+    Latest known claimsVersion per user (bounded LRU), so claims embedded in
+    an access token can be checked without a database read. Versions are
+    learned from issued tokens, profile writes, user loads and the change
+    feed. A user that is not tracked is not trusted: get_current_claims reads
+    the user first. Without the change feed a version learned here can miss
+    writes from other workers, so it expires after ttl_seconds (None: kept
+    until evicted, for when the change feed keeps every process up to date).
+    """
+
+    def __init__(
+        self,
+        ttl_seconds=PRINCIPAL_CACHE_TTL_SECONDS,
+        max_entries=PRINCIPAL_CACHE_MAX_ENTRIES,
+        clock=time.monotonic,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._versions = OrderedDict()  # user_id -> (expires_at, version)
+        self.stale = 0
+
+    def _known(self, user_id):
+        entry = self._versions.get(user_id)
+        if entry is None:
+            return None
+        if entry[0] is not None and entry[0] <= self._clock():
+            del self._versions[user_id]
+            return None
+        return entry[1]
+
+    def observe(self, user_id, version):
+        if not user_id or version is None or self.max_entries <= 0:
+            return
+        with self._lock:
+            known = self._known(user_id)
+            expires_at = None if self.ttl_seconds is None else self._clock() + self.ttl_seconds
+            self._versions[user_id] = (expires_at, max(version, known or version))
+            self._versions.move_to_end(user_id)
+            while len(self._versions) > self.max_entries:
+                self._versions.popitem(last=False)
+
+    def get(self, user_id):
+        """The tracked version of a user, or None if it is unknown (or expired)."""
+        with self._lock:
+            return self._known(user_id)
+
+    def is_current(self, version, known):
+        """Whether a token's claims version is at least the known one."""
+        if version >= known:
+            return True
+        with self._lock:
+            self.stale += 1
+        return False
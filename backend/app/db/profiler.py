@@ -0,0 +1,446 @@
+"""
+Development profiler for the database and LLM calls of one HTTP request.
+
+With REQUEST_PROFILER_ENABLED=true, DatabaseService talks to its backend
+through ProfiledBackend, collections returned by get_collection are wrapped
+in ProfiledCollection, and OpenAI clients created through profile_llm
+record their chat completions. Each call is timed and stored on the
+RequestProfile of the current request (a context variable set by the
+middleware in main.py) with its shape, rows and RU charge (Cosmos DB only,
+taken from app.db.metrics; approximate when calls overlap).
+
+When the request finishes the profile is checked for:
+- repeated_query: the same call with the same arguments
+  REQUEST_PROFILER_REPEAT_THRESHOLD times or more
+- n_plus_one: one query shape issued with REQUEST_PROFILER_N_PLUS_ONE_THRESHOLD
+  or more different arguments (typically a read per item of a list)
+- full_scan: get_all_users/get_all_artists or a query without WHERE
+- select_star: SELECT * through get_collection where a projection may do
+- sequential: REQUEST_PROFILER_SEQUENTIAL_MIN or more independent reads/LLM
+  calls awaited one after another (no write in between, no overlap), which
+  asyncio.gather could run concurrently
+and reported in the X-Request-Profile response header and the log. The
+profiler adds per-call overhead and exposes internals; keep it off in
+production.
+"""
+
+import contextvars
+import json
+import logging
+import os
+import time
+from collections import Counter, defaultdict
+from types import SimpleNamespace
+
+from app.db.base import BACKEND_METHODS
+from app.db.metrics import current_request, normalize_query
+
+logger = logging.getLogger(__name__)
+
+REQUEST_PROFILER_ENABLED = os.getenv("REQUEST_PROFILER_ENABLED", "false").lower() == "true"
+REQUEST_PROFILER_REPEAT_THRESHOLD = int(os.getenv("REQUEST_PROFILER_REPEAT_THRESHOLD", "2"))
+REQUEST_PROFILER_N_PLUS_ONE_THRESHOLD = int(
+    os.getenv("REQUEST_PROFILER_N_PLUS_ONE_THRESHOLD", "5")
+)
+REQUEST_PROFILER_SEQUENTIAL_MIN = int(os.getenv("REQUEST_PROFILER_SEQUENTIAL_MIN", "3"))
+
+PROFILE_HEADER = "X-Request-Profile"
+# 헤더가 너무 커지지 않도록 제한 (전체 내용은 로그에 남음)
+MAX_HEADER_LENGTH = 2000
+
+FULL_SCAN_METHODS = frozenset(("get_all_users", "get_all_artists"))
+READ_PREFIXES = ("get_", "read_", "query_")
+COLLECTION_OPERATIONS = (
+    "query_items",
+    "read_item",
+    "create_item",
+    "upsert_item",
+    "replace_item",
+    "patch_item",
+    "delete_item",
+)
+
+
+class Operation:
+    """One database or LLM call made while serving a request."""
+
+    __slots__ = ("kind", "target", "name", "shape", "key", "started", "ended", "charge", "rows")
+
+    def __init__(self, kind, target, name, shape, key, started):
+        self.kind = kind  # "db" or "llm"
+        self.target = target  # backend or collection name, or the LLM provider
+        self.name = name
+        self.shape = shape
+        self.key = key  # identical calls have the same key
+        self.started = started
+        self.ended = started
+        self.charge = 0.0
+        self.rows = None
+
+    @property
+    def label(self):
+        return f"{self.target}.{self.name}"
+
+    @property
+    def duration_ms(self):
+        return round((self.ended - self.started) * 1000, 2)
+
+    @property
+    def is_read(self):
+        return self.kind == "llm" or self.name.startswith(READ_PREFIXES)
+
+
+class RequestProfile:
+    """Operations of one HTTP request, in the order they started."""
+
+    def __init__(self):
+        self.operations = []
+
+    def report(
+        self,
+        repeat_threshold=None,
+        n_plus_one_threshold=None,
+        sequential_min=None,
+    ):
+        db = [op for op in self.operations if op.kind == "db"]
+        llm = [op for op in self.operations if op.kind == "llm"]
+        return {
+            "db": {
+                "operations": len(db),
+                "duration_ms": round(sum(op.duration_ms for op in db), 2),
+                "request_charge": round(sum(op.charge for op in db), 2),
+            },
+            "llm": {
+                "calls": len(llm),
+                "duration_ms": round(sum(op.duration_ms for op in llm), 2),
+                "tokens": sum(op.rows or 0 for op in llm),
+            },
+            "operations": [
+                {
+                    "kind": op.kind,
+                    "operation": op.label,
+                    "shape": op.shape,
+                    "duration_ms": op.duration_ms,
+                    "request_charge": round(op.charge, 2),
+                    # LLM 호출은 행 수 대신 토큰 수
+                    ("tokens" if op.kind == "llm" else "rows"): op.rows,
+                }
+                for op in self.operations
+            ],
+            "findings": analyze(
+                self.operations,
+                REQUEST_PROFILER_REPEAT_THRESHOLD if repeat_threshold is None else repeat_threshold,
+                REQUEST_PROFILER_N_PLUS_ONE_THRESHOLD
+                if n_plus_one_threshold is None
+                else n_plus_one_threshold,
+                REQUEST_PROFILER_SEQUENTIAL_MIN if sequential_min is None else sequential_min,
+            ),
+        }
+
+
+def analyze(operations, repeat_threshold, n_plus_one_threshold, sequential_min):
+    """Suspicious patterns in a request's operations (see the module docstring)."""
+    findings = []
+
+    # 쓰기는 읽은 뒤 같은 문서를 갱신하는 것이 정상이므로 읽기만 비교
+    identical = Counter(
+        (op.label, op.shape, op.key) for op in operations if op.key is not None and op.is_read
+    )
+    for (label, shape, _), count in identical.items():
+        if count >= repeat_threshold:
+            findings.append(
+                {"type": "repeated_query", "operation": label, "shape": shape, "count": count}
+            )
+
+    variants = defaultdict(set)
+    for op in operations:
+        if op.kind == "db" and op.key is not None and op.is_read:
+            variants[(op.label, op.shape)].add(op.key)
+    for (label, shape), keys in variants.items():
+        if len(keys) >= n_plus_one_threshold:
+            findings.append(
+                {"type": "n_plus_one", "operation": label, "shape": shape, "count": len(keys)}
+            )
+
+    scans = set()
+    for op in operations:
+        if op.kind != "db":
+            continue
+        if op.name in FULL_SCAN_METHODS or (
+            op.name == "query_items" and " WHERE " not in f" {op.shape.upper()} "
+        ):
+            scans.add((op.label, op.shape, "full_scan"))
+        if op.name == "query_items" and op.shape.upper().startswith("SELECT *"):
+            scans.add((op.label, op.shape, "select_star"))
+    for label, shape, kind in sorted(scans):
+        findings.append({"type": kind, "operation": label, "shape": shape})
+
+    run = []
+    for op in sorted(operations, key=lambda op: op.started) + [None]:
+        if op is not None and op.is_read and (not run or op.started >= run[-1].ended):
+            run.append(op)
+            continue
+        if len(run) >= sequential_min:
+            durations = [item.duration_ms for item in run]
+            findings.append(
+                {
+                    "type": "sequential",
+                    "operations": [item.label for item in run],
+                    "duration_ms": round(sum(durations), 2),
+                    # 동시에 실행했다면 가장 긴 호출만큼만 걸림
+                    "saving_ms": round(sum(durations) - max(durations), 2),
+                }
+            )
+        run = [op] if op is not None and op.is_read else []
+
+    return findings
+
+
+_current_profile = contextvars.ContextVar("request_profile", default=None)
+
+
+def begin_request():
+    """Start profiling the current request."""
+    profile = RequestProfile()
+    return profile, _current_profile.set(profile)
+
+
+def end_request(token):
+    _current_profile.reset(token)
+
+
+def current_profile():
+    return _current_profile.get()
+
+
+def _charge():
+    cost = current_request()
+    return cost.request_charge if cost is not None else 0.0
+
+
+def _start(kind, target, name, shape, key):
+    """Open an operation on the current profile (None outside a profiled request)."""
+    profile = current_profile()
+    if profile is None:
+        return None, 0.0
+    operation = Operation(kind, target, name, shape, key, time.perf_counter())
+    profile.operations.append(operation)
+    return operation, _charge() if kind == "db" else 0.0
+
+
+def _finish(operation, charge_before, rows=None):
+    operation.ended = time.perf_counter()
+    if operation.kind == "db":
+        operation.charge += max(0.0, _charge() - charge_before)
+    if rows is not None:
+        operation.rows = (operation.rows or 0) + rows
+
+
+def _key(*parts):
+    try:
+        return json.dumps(parts, sort_keys=True, default=str)
+    except (TypeError, ValueError):
+        return repr(parts)
+
+
+class ProfiledBackend:
+    """DatabaseService backend proxy that records every protocol call."""
+
+    def __init__(self, backend):
+        self._backend = backend
+        self._name = type(backend).__name__
+
+    def __getattr__(self, name):
+        attr = getattr(self._backend, name)
+        if name == "get_collection":
+            return self._get_collection(attr)
+        if name not in BACKEND_METHODS:
+            return attr
+
+        async def call(*args, **kwargs):
+            # mutate 같은 호출 가능 인자는 키에서 제외
+            plain = [a for a in args if not callable(a)]
+            operation, charge = _start("db", self._name, name, name, _key(plain, kwargs))
+            if operation is None:
+                return await attr(*args, **kwargs)
+            try:
+                result = await attr(*args, **kwargs)
+            finally:
+                _finish(operation, charge)
+            operation.rows = len(result) if isinstance(result, list) else None
+            return result
+
+        return call
+
+    def _get_collection(self, get_collection):
+        async def call(collection_name):
+            collection = await get_collection(collection_name)
+            return ProfiledCollection(collection, collection_name) if collection else collection
+
+        return call
+
+
+class ProfiledCollection:
+    """Collection (get_collection) proxy that records item operations and queries."""
+
+    def __init__(self, collection, name):
+        self._collection = collection
+        self._name = name
+
+    def __getattr__(self, name):
+        attr = getattr(self._collection, name)
+        if name not in COLLECTION_OPERATIONS or name == "query_items":
+            return attr
+
+        def call(*args, **kwargs):
+            item = kwargs.get("item") or (kwargs.get("body") or {}).get("id")
+            operation, charge = _start("db", self._name, name, name, _key(item))
+            if operation is None:
+                return attr(*args, **kwargs)
+            try:
+                return attr(*args, **kwargs)
+            finally:
+                _finish(operation, charge)
+
+        return call
+
+    def query_items(self, query=None, *args, **kwargs):
+        if query is None:
+            query = kwargs.pop("query", "")
+        shape = normalize_query(query)
+        parameters = kwargs.get("parameters") or (args[0] if args else None)
+        operation, charge = _start("db", self._name, "query_items", shape, _key(query, parameters))
+        if operation is None:
+            return self._collection.query_items(query, *args, **kwargs)
+        try:
+            result = self._collection.query_items(query, *args, **kwargs)
+        finally:
+            _finish(operation, charge)
+        return _ProfiledQuery(result, operation)
+
+
+class _ProfiledQuery:
+    """Query results; Cosmos DB fetches lazily, so iteration time is added to the call."""
+
+    def __init__(self, query, operation):
+        self._query = query
+        self._operation = operation
+
+    def __iter__(self):
+        charge = _charge()
+        rows = 0
+        started = time.perf_counter()
+        try:
+            for item in self._query:
+                rows += 1
+                yield item
+        finally:
+            fetched = time.perf_counter() - started
+            self._operation.ended += fetched
+            self._operation.rows = (self._operation.rows or 0) + rows
+            self._operation.charge += max(0.0, _charge() - charge)
+
+    def by_page(self, continuation_token=None):
+        return _ProfiledPages(self._query.by_page(continuation_token), self._operation)
+
+    def __getattr__(self, name):
+        return getattr(self._query, name)
+
+
+class _ProfiledPages:
+    def __init__(self, pages, operation):
+        self._pages = pages
+        self._operation = operation
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        charge = _charge()
+        started = time.perf_counter()
+        try:
+            page = list(next(self._pages))
+        finally:
+            self._operation.ended += time.perf_counter() - started
+            self._operation.charge += max(0.0, _charge() - charge)
+        self._operation.rows = (self._operation.rows or 0) + len(page)
+        return page
+
+    def __getattr__(self, name):
+        return getattr(self._pages, name)
+
+
+class _ProfiledCompletions:
+    def __init__(self, completions, provider):
+        self._completions = completions
+        self._provider = provider
+
+    def create(self, *args, **kwargs):
+        model = kwargs.get("model") or ""
+        key = _key(model, kwargs.get("messages"))
+        operation, _ = _start("llm", self._provider, "chat.completions.create", model, key)
+        if operation is None:
+            return self._completions.create(*args, **kwargs)
+        try:
+            completion = self._completions.create(*args, **kwargs)
+        finally:
+            _finish(operation, 0.0)
+        usage = getattr(completion, "usage", None)
+        operation.rows = getattr(usage, "total_tokens", None)
+        return completion
+
+    def __getattr__(self, name):
+        return getattr(self._completions, name)
+
+
+class _ProfiledLLMClient:
+    def __init__(self, client):
+        self._client = client
+        self.chat = SimpleNamespace(
+            completions=_ProfiledCompletions(client.chat.completions, type(client).__name__)
+        )
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+def profile_llm(client):
+    """Record the chat completions of an OpenAI client (unchanged when disabled)."""
+    if not REQUEST_PROFILER_ENABLED:
+        return client
+    return _ProfiledLLMClient(client)
+
+
+def header_value(report):
+    """Compact ASCII summary of a report for the X-Request-Profile header."""
+    parts = [
+        f"db={report['db']['operations']}",
+        f"db_ms={report['db']['duration_ms']}",
+        f"ru={report['db']['request_charge']}",
+        f"llm={report['llm']['calls']}",
+        f"llm_ms={report['llm']['duration_ms']}",
+    ]
+    flags = []
+    for finding in report["findings"]:
+        subject = finding.get("operation") or "+".join(finding.get("operations", []))
+        count = f"x{finding['count']}" if "count" in finding else ""
+        flags.append(f"{finding['type']}({subject}{count})")
+    if flags:
+        parts.append("flags=" + ",".join(flags))
+    value = ";".join(parts).encode("ascii", "replace").decode("ascii")
+    return value[:MAX_HEADER_LENGTH]
+
+
+def log_report(method, route, report):
+    """Findings are logged as warnings, clean requests at debug level."""
+    summary = (
+        f"{method} {route}: {report['db']['operations']} DB ops "
+        f"({report['db']['duration_ms']} ms, {report['db']['request_charge']} RU), "
+        f"{report['llm']['calls']} LLM calls ({report['llm']['duration_ms']} ms)"
+    )
+    if report["findings"]:
+        logger.warning(
+            f"{summary}; findings: {json.dumps(report['findings'], ensure_ascii=False)}"
+        )
+    else:
+        logger.debug(summary)
@@ -0,0 +1,56 @@
+// Records a savings entry and folds it into the owner's summary document.
+// Runs inside the user's logical partition, so both writes commit or neither does.
+function addSavingsEntry(entry) {
+    var collection = getContext().getCollection();
+    var response = getContext().getResponse();
+    var summaryLink = collection.getAltLink() + "/docs/" + entry.user_id;
+
+    var accepted = collection.readDocument(summaryLink, {}, function (err, summary) {
+        var created = false;
+        if (err) {
+            if (err.number !== 404) throw err;
+            created = true;
+            summary = {
+                id: entry.user_id,
+                user_id: entry.user_id,
+                type: "user_summary",
+                total_estimated: 0,
+                cost_count: 0,
+                last_cost_saved_at: null,
+                total_savings: 0,
+                savings_count: 0,
+                last_saved_at: null,
+                monthly: {}
+            };
+        }
+
+        var month = entry.saved_at.substring(0, 7);
+        var bucket = summary.monthly[month] ||
+            { estimated: 0, cost_count: 0, savings: 0, savings_count: 0 };
+        bucket.savings += entry.amount;
+        bucket.savings_count += 1;
+        summary.monthly[month] = bucket;
+
+        summary.total_savings += entry.amount;
+        summary.savings_count += 1;
+        if (!summary.last_saved_at || summary.last_saved_at < entry.saved_at) {
+            summary.last_saved_at = entry.saved_at;
+        }
+        summary.updatedAt = new Date().toISOString();
+
+        collection.createDocument(collection.getSelfLink(), entry, function (err) {
+            // 같은 id 의 항목이 이미 있으면 아무것도 쓰지 않고 알림 (CosmosDB 가 ValueError 로 바꿈)
+            if (err && err.number === 409) {
+                response.setBody({ summary: null, created: false, duplicate: true });
+                return;
+            }
+            if (err) throw err;
+            collection.upsertDocument(collection.getSelfLink(), summary, function (err, saved) {
+                if (err) throw err;
+                response.setBody({ summary: saved, created: created });
+            });
+        });
+    });
+
+    if (!accepted) throw new Error("Savings entry not accepted, retry the request");
+}
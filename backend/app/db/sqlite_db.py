@@ -0,0 +1,683 @@
+"""
+SQLite backend for single-node and on-prem deployments (DATABASE_BACKEND=sqlite).
+
+Every container is a table of JSON documents: (id TEXT PRIMARY KEY, doc TEXT,
+seq INTEGER). seq is the table's write sequence and serves the change feed
+(read_changes): every write takes MAX(seq) + 1 under the write lock.
+Fields the API filters or sorts on have expression indexes on
+json_extract(doc, '$.field') (SQLITE_INDEXES). Cosmos SQL given to
+query_items is parsed by app.db.mock_query; its top-level equality filters
+are pushed down to SQLite, so they are answered from those indexes, and the
+full query is then evaluated on the fetched rows.
+
+The database runs in WAL mode, so readers never block the writer. The async
+DatabaseService methods run their blocking work on a thread executor, and
+each thread borrows a connection from a small pool. Read-modify-write
+operations use BEGIN IMMEDIATE transactions, so they are atomic across
+processes too.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import queue
+import re
+import sqlite3
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import date, datetime
+
+from app.db.base import preference_key
+from app.db.cosmos_db import (
+    ARTISTS_CONTAINER,
+    CONTAINER_SPECS,
+    EVENT_CACHE_CONTAINER,
+    EVENT_COSTS_CONTAINER,
+    FAN_PREFERENCES_CONTAINER,
+    SAVINGS_HISTORY_CONTAINER,
+    USER_LEDGER_CONTAINER,
+    USERS_CONTAINER,
+)
+from app.db.event_cache import EXPIRED, FRESH, STALE, cache_state, serialize_cache
+from app.db.ledger import USER_SUMMARY_TYPE, apply_savings, empty_summary
+from app.db.mock_db import MockQueryIterable
+from app.db.mock_query import bind_parameters, equality_filters, execute, parse_query
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SQLITE_PATH = os.getenv("SQLITE_PATH", "data/app.db")
+SQLITE_POOL_SIZE = int(os.getenv("SQLITE_POOL_SIZE", "4"))
+
+# 컨테이너별 인덱스 (여러 필드는 복합 인덱스). users/artists 등은 id 가 기본 키
+SQLITE_INDEXES = {
+    USERS_CONTAINER: [("email",)],
+    ARTISTS_CONTAINER: [("artistId",)],
+    FAN_PREFERENCES_CONTAINER: [("artistId",), ("userId",)],
+    EVENT_COSTS_CONTAINER: [("user_id", "saved_at")],
+    SAVINGS_HISTORY_CONTAINER: [("user_id", "saved_at")],
+    USER_LEDGER_CONTAINER: [("user_id", "type", "saved_at")],
+}
+
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def _field(name):
+    return f"json_extract(doc, '$.{name}')"
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def _dumps(document):
+    return json.dumps(document, default=_json_default, ensure_ascii=False)
+
+
+class ConnectionPool:
+    """Fixed set of SQLite connections shared by the executor threads."""
+
+    def __init__(self, path, size=SQLITE_POOL_SIZE):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connections = queue.LifoQueue()
+        for _ in range(size):
+            self._connections.put(self._connect())
+
+    def _connect(self):
+        # isolation_level=None: 트랜잭션은 직접 BEGIN/COMMIT 으로 관리
+        conn = sqlite3.connect(
+            self.path, timeout=30, isolation_level=None, check_same_thread=False
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextmanager
+    def connection(self):
+        conn = self._connections.get()
+        try:
+            yield conn
+        finally:
+            self._connections.put(conn)
+
+    @contextmanager
+    def transaction(self):
+        """A connection inside BEGIN IMMEDIATE ... COMMIT (rolled back on error)."""
+        with self.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def close(self):
+        while True:
+            try:
+                self._connections.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class SQLiteStore:
+    """Document operations on one connection; tables are created on first use."""
+
+    def __init__(self):
+        self._created = set()
+        self._lock = threading.Lock()
+
+    def ensure_table(self, conn, name):
+        if name in self._created:
+            return
+        if not _IDENTIFIER.match(name):
+            raise ValueError(f"Invalid collection name: {name}")
+        with self._lock:
+            conn.execute(
+                f'CREATE TABLE IF NOT EXISTS "{name}" '
+                "(id TEXT PRIMARY KEY, doc TEXT NOT NULL, seq INTEGER)"
+            )
+            columns = [row[1] for row in conn.execute(f'PRAGMA table_info("{name}")')]
+            if "seq" not in columns:
+                # 변경 피드 이전에 만들어진 파일: 기존 행은 rowid 순서로 채움
+                conn.execute(f'ALTER TABLE "{name}" ADD COLUMN seq INTEGER')
+                conn.execute(f'UPDATE "{name}" SET seq = rowid')
+            conn.execute(f'CREATE INDEX IF NOT EXISTS "ix_{name}_seq" ON "{name}" (seq)')
+            for fields in SQLITE_INDEXES.get(name, []):
+                conn.execute(
+                    f'CREATE INDEX IF NOT EXISTS "ix_{name}_{"_".join(fields)}" '
+                    f'ON "{name}" ({", ".join(_field(f) for f in fields)})'
+                )
+            self._created.add(name)
+
+    def get(self, conn, name, item_id):
+        self.ensure_table(conn, name)
+        row = conn.execute(f'SELECT doc FROM "{name}" WHERE id = ?', (item_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    @contextmanager
+    def _writing(self, conn):
+        """Hold the write lock for a statement that reads MAX(seq) (joins an open transaction)."""
+        if conn.in_transaction:
+            yield
+            return
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _next_seq(self, name):
+        return f'(SELECT COALESCE(MAX(seq), 0) + 1 FROM "{name}")'
+
+    def insert(self, conn, name, item_id, document):
+        """Insert a new document; ValueError if the id is taken."""
+        self.ensure_table(conn, name)
+        try:
+            with self._writing(conn):
+                conn.execute(
+                    f'INSERT INTO "{name}" (id, doc, seq) VALUES (?, ?, {self._next_seq(name)})',
+                    (item_id, _dumps(document)),
+                )
+        except sqlite3.IntegrityError:
+            raise ValueError(f"Document {item_id} already exists in {name}")
+        return document
+
+    def put(self, conn, name, item_id, document):
+        """Insert or replace a document."""
+        self.ensure_table(conn, name)
+        with self._writing(conn):
+            conn.execute(
+                f'INSERT INTO "{name}" (id, doc, seq) VALUES (?, ?, {self._next_seq(name)}) '
+                "ON CONFLICT(id) DO UPDATE SET doc = excluded.doc, seq = excluded.seq",
+                (item_id, _dumps(document)),
+            )
+        return document
+
+    def changes(self, conn, name, since, max_items):
+        """Documents written after sequence `since`, oldest first, with their seq."""
+        self.ensure_table(conn, name)
+        return conn.execute(
+            f'SELECT seq, doc FROM "{name}" WHERE seq > ? ORDER BY seq LIMIT ?',
+            (since, max_items),
+        ).fetchall()
+
+    def last_seq(self, conn, name):
+        self.ensure_table(conn, name)
+        return conn.execute(f'SELECT COALESCE(MAX(seq), 0) FROM "{name}"').fetchone()[0]
+
+    def delete(self, conn, name, item_id):
+        self.ensure_table(conn, name)
+        return conn.execute(f'DELETE FROM "{name}" WHERE id = ?', (item_id,)).rowcount
+
+    def select(self, conn, name, filters=None):
+        """Documents matching the equality filters (served by the expression indexes)."""
+        self.ensure_table(conn, name)
+        clauses, values = [], []
+        for field, value in (filters or {}).items():
+            # null 비교와 복합 값은 SQL 로 내리지 않음 (파이썬에서 다시 검사함)
+            if not _IDENTIFIER.match(field) or not isinstance(value, (str, int, float)):
+                continue
+            if field == "id":
+                clauses.append("id = ?")
+            else:
+                clauses.append(f"{_field(field)} = ?")
+            values.append(value)
+        sql = f'SELECT doc FROM "{name}"'
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        return [json.loads(row[0]) for row in conn.execute(sql, values)]
+
+
+class SQLiteCollection:
+    """The container surface used by main.py and the services, on one SQLite table."""
+
+    def __init__(self, backend, collection_name):
+        self._backend = backend
+        self.collection_name = collection_name
+
+    def _partition_field(self):
+        spec = CONTAINER_SPECS.get(self.collection_name, {})
+        return spec.get("partition_key", "/id").lstrip("/")
+
+    def create_item(self, body):
+        item_id = body.setdefault("id", str(uuid.uuid4()))
+        with self._backend.pool.connection() as conn:
+            return self._backend.store.insert(conn, self.collection_name, item_id, body)
+
+    def upsert_item(self, body):
+        item_id = body.setdefault("id", str(uuid.uuid4()))
+        with self._backend.pool.connection() as conn:
+            return self._backend.store.put(conn, self.collection_name, item_id, body)
+
+    def replace_item(self, item, body):
+        item_id = item["id"] if isinstance(item, dict) else item
+        body["id"] = item_id
+        with self._backend.pool.transaction() as conn:
+            if self._backend.store.get(conn, self.collection_name, item_id) is None:
+                raise ValueError(f"Document {item_id} not found in {self.collection_name}")
+            return self._backend.store.put(conn, self.collection_name, item_id, body)
+
+    def read_item(self, item, partition_key=None):
+        item_id = item["id"] if isinstance(item, dict) else item
+        with self._backend.pool.connection() as conn:
+            return self._backend.store.get(conn, self.collection_name, item_id)
+
+    def delete_item(self, item, partition_key=None):
+        item_id = item["id"] if isinstance(item, dict) else item
+        with self._backend.pool.connection() as conn:
+            self._backend.store.delete(conn, self.collection_name, item_id)
+
+    def query_items(
+        self,
+        query,
+        parameters=None,
+        enable_cross_partition_query=True,
+        max_item_count=None,
+        partition_key=None,
+        **kwargs,
+    ):
+        parsed = parse_query(query)
+        bound = bind_parameters(parameters)
+        filters = equality_filters(parsed, bound)
+        if partition_key is not None:
+            filters[self._partition_field()] = partition_key
+        with self._backend.pool.connection() as conn:
+            candidates = self._backend.store.select(conn, self.collection_name, filters)
+        if partition_key is not None:
+            field = self._partition_field()
+            candidates = [item for item in candidates if item.get(field) == partition_key]
+        return MockQueryIterable(execute(parsed, candidates, bound), max_item_count)
+
+
+class SQLiteDB:
+    """DatabaseService backend on a local SQLite file."""
+
+    def __init__(self, path=SQLITE_PATH, pool_size=SQLITE_POOL_SIZE):
+        self.path = path
+        self.pool_size = pool_size
+        self.store = SQLiteStore()
+        self._pool = None
+        self._executor = None
+        self._init_lock = threading.Lock()
+
+    @property
+    def pool(self):
+        if self._pool is None:
+            self.initialize()
+        return self._pool
+
+    def initialize(self):
+        """Open the connection pool and create the known tables and indexes."""
+        with self._init_lock:
+            if self._pool is not None:
+                return
+            pool = ConnectionPool(self.path, self.pool_size)
+            with pool.connection() as conn:
+                for name in CONTAINER_SPECS:
+                    self.store.ensure_table(conn, name)
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.pool_size, thread_name_prefix="sqlite"
+            )
+            self._pool = pool
+        logger.info(f"SQLite database ready at {self.path} (WAL, pool of {self.pool_size})")
+
+    def close(self):
+        with self._init_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+            if self._pool is not None:
+                self._pool.close()
+                self._pool = None
+
+    def readiness(self):
+        return {"ready": self._pool is not None, "path": self.path}
+
+    async def _read(self, operation):
+        """Run operation(conn) on the executor."""
+        pool = self.pool
+
+        def run():
+            with pool.connection() as conn:
+                return operation(conn)
+
+        return await asyncio.get_running_loop().run_in_executor(self._executor, run)
+
+    async def _write(self, operation):
+        """Run operation(conn) inside an immediate transaction on the executor."""
+        pool = self.pool
+
+        def run():
+            with pool.transaction() as conn:
+                return operation(conn)
+
+        return await asyncio.get_running_loop().run_in_executor(self._executor, run)
+
+    # Collection operations
+    async def get_collection(self, collection_name):
+        """Get a collection by name; its table is created on first use."""
+        return SQLiteCollection(self, collection_name)
+
+    # User operations
+    async def create_user(self, user_data):
+        """Create a new user."""
+        user_id = user_data.get("userId")
+        if not user_id:
+            raise ValueError("User ID is required")
+
+        def create(conn):
+            try:
+                return self.store.insert(conn, USERS_CONTAINER, user_id, user_data)
+            except ValueError:
+                raise ValueError(f"User with ID {user_id} already exists")
+
+        created = await self._write(create)
+        logger.info(f"Created user with ID: {user_id}")
+        return created
+
+    async def get_user(self, user_id):
+        """Get a user by ID."""
+        return await self._read(lambda conn: self.store.get(conn, USERS_CONTAINER, user_id))
+
+    async def get_all_users(self):
+        """Get all users."""
+        return await self._read(lambda conn: self.store.select(conn, USERS_CONTAINER))
+
+    async def update_user(self, user_id, user_data, current=None, increments=None):
+        """Update a user (userId is never changed; current is unused: the read is local)."""
+
+        def update(conn):
+            user = self.store.get(conn, USERS_CONTAINER, user_id)
+            if user is None:
+                return None
+            user.update({k: v for k, v in user_data.items() if k != "userId"})
+            for field, value in (increments or {}).items():
+                user[field] = user.get(field, 0) + value
+            user["updatedAt"] = datetime.utcnow().isoformat()
+            return self.store.put(conn, USERS_CONTAINER, user_id, user)
+
+        updated = await self._write(update)
+        if updated is not None:
+            logger.info(f"Updated user with ID: {user_id}")
+        return updated
+
+    async def increment_user_fields(self, user_id, increments, set_fields=None):
+        """Atomically increment numeric fields on a user."""
+
+        def increment(conn):
+            user = self.store.get(conn, USERS_CONTAINER, user_id)
+            if user is None:
+                return None
+            for field, value in increments.items():
+                user[field] = user.get(field, 0) + value
+            user.update(set_fields or {})
+            return self.store.put(conn, USERS_CONTAINER, user_id, user)
+
+        return await self._write(increment)
+
+    # Artist operations
+    async def create_artist(self, artist_data):
+        """Create a new artist."""
+        artist_id = artist_data.get("artistId")
+        if not artist_id:
+            raise ValueError("Artist ID is required")
+
+        def create(conn):
+            try:
+                return self.store.insert(conn, ARTISTS_CONTAINER, artist_id, artist_data)
+            except ValueError:
+                raise ValueError(f"Artist with ID {artist_id} already exists")
+
+        created = await self._write(create)
+        logger.info(f"Created artist with ID: {artist_id}")
+        return created
+
+    async def get_artist(self, artist_id):
+        """Get an artist by ID."""
+        return await self._read(lambda conn: self.store.get(conn, ARTISTS_CONTAINER, artist_id))
+
+    async def get_all_artists(self):
+        """Get all artists."""
+        return await self._read(lambda conn: self.store.select(conn, ARTISTS_CONTAINER))
+
+    async def update_artist(self, artist_id, artist_data, current=None):
+        """Update an artist (artistId is never changed; current is unused: the read is local)."""
+
+        def update(conn):
+            artist = self.store.get(conn, ARTISTS_CONTAINER, artist_id)
+            if artist is None:
+                return None
+            artist.update({k: v for k, v in artist_data.items() if k != "artistId"})
+            artist["updatedAt"] = datetime.utcnow().isoformat()
+            return self.store.put(conn, ARTISTS_CONTAINER, artist_id, artist)
+
+        updated = await self._write(update)
+        if updated is not None:
+            logger.info(f"Updated artist with ID: {artist_id}")
+        return updated
+
+    # Fan Preference operations
+    async def create_fan_preference(self, preference_data, update_fan_count=True):
+        """Create a fan preference and bump the artist's fan count in one transaction."""
+        artist_id = preference_data.get("artistId")
+        user_id = preference_data.get("userId")
+        if not artist_id or not user_id:
+            raise ValueError("Artist ID and User ID are required")
+
+        def create(conn):
+            key = preference_key(artist_id, user_id)
+            try:
+                self.store.insert(conn, FAN_PREFERENCES_CONTAINER, key, preference_data)
+            except ValueError:
+                raise ValueError(
+                    f"Preference for artist {artist_id} and user {user_id} already exists"
+                )
+            artist = self.store.get(conn, ARTISTS_CONTAINER, artist_id) if update_fan_count else None
+            if artist is not None:
+                artist["fanCount"] = artist.get("fanCount", 0) + 1
+                self.store.put(conn, ARTISTS_CONTAINER, artist_id, artist)
+            return preference_data
+
+        created = await self._write(create)
+        logger.info(f"Created fan preference for artist {artist_id} and user {user_id}")
+        return created
+
+    async def get_fan_preferences_by_artist(self, artist_id):
+        """Get all fan preferences for an artist."""
+        return await self._read(
+            lambda conn: self.store.select(
+                conn, FAN_PREFERENCES_CONTAINER, {"artistId": artist_id}
+            )
+        )
+
+    async def get_fan_preferences_by_user(self, user_id):
+        """Get all fan preferences for a user."""
+        return await self._read(
+            lambda conn: self.store.select(conn, FAN_PREFERENCES_CONTAINER, {"userId": user_id})
+        )
+
+    async def update_fan_preference(self, artist_id, user_id, preference_data):
+        """Update a fan preference (artistId/userId are its key and never change)."""
+        key = preference_key(artist_id, user_id)
+
+        def update(conn):
+            preference = self.store.get(conn, FAN_PREFERENCES_CONTAINER, key)
+            if preference is None:
+                return None
+            preference.update(preference_data)
+            preference.update({"artistId": artist_id, "userId": user_id})
+            return self.store.put(conn, FAN_PREFERENCES_CONTAINER, key, preference)
+
+        return await self._write(update)
+
+    # Event Cache operations
+    async def get_event_cache(self, artist_id, allow_stale=False):
+        """
+        Get cached event data for an artist. Soft-expired data is returned only
+        when allow_stale is set; hard-expired data is deleted on read.
+        """
+        cache = await self._read(
+            lambda conn: self.store.get(conn, EVENT_CACHE_CONTAINER, artist_id)
+        )
+        if not cache:
+            return None
+
+        state = cache_state(cache)
+        if state == EXPIRED:
+            await self._write(
+                lambda conn: self.store.delete(conn, EVENT_CACHE_CONTAINER, artist_id)
+            )
+        if state == FRESH or (state == STALE and allow_stale):
+            return cache
+        logger.info(f"Cache for artist {artist_id} is {state}")
+        return None
+
+    async def create_or_update_event_cache(self, event_data):
+        """Create or update cached event data."""
+        cache = serialize_cache(event_data)
+        artist_id = cache["artistId"]
+        stored = await self._write(
+            lambda conn: self.store.put(conn, EVENT_CACHE_CONTAINER, artist_id, cache)
+        )
+        logger.info(f"Created/updated event cache for artist {artist_id}")
+        return stored
+
+    async def event_cache_report(self):
+        """Delete hard-expired event cache entries and report the container size."""
+
+        def report(conn):
+            caches = self.store.select(conn, EVENT_CACHE_CONTAINER)
+            expired = [c["artistId"] for c in caches if cache_state(c) == EXPIRED]
+            for artist_id in expired:
+                self.store.delete(conn, EVENT_CACHE_CONTAINER, artist_id)
+            (count, size) = conn.execute(
+                f'SELECT COUNT(*), COALESCE(SUM(LENGTH(doc)), 0) FROM "{EVENT_CACHE_CONTAINER}"'
+            ).fetchone()
+            return {
+                "documents": count,
+                "size_kb": size // 1024,
+                "stale": sum(
+                    1
+                    for c in caches
+                    if c["artistId"] not in expired and cache_state(c) == STALE
+                ),
+                "purged": len(expired),
+            }
+
+        return await self._write(report)
+
+    # User summary operations
+    async def get_user_summary(self, user_id):
+        """Get a user's financial summary."""
+        return await self._read(
+            lambda conn: self.store.get(conn, USER_LEDGER_CONTAINER, user_id)
+        )
+
+    async def upsert_user_summary(self, summary_data):
+        """Create or replace a user's financial summary."""
+        user_id = summary_data.get("user_id")
+        if not user_id:
+            raise ValueError("User ID is required")
+
+        summary_data["type"] = USER_SUMMARY_TYPE
+        summary_data["id"] = user_id
+        return await self._write(
+            lambda conn: self.store.put(conn, USER_LEDGER_CONTAINER, user_id, summary_data)
+        )
+
+    async def update_user_summary(self, user_id, mutate):
+        """Atomically apply mutate to a user's summary."""
+
+        def update(conn):
+            current = self.store.get(conn, USER_LEDGER_CONTAINER, user_id)
+            summary = mutate(current)
+            summary["type"] = USER_SUMMARY_TYPE
+            summary["id"] = user_id
+            return self.store.put(conn, USER_LEDGER_CONTAINER, user_id, summary)
+
+        return await self._write(update)
+
+    async def add_savings_entry(self, entry):
+        """
+        Write a savings ledger entry and update the user's summary in one
+        transaction. Both changes are applied together or not at all.
+        """
+        user_id = entry.get("user_id")
+        if not user_id:
+            raise ValueError("User ID is required")
+        entry_id = entry.setdefault("id", str(uuid.uuid4()))
+
+        def add(conn):
+            try:
+                self.store.insert(conn, USER_LEDGER_CONTAINER, entry_id, entry)
+            except ValueError:
+                raise ValueError(f"Savings entry {entry_id} already exists")
+
+            current = self.store.get(conn, USER_LEDGER_CONTAINER, user_id)
+            summary = current or empty_summary(user_id)
+            apply_savings(summary, entry)
+            summary["type"] = USER_SUMMARY_TYPE
+            summary["id"] = user_id
+            summary["updatedAt"] = datetime.utcnow().isoformat()
+            self.store.put(conn, USER_LEDGER_CONTAINER, user_id, summary)
+            return {"summary": summary, "created": current is None}
+
+        return await self._write(add)
+
+    # Generic document and change feed operations
+    async def read_document(self, collection_name, item_id):
+        """Get a document by id."""
+        return await self._read(lambda conn: self.store.get(conn, collection_name, item_id))
+
+    async def create_document(self, collection_name, document):
+        """Insert a new document; ValueError if the id is taken."""
+        return await self._write(
+            lambda conn: self.store.insert(conn, collection_name, document["id"], document)
+        )
+
+    async def update_document(self, collection_name, item_id, mutate):
+        """Atomically replace a document with mutate(current or None)."""
+
+        def update(conn):
+            updated = mutate(self.store.get(conn, collection_name, item_id))
+            if updated is None:
+                return None
+            updated["id"] = item_id
+            return self.store.put(conn, collection_name, item_id, updated)
+
+        return await self._write(update)
+
+    async def read_changes(
+        self, collection_name, continuation=None, max_items=100, start_from_beginning=True
+    ):
+        """Change feed of a collection, ordered by the table's write sequence."""
+
+        def read(conn):
+            if continuation is not None and str(continuation).isdigit():
+                since = int(continuation)
+            elif continuation is None and not start_from_beginning:
+                since = self.store.last_seq(conn, collection_name)
+            else:
+                since = 0
+            rows = self.store.changes(conn, collection_name, since, max_items)
+            if rows:
+                since = rows[-1][0]
+            return [json.loads(doc) for _, doc in rows], str(since)
+
+        return await self._read(read)
+
+
+# Create a singleton instance (the file is opened on first use)
+sqlite_db = SQLiteDB()
@@ -0,0 +1,210 @@
+"""
+Retry and admission control for Cosmos DB throttling (HTTP 429).
+
+The SDK retries throttled requests first, its total wait bounded by
+COSMOS_RETRY_DEADLINE_SECONDS (see CosmosDB._connect); what still comes
+back as 429 is handled here:
+- call_with_retry waits at least `x-ms-retry-after-ms` plus jitter between
+  attempts and gives up with CosmosThrottledError once the total deadline
+  would be exceeded.
+- AdaptiveConcurrencyLimiter bounds in-flight DB operations per worker
+  (AIMD): the limit is halved when throttling shows up and grows back by
+  roughly one slot per window of successful operations.
+
+Both wait by blocking the calling thread, so they are meant to run on a
+worker thread (CosmosDB runs every SDK call on its own executor). Called
+from the event loop thread they never wait: no free slot or a 429 is
+reported as CosmosThrottledError right away.
+"""
+
+import asyncio
+import os
+import random
+import threading
+import time
+
+from azure.cosmos import exceptions
+
+COSMOS_RETRY_DEADLINE_SECONDS = float(os.getenv("COSMOS_RETRY_DEADLINE_SECONDS", "10"))
+COSMOS_RETRY_BASE_DELAY_MS = float(os.getenv("COSMOS_RETRY_BASE_DELAY_MS", "50"))
+COSMOS_MAX_CONCURRENCY = int(os.getenv("COSMOS_MAX_CONCURRENCY", "32"))
+COSMOS_MIN_CONCURRENCY = int(os.getenv("COSMOS_MIN_CONCURRENCY", "2"))
+
+RETRY_AFTER_HEADER = "x-ms-retry-after-ms"
+THROTTLED_STATUS = 429
+
+# 여러 요청이 동시에 429 를 받아도 한 번만 줄이도록
+DECREASE_COOLDOWN_SECONDS = 0.5
+
+
+class CosmosThrottledError(Exception):
+    """Cosmos DB kept throttling past the retry deadline; surfaced as HTTP 503."""
+
+    def __init__(self, retry_after_seconds):
+        super().__init__(f"Cosmos DB is throttling requests (retry after {retry_after_seconds:.1f}s)")
+        self.retry_after_seconds = retry_after_seconds
+
+
+def is_throttled(error):
+    return (
+        isinstance(error, exceptions.CosmosHttpResponseError)
+        and error.status_code == THROTTLED_STATUS
+    )
+
+
+def retry_after_ms(error):
+    """Server-suggested wait of a throttled response, in milliseconds (0 if absent)."""
+    headers = getattr(error, "headers", None) or {}
+    try:
+        return float(headers.get(RETRY_AFTER_HEADER, 0) or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class AdaptiveConcurrencyLimiter:
+    """Thread-safe AIMD limit on concurrent DB operations."""
+
+    def __init__(
+        self,
+        initial=COSMOS_MAX_CONCURRENCY,
+        minimum=COSMOS_MIN_CONCURRENCY,
+        maximum=COSMOS_MAX_CONCURRENCY,
+        cooldown=DECREASE_COOLDOWN_SECONDS,
+    ):
+        self._cond = threading.Condition()
+        self.minimum = minimum
+        self.maximum = maximum
+        self.cooldown = cooldown
+        self.limit = float(initial)
+        self.in_flight = 0
+        self.throttled = 0
+        self.rejected = 0
+        self._last_decrease = 0.0
+
+    def acquire(self, timeout):
+        """Wait for a slot; False if none frees up within timeout seconds."""
+        deadline = time.monotonic() + max(timeout, 0)
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.rejected += 1
+                    return False
+                self._cond.wait(remaining)
+            self.in_flight += 1
+            return True
+
+    def release(self, throttled=False):
+        with self._cond:
+            self.in_flight -= 1
+            if throttled:
+                self.throttled += 1
+                now = time.monotonic()
+                if now - self._last_decrease >= self.cooldown:
+                    self.limit = max(self.minimum, self.limit / 2)
+                    self._last_decrease = now
+            else:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+    def snapshot(self):
+        with self._cond:
+            return {
+                "limit": int(self.limit),
+                "in_flight": self.in_flight,
+                "throttled": self.throttled,
+                "rejected": self.rejected,
+            }
+
+
+limiter = AdaptiveConcurrencyLimiter()
+
+
+def _on_event_loop():
+    """True when the current thread is running an asyncio event loop."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def call_with_retry(
+    operation, deadline_seconds=None, limiter=limiter, sleep=time.sleep
+):
+    """
+    Run operation() inside a limiter slot, retrying 429 responses until the
+    deadline. Other errors propagate unchanged.
+    """
+    if deadline_seconds is None:
+        deadline_seconds = COSMOS_RETRY_DEADLINE_SECONDS
+    deadline = time.monotonic() + deadline_seconds
+    attempt = 0
+    # 이벤트 루프 스레드에서는 잠들면 모든 요청이 멈추므로 기다리지 않음
+    may_wait = not _on_event_loop()
+
+    while True:
+        timeout = deadline - time.monotonic() if may_wait else 0
+        if not limiter.acquire(timeout=timeout):
+            raise CosmosThrottledError(COSMOS_RETRY_BASE_DELAY_MS / 1000)
+
+        error = None
+        try:
+            return operation()
+        except exceptions.CosmosHttpResponseError as e:
+            if not is_throttled(e):
+                raise
+            error = e
+        finally:
+            limiter.release(throttled=error is not None)
+
+        attempt += 1
+        backoff_ms = COSMOS_RETRY_BASE_DELAY_MS * 2 ** (attempt - 1)
+        wait = max(retry_after_ms(error), backoff_ms) / 1000
+        # 지터는 더하기만 함: retry-after 보다 먼저 재시도하지 않음
+        wait += random.uniform(0, wait / 2)
+        if not may_wait or time.monotonic() + wait > deadline:
+            raise CosmosThrottledError(wait) from error
+        sleep(wait)
+
+
+class RetryingQuery:
+    """
+    Stand-in for the SDK's ItemPaged whose page fetches go through
+    call_with_retry. A throttled page is re-requested from the last
+    continuation token, so iteration never restarts from the beginning.
+    """
+
+    def __init__(self, start):
+        self._start = start  # () -> ItemPaged
+
+    def by_page(self, continuation_token=None):
+        return _RetryingPages(self._start, continuation_token)
+
+    def __iter__(self):
+        for page in self.by_page():
+            yield from page
+
+
+class _RetryingPages:
+    def __init__(self, start, continuation_token):
+        self._start = start
+        self._pages = None
+        self.continuation_token = continuation_token
+
+    def __iter__(self):
+        return self
+
+    def _fetch(self):
+        if self._pages is None:
+            self._pages = self._start().by_page(self.continuation_token)
+        try:
+            return list(next(self._pages))
+        except exceptions.CosmosHttpResponseError:
+            self._pages = None
+            raise
+
+    def __next__(self):
+        page = call_with_retry(self._fetch)
+        self.continuation_token = self._pages.continuation_token
+        return iter(page)
@@ -1,20 +1,47 @@
 import re
 import json
 import uuid
+import asyncio
+import math
 
 import os
 import base64
 from openai import AzureOpenAI
 
-from fastapi import FastAPI, Depends, HTTPException, Body
+from fastapi import FastAPI, Depends, HTTPException, Body, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from typing import List, Dict, Any, Optional
 from app.routers import api, auth, artists, fan_preferences, users
-from app.db.database import init_db, get_collection
+from app.db.change_feed import CHANGE_FEED_ENABLED
+from app.db.database import close_db, init_db, get_collection, db_service
+from app.db.ledger import SAVINGS_ENTRY_TYPE
+from app.db import identity_map
+from app.db.identity_map import identity_map_stats
+from app.db import profiler
+from app.db import metrics
+from app.db.metrics import begin_request, db_metrics, end_request
+from app.db.profiler import profile_llm
+from app.db.throttling import CosmosThrottledError
+from app.db.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    InvalidContinuationToken,
+    query_page,
+)
 import datetime
 import random
-from app.services.auth import get_current_user
+from app.services.auth import (
+    get_current_claims,
+    get_current_user,
+    login_guard,
+    password_hasher,
+)
+from app.services.login_guard import LoginThrottledError
+from app.services.password_hashing import PasswordHashingBusyError
+from app.services.maintenance import start_background_jobs
+from app.services.summary import add_savings, get_summary, record_cost
 
 endpoint = os.getenv("ENDPOINT_URL", "https://room4-open-ai.openai.azure.com/")
 deployment = os.getenv("DEPLOYMENT_NAME", "gpt-4o")
@@ -43,10 +70,100 @@ app.add_middleware(
 )
 
 
+@app.middleware("http")
+async def db_cost_middleware(request: Request, call_next):
+    """
+    Attribute the RU charge and latency of DB calls to the matched route and
+    give the request its identity map (repeated reads are served from it).
+    """
+    cost, token = begin_request()
+    documents, documents_token = identity_map.begin_request()
+    try:
+        response = await call_next(request)
+    finally:
+        identity_map.end_request(documents_token)
+        end_request(token)
+
+    route = getattr(request.scope.get("route"), "path", "<unmatched>")
+    db_metrics.record_request(route, cost)
+    identity_map_stats.record_request(route, documents)
+    if db_metrics.server_timing:
+        response.headers["Server-Timing"] = cost.server_timing()
+    return response
+
+
+@app.middleware("http")
+async def request_profiler_middleware(request: Request, call_next):
+    """
+    Development profiler (REQUEST_PROFILER_ENABLED): DB and LLM calls of the
+    request and suspicious patterns, in the X-Request-Profile header and the log.
+    """
+    if not profiler.REQUEST_PROFILER_ENABLED:
+        return await call_next(request)
+
+    profile, token = profiler.begin_request()
+    try:
+        response = await call_next(request)
+    finally:
+        profiler.end_request(token)
+
+    route = getattr(request.scope.get("route"), "path", "<unmatched>")
+    report = profile.report()
+    profiler.log_report(request.method, route, report)
+    response.headers[profiler.PROFILE_HEADER] = profiler.header_value(report)
+    return response
+
+
+@app.exception_handler(CosmosThrottledError)
+async def cosmos_throttled_handler(request: Request, exc: CosmosThrottledError):
+    """Sustained Cosmos DB throttling is a temporary condition: 503 + Retry-After."""
+    return JSONResponse(
+        status_code=503,
+        content={
+            "detail": "データベースが混雑しています。しばらくしてから再度お試しください。"
+        },
+        headers={"Retry-After": str(max(1, math.ceil(exc.retry_after_seconds)))},
+    )
+
+
+@app.exception_handler(PasswordHashingBusyError)
+async def password_hashing_busy_handler(request: Request, exc: PasswordHashingBusyError):
+    """Too many logins/registrations queued for password hashing: 503 + Retry-After."""
+    return JSONResponse(
+        status_code=503,
+        content={
+            "detail": "ログインが混雑しています。しばらくしてから再度お試しください。"
+        },
+        headers={"Retry-After": str(max(1, math.ceil(exc.retry_after_seconds)))},
+    )
+
+
+@app.exception_handler(LoginThrottledError)
+async def login_throttled_handler(request: Request, exc: LoginThrottledError):
+    """Too many failed logins for this email or client: 429 + Retry-After."""
+    return JSONResponse(
+        status_code=429,
+        content={
+            "detail": "ログインの試行回数が多すぎます。しばらくしてから再度お試しください。"
+        },
+        headers={"Retry-After": str(max(1, math.ceil(exc.retry_after_seconds)))},
+    )
+
+
 # Initialize database
 @app.on_event("startup")
 async def startup_db_client():
-    init_db()
+    # 컨테이너 조회는 병렬로, 제한 시간 안에서만 수행 (생성은 app.db.migrate 에서)
+    await asyncio.to_thread(init_db)
+    app.state.background_jobs = start_background_jobs()
+
+
+@app.on_event("shutdown")
+async def shutdown_background_jobs():
+    for task in getattr(app.state, "background_jobs", []):
+        task.cancel()
+    password_hasher.shutdown()
+    await asyncio.to_thread(close_db)
 
 
 # Include routers
@@ -67,6 +184,42 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/health/ready")
+def readiness_check(response: Response):
+    """Readiness probe: 503 until every known container has been resolved."""
+    # 동기 함수: 아직 준비되지 않은 컨테이너의 재조회가 이벤트 루프를 막지 않도록
+    state = db_service.readiness()
+    if not state["ready"]:
+        response.status_code = 503
+    return state
+
+
+def require_metrics_endpoints():
+    """Hide the internal metrics endpoints unless METRICS_ENDPOINTS_ENABLED is set."""
+    if not metrics.METRICS_ENDPOINTS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+
+
+@app.get("/metrics/db", dependencies=[Depends(require_metrics_endpoints)])
+async def db_metrics_report(top: int = Query(20, ge=1, le=200)):
+    """
+    Per-route RU/latency histograms, the most expensive query shapes, cache
+    hit rates and reads repeated within one request (identity map).
+    """
+    return {
+        **db_metrics.snapshot(top=top),
+        "artist_cache": db_service.artist_cache.stats(),
+        "principal_cache": db_service.principal_cache.stats(),
+        "identity_map": identity_map_stats.snapshot(),
+    }
+
+
+@app.get("/metrics/auth", dependencies=[Depends(require_metrics_endpoints)])
+async def auth_metrics_report():
+    """Password hashing pool (queue depth, rejections, latency) and login guard counters."""
+    return {"password_hashing": password_hasher.stats(), "login_guard": login_guard.stats()}
+
+
 @app.get("/api/test")
 async def test_endpoint():
     """Simple test endpoint to verify API connectivity"""
@@ -91,7 +244,7 @@ class CostRequestModel(BaseModel):
 # 여러 이벤트의 비용을 계산하는 API
 @app.post("/api/events/multiple-costs")
 async def calculate_multiple_events_cost(
-    request: CostRequestModel, current_user: dict = Depends(get_current_user)
+    request: CostRequestModel, current_user: dict = Depends(get_current_claims)
 ):
     """
     여러 이벤트의 예상 비용을 계산합니다.
@@ -116,10 +269,12 @@ async def calculate_multiple_events_cost(
         }
 
         # OpenAI 클라이언트 초기화
-        client = AzureOpenAI(
-            azure_endpoint=endpoint,
-            api_key=subscription_key,
-            api_version="2024-05-01-preview",
+        client = profile_llm(
+            AzureOpenAI(
+                azure_endpoint=endpoint,
+                api_key=subscription_key,
+                api_version="2024-05-01-preview",
+            )
         )
 
         # 이벤트 항목별 비용 예측을 위한 배치 처리
@@ -484,6 +639,8 @@ async def calculate_multiple_events_cost(
 
         return result
 
+    except CosmosThrottledError:
+        raise
     except Exception as e:
         import traceback
 
@@ -533,8 +690,11 @@ async def save_cost_data(
             AND c.saved_at > '{one_hour_ago}'
             """
 
-            existing_items = list(
-                collection.query_items(query=query, enable_cross_partition_query=True)
+            # SDK 호출은 블로킹이므로 이벤트 루프 밖에서 실행
+            existing_items = await asyncio.to_thread(
+                lambda: list(
+                    collection.query_items(query=query, enable_cross_partition_query=True)
+                )
             )
 
             if existing_items:
@@ -568,63 +728,47 @@ async def save_cost_data(
 
         # DB에 저장
         if collection:
-            collection.create_item(save_data)
+            await asyncio.to_thread(collection.create_item, save_data)
             print(f"Cost data saved to database for user {user_id}")
+            if CHANGE_FEED_ENABLED:
+                # 요약과 사용자 합계는 변경 피드 프로젝션이 비동기로 갱신
+                return {"message": "費用データが正常に保存されました", "id": save_data["id"]}
+            # 사용자 요약 문서 갱신
+            await record_cost(user_id, save_data)
         else:
             print("No collection available, using mock mode")
 
-        # 사용자 정보에 총 예상 비용과 저금액 업데이트
+        # 사용자 정보에 총 예상 비용 업데이트 (원자적 증가, 읽기 없이 한 번의 패치)
         try:
             # 총 예상 비용 가져오기
             total_estimated = cost_data.get("total_estimated", 0)
             # 명시적 형변환 없이 원본 값 유지
 
-            # 사용자 컬렉션 가져오기
-            users_collection = await get_collection("users")
-            if users_collection:
-                # 사용자 문서 쿼리
-                query = f"SELECT * FROM c WHERE c.userId = '{user_id}'"
-                user_items = list(
-                    users_collection.query_items(
-                        query=query, enable_cross_partition_query=True
-                    )
-                )
-
-                if user_items:
-                    user_doc = user_items[0]
-
-                    # 현재 예상 비용 가져오기
-                    current_total = user_doc.get("total_estimated_expenses", 0)
-                    # 명시적 형변환 없이 원본 합계 계산
-                    new_total = current_total + total_estimated
-
-                    # 사용자 문서 업데이트
-                    user_doc["total_estimated_expenses"] = new_total
-
-                    # 저금액이 없는 경우 초기화
-                    if "current_savings" not in user_doc:
-                        user_doc["current_savings"] = 0
-
-                    # 월별 저금 제안 추가 (계산된 경우)
-                    if "monthly_savings_suggestion" in cost_data:
-                        user_doc["monthly_savings_suggestion"] = cost_data[
-                            "monthly_savings_suggestion"
-                        ]
+            # 월별 저금 제안 추가 (계산된 경우)
+            set_fields = {}
+            if "monthly_savings_suggestion" in cost_data:
+                set_fields["monthly_savings_suggestion"] = cost_data[
+                    "monthly_savings_suggestion"
+                ]
 
-                    # 사용자 문서 업데이트
-                    users_collection.replace_item(user_doc["id"], user_doc)
-                    print(
-                        f"Updated user {user_id} with total expenses: {new_total} and monthly savings: {user_doc.get('monthly_savings_suggestion')}"
-                    )
-                else:
-                    print(f"User {user_id} not found in users collection")
+            user_doc = await db_service.increment_user_fields(
+                user_id, {"total_estimated_expenses": total_estimated}, set_fields
+            )
+            if user_doc:
+                print(
+                    f"Updated user {user_id} with total expenses: {user_doc.get('total_estimated_expenses')} and monthly savings: {user_doc.get('monthly_savings_suggestion')}"
+                )
             else:
-                print("Users collection not available")
+                print(f"User {user_id} not found in users collection")
+        except CosmosThrottledError:
+            raise
         except Exception as user_update_error:
             print(f"Error updating user info: {str(user_update_error)}")
 
         return {"message": "費用データが正常に保存されました", "id": save_data["id"]}
 
+    except CosmosThrottledError:
+        raise
     except Exception as e:
         import traceback
 
@@ -637,7 +781,7 @@ async def save_cost_data(
 
 # Add your API routes here
 @app.get("/api/events/upcoming")
-async def get_events_upcoming(current_user: dict = Depends(get_current_user)):
+async def get_events_upcoming(current_user: dict = Depends(get_current_claims)):
     """
     Get upcoming events prediction based on user preferences.
     This endpoint requires authentication and uses the user's artist preferences
@@ -656,10 +800,12 @@ async def get_events_upcoming(current_user: dict = Depends(get_current_user)):
             }
 
         # Initialize Azure OpenAI client
-        client = AzureOpenAI(
-            azure_endpoint=endpoint,
-            api_key=subscription_key,
-            api_version="2024-05-01-preview",
+        client = profile_llm(
+            AzureOpenAI(
+                azure_endpoint=endpoint,
+                api_key=subscription_key,
+                api_version="2024-05-01-preview",
+            )
         )
 
         # Prepare results for all preferred artists
@@ -914,6 +1060,8 @@ async def get_events_upcoming(current_user: dict = Depends(get_current_user)):
             "predictions": all_predictions,
         }
 
+    except CosmosThrottledError:
+        raise
     except Exception as e:
         import traceback
 
@@ -925,10 +1073,12 @@ async def get_events_upcoming(current_user: dict = Depends(get_current_user)):
 @app.get("/events/upcoming")
 async def get_events_upcoming_legacy():
     # キーベースの認証を使用して Azure OpenAI Service クライアントを初期化する
-    client = AzureOpenAI(
-        azure_endpoint=endpoint,
-        api_key=subscription_key,
-        api_version="2024-05-01-preview",
+    client = profile_llm(
+        AzureOpenAI(
+            azure_endpoint=endpoint,
+            api_key=subscription_key,
+            api_version="2024-05-01-preview",
+        )
     )
 
     # IMAGE_PATH = "YOUR_IMAGE_PATH"
@@ -1018,10 +1168,15 @@ async def get_events_upcoming_legacy():
 
 # 사용자의 이벤트 비용 데이터를 가져오는 API
 @app.get("/api/events/user-costs")
-async def get_user_event_costs(current_user: dict = Depends(get_current_user)):
+async def get_user_event_costs(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    continuation: Optional[str] = None,
+    current_user: dict = Depends(get_current_claims),
+):
     """
     사용자의 저장된 이벤트 비용 데이터를 가져옵니다.
-    최신 데이터를 우선적으로 가져옵니다.
+    최신 데이터를 우선적으로 가져오며, limit 단위로 페이지를 나눠 반환합니다.
+    다음 페이지는 응답의 continuation 값을 그대로 전달해 가져옵니다.
     """
     try:
         # 사용자 ID 가져오기
@@ -1032,42 +1187,32 @@ async def get_user_event_costs(current_user: dict = Depends(get_current_user)):
         if not collection:
             return {"message": "데이터를 가져올 수 없습니다.", "costs": []}
 
-        # 사용자 ID로 비용 데이터 쿼리
-        query = (
-            f"SELECT * FROM c WHERE c.user_id = '{user_id}' ORDER BY c.saved_at DESC"
-        )
-        cost_items = list(
-            collection.query_items(query=query, enable_cross_partition_query=True)
-        )
-
-        print(f"cost_items: {cost_items}")
-
-        # 총 예상 비용 합계 계산
-        total_estimated = sum(
-            item.get("total_estimated", 0)
-            for item in cost_items
-            if "total_estimated" in item
+        # 사용자 ID로 비용 데이터 쿼리 (한 페이지만)
+        query = "SELECT * FROM c WHERE c.user_id = @user_id ORDER BY c.saved_at DESC"
+        cost_items, next_continuation = await asyncio.to_thread(
+            query_page,
+            collection,
+            query,
+            parameters=[{"name": "@user_id", "value": user_id}],
+            limit=limit,
+            continuation=continuation,
         )
 
-        # 사용자의 현재 저금액 가져오기
-        users_collection = await get_collection("users")
-        if users_collection:
-            query = f"SELECT c.current_savings FROM c WHERE c.userId = '{user_id}'"
-            user_items = list(
-                users_collection.query_items(
-                    query=query, enable_cross_partition_query=True
-                )
-            )
-            if user_items and len(user_items) > 0:
-                current_savings = user_items[0].get("current_savings", 0)
+        # 합계는 요약 문서에서 한 번의 포인트 읽기로 가져옴 (전체 이력 재계산 없음)
+        summary = await get_summary(user_id)
 
         return {
             "costs": cost_items,
-            "total_estimated": total_estimated,
-            "total_savings": current_savings,
+            "total_estimated": summary["total_estimated"],
+            "total_savings": summary["total_savings"],
             "count": len(cost_items),
+            "continuation": next_continuation,
         }
 
+    except InvalidContinuationToken as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except CosmosThrottledError:
+        raise
     except Exception as e:
         import traceback
 
@@ -1120,55 +1265,21 @@ async def add_user_savings(
             "saved_at": saved_at,
         }
 
-        # 저금 이력 저장
-        savings_collection = await get_collection("savings_history")
-        if savings_collection:
-            savings_collection.create_item(savings_history_item)
-            print(f"Savings history saved: {amount} yen for user {user_id}")
-        else:
-            print("No savings_history collection available")
-
-        # 사용자 정보 업데이트 (current_savings 증가)
-        users_collection = await get_collection("users")
-        if users_collection:
-            # 사용자 문서 쿼리
-            query = f"SELECT * FROM c WHERE c.userId = '{user_id}'"
-            user_items = list(
-                users_collection.query_items(
-                    query=query, enable_cross_partition_query=True
-                )
-            )
-
-            if user_items:
-                user_doc = user_items[0]
-
-                # 현재 저금액 가져오기
-                current_savings = user_doc.get("current_savings", 0)
-
-                # 저금액 추가
-                new_savings = current_savings + amount
-
-                # 사용자 문서 업데이트
-                user_doc["current_savings"] = new_savings
-
-                # 사용자 문서 업데이트
-                users_collection.replace_item(user_doc["id"], user_doc)
-                print(f"Updated user {user_id} savings to {new_savings}")
+        # 저금 이력 저장과 잔액(요약 문서) 갱신을 하나의 트랜잭션으로 처리
+        summary = await add_savings(user_id, savings_history_item)
+        new_savings = summary["total_savings"]
+        print(f"Savings history saved: {amount} yen, user {user_id} savings {new_savings}")
 
-                return {
-                    "message": "貯金が正常に追加されました",
-                    "current_savings": new_savings,
-                    "added_amount": amount,
-                }
-            else:
-                raise HTTPException(status_code=404, detail="ユーザーが見つかりません")
-        else:
-            raise HTTPException(
-                status_code=500, detail="ユーザーコレクションにアクセスできません"
-            )
+        return {
+            "message": "貯金が正常に追加されました",
+            "current_savings": new_savings,
+            "added_amount": amount,
+        }
 
     except HTTPException:
         raise
+    except CosmosThrottledError:
+        raise
     except Exception as e:
         import traceback
 
@@ -1181,54 +1292,57 @@ async def add_user_savings(
 
 # 사용자 저금 이력 가져오기 API
 @app.get("/api/savings/history")
-async def get_savings_history(current_user: dict = Depends(get_current_user)):
+async def get_savings_history(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    continuation: Optional[str] = None,
+    current_user: dict = Depends(get_current_claims),
+):
     """
     사용자의 저금 이력을 가져옵니다.
+    최신 순으로 limit 단위의 페이지를 반환하며, continuation 값으로 다음 페이지를 가져옵니다.
     """
     try:
         # 사용자 ID 가져오기
         user_id = current_user.get("userId")
 
-        # DB에서 사용자 저금 이력 가져오기
-        collection = await get_collection("savings_history")
+        # DB에서 사용자 저금 이력 가져오기 (사용자 원장 파티션)
+        collection = await get_collection("user_ledger")
         if not collection:
             return {"message": "データを取得できません", "history": [], "total": 0}
 
-        # 사용자 ID로 저금 이력 쿼리 (최신 순으로 정렬)
+        # 사용자 ID로 저금 이력 쿼리 (최신 순으로 정렬, 한 페이지만)
         query = (
-            f"SELECT * FROM c WHERE c.user_id = '{user_id}' ORDER BY c.saved_at DESC"
-        )
-        history_items = list(
-            collection.query_items(query=query, enable_cross_partition_query=True)
+            "SELECT * FROM c WHERE c.user_id = @user_id AND c.type = @type "
+            "ORDER BY c.saved_at DESC"
         )
-
-        # 총 저금액 계산
-        total_savings = sum(
-            item.get("amount", 0) for item in history_items if "amount" in item
+        history_items, next_continuation = await asyncio.to_thread(
+            query_page,
+            collection,
+            query,
+            parameters=[
+                {"name": "@user_id", "value": user_id},
+                {"name": "@type", "value": SAVINGS_ENTRY_TYPE},
+            ],
+            limit=limit,
+            continuation=continuation,
+            partition_key=user_id,
         )
 
-        # 현재 저금액 확인 (사용자 문서에서)
-        users_collection = await get_collection("users")
-        current_savings = 0
-
-        if users_collection:
-            query = f"SELECT c.current_savings FROM c WHERE c.userId = '{user_id}'"
-            user_items = list(
-                users_collection.query_items(
-                    query=query, enable_cross_partition_query=True
-                )
-            )
-
-            if user_items and "current_savings" in user_items[0]:
-                current_savings = user_items[0]["current_savings"]
+        # 총 저금액은 요약 문서에서 한 번의 포인트 읽기로 가져옴
+        summary = await get_summary(user_id)
 
         return {
             "history": history_items,
-            "total": total_savings,
-            "current_savings": current_savings,
+            "total": summary["total_savings"],
+            "current_savings": summary["total_savings"],
             "count": len(history_items),
+            "continuation": next_continuation,
         }
 
+    except InvalidContinuationToken as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except CosmosThrottledError:
+        raise
     except Exception as e:
         import traceback
 
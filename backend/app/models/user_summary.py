@@ -0,0 +1,44 @@
+from pydantic import BaseModel, Field
+from typing import Dict, Optional, Union
+from datetime import datetime
+
+
+class MonthlySummary(BaseModel):
+    estimated: Union[int, float] = 0
+    cost_count: int = 0
+    savings: Union[int, float] = 0
+    savings_count: int = 0
+
+
+class UserSummary(BaseModel):
+    user_id: str
+    total_estimated: Union[int, float] = 0
+    cost_count: int = 0
+    last_cost_saved_at: Optional[str] = None
+    total_savings: Union[int, float] = 0
+    savings_count: int = 0
+    last_saved_at: Optional[str] = None
+    monthly: Dict[str, MonthlySummary] = {}
+    updatedAt: datetime = Field(default_factory=datetime.utcnow)
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "user_id": "550e8400-e29b-41d4-a716-446655440000",
+                "total_estimated": 150000,
+                "cost_count": 2,
+                "last_cost_saved_at": "2024-05-01T12:00:00",
+                "total_savings": 30000,
+                "savings_count": 3,
+                "last_saved_at": "2024-05-03T09:30:00",
+                "monthly": {
+                    "2024-05": {
+                        "estimated": 150000,
+                        "cost_count": 2,
+                        "savings": 30000,
+                        "savings_count": 3,
+                    }
+                },
+                "updatedAt": "2024-05-03T09:30:00Z",
+            }
+        }
@@ -54,10 +54,7 @@ async def update_artist(
             status_code=status.HTTP_404_NOT_FOUND, detail="Artist not found"
         )
 
-    # Update artist data
+    # Save only the changed fields; the backend applies them to the artist
+    # loaded above (app.db.identity_map) instead of reading it again
     update_data = artist_data.dict(exclude_unset=True)
-    for key, value in update_data.items():
-        existing_artist[key] = value
-
-    # Save updated artist to database
-    return await db_service.update_artist(artist_id, existing_artist)
+    return await db_service.update_artist(artist_id, update_data)
@@ -1,15 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordRequestForm
 from datetime import timedelta
 import logging
 import traceback
+from app.db.database import db_service
+from app.db.throttling import CosmosThrottledError
+from app.services.login_guard import LoginThrottledError, client_ip
+from app.services.password_hashing import PasswordHashingBusyError
+from app.services.refresh_tokens import (
+    InvalidRefreshToken,
+    issue_refresh_token,
+    revoke_refresh_token,
+    rotate_refresh_token,
+)
 from app.models.user import User, UserCreate, UserUpdate, UserLogin
 from app.services.auth import (
     authenticate_user,
     create_access_token,
+    create_user_access_token,
     get_current_user,
     register_user,
     Token,
+    ACCESS_TOKEN_CLAIMS,
     ACCESS_TOKEN_EXPIRE_MINUTES,
     update_user_info,
 )
@@ -34,6 +46,10 @@ class UserAdditionalInfo(BaseModel):
     preferred_artists: List[str]  # 아티스트 ID 목록
 
 
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+
 @router.post("/register", response_model=dict)
 async def create_user(user_data: UserCreate):
     """Register a new user."""
@@ -43,14 +59,21 @@ async def create_user(user_data: UserCreate):
 
         # Generate token for the newly registered user
         access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-        access_token = create_access_token(
-            data={"sub": user["userId"]}, expires_delta=access_token_expires
-        )
+        access_token = create_user_access_token(user, access_token_expires)
+
+        refresh_token = await issue_refresh_token(user["userId"])
 
         logger.info(f"회원가입 성공 및 토큰 발급: {user_data.email}")
 
         # Return user data and token
-        return {**user, "access_token": access_token, "token_type": "bearer"}
+        return {
+            **user,
+            "access_token": access_token,
+            "token_type": "bearer",
+            "refresh_token": refresh_token,
+        }
+    except (CosmosThrottledError, PasswordHashingBusyError, LoginThrottledError):
+        raise
     except Exception as e:
         error_msg = f"회원가입 처리 중 오류 발생: {str(e)}"
         logger.error(error_msg)
@@ -93,6 +116,8 @@ async def update_user_additional_info(
 
         logger.info(f"사용자 추가 정보 업데이트 성공: {current_user['email']}")
         return updated_user
+    except (CosmosThrottledError, PasswordHashingBusyError, LoginThrottledError):
+        raise
     except Exception as e:
         error_msg = f"사용자 추가 정보 업데이트 중 오류 발생: {str(e)}"
         logger.error(error_msg)
@@ -103,11 +128,15 @@ async def update_user_additional_info(
 
 
 @router.post("/token", response_model=Token)
-async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends()):
+async def login_for_access_token(
+    request: Request, form_data: OAuth2PasswordRequestForm = Depends()
+):
     """Get an access token for authentication."""
     try:
         logger.info(f"토큰 인증 시도: {form_data.username}")
-        user = await authenticate_user(form_data.username, form_data.password)
+        user = await authenticate_user(
+            form_data.username, form_data.password, client_ip(request)
+        )
         if not user:
             logger.warning(f"인증 실패: {form_data.username} - 잘못된 인증 정보")
             raise HTTPException(
@@ -116,13 +145,18 @@ async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(
                 headers={"WWW-Authenticate": "Bearer"},
             )
         access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-        access_token = create_access_token(
-            data={"sub": user["userId"]}, expires_delta=access_token_expires
-        )
+        access_token = create_user_access_token(user, access_token_expires)
+        refresh_token = await issue_refresh_token(user["userId"])
         logger.info(f"토큰 발급 성공: {form_data.username}")
-        return {"access_token": access_token, "token_type": "bearer"}
+        return {
+            "access_token": access_token,
+            "token_type": "bearer",
+            "refresh_token": refresh_token,
+        }
     except HTTPException:
         raise
+    except (CosmosThrottledError, PasswordHashingBusyError, LoginThrottledError):
+        raise
     except Exception as e:
         error_msg = f"토큰 인증 처리 중 오류 발생: {str(e)}"
         logger.error(error_msg)
@@ -133,11 +167,13 @@ async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(
 
 
 @router.post("/login", response_model=Token)
-async def login(user_data: UserLogin):
+async def login(user_data: UserLogin, request: Request):
     """Login and get an access token."""
     try:
         logger.info(f"로그인 시도: {user_data.email}")
-        user = await authenticate_user(user_data.email, user_data.password)
+        user = await authenticate_user(
+            user_data.email, user_data.password, client_ip(request)
+        )
         if not user:
             logger.warning(f"로그인 실패: {user_data.email} - 잘못된 인증 정보")
             raise HTTPException(
@@ -146,9 +182,7 @@ async def login(user_data: UserLogin):
                 headers={"WWW-Authenticate": "Bearer"},
             )
         access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-        access_token = create_access_token(
-            data={"sub": user["userId"]}, expires_delta=access_token_expires
-        )
+        access_token = create_user_access_token(user, access_token_expires)
 
         # Remove password from response
         if "password" in user:
@@ -157,10 +191,19 @@ async def login(user_data: UserLogin):
         else:
             user_copy = user
 
+        refresh_token = await issue_refresh_token(user["userId"])
+
         logger.info(f"로그인 성공: {user_data.email}")
-        return {"access_token": access_token, "token_type": "bearer", "user": user_copy}
+        return {
+            "access_token": access_token,
+            "token_type": "bearer",
+            "refresh_token": refresh_token,
+            "user": user_copy,
+        }
     except HTTPException:
         raise
+    except (CosmosThrottledError, PasswordHashingBusyError, LoginThrottledError):
+        raise
     except Exception as e:
         error_msg = f"로그인 처리 중 오류 발생: {str(e)}"
         logger.error(error_msg)
@@ -170,6 +213,55 @@ async def login(user_data: UserLogin):
         )
 
 
+@router.post("/refresh", response_model=Token)
+async def refresh_access_token(request: RefreshRequest):
+    """
+    Trade a refresh token for a new access token and a rotated refresh token.
+    No password check and no user lookup: a signature check and one point read.
+    """
+    try:
+        user_id, refresh_token = await rotate_refresh_token(request.refresh_token)
+    except InvalidRefreshToken as e:
+        logger.warning(f"토큰 갱신 실패: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    if ACCESS_TOKEN_CLAIMS:
+        # 클레임은 최신 사용자 문서에서 다시 만듦 (프로필 변경 후 재발급 경로)
+        user = await db_service.get_principal(user_id)
+        if user is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid or expired refresh token",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        access_token = create_user_access_token(user, access_token_expires)
+    else:
+        access_token = create_access_token(
+            data={"sub": user_id}, expires_delta=access_token_expires
+        )
+    return {
+        "access_token": access_token,
+        "token_type": "bearer",
+        "refresh_token": refresh_token,
+    }
+
+
+@router.post("/logout")
+async def logout(request: RefreshRequest):
+    """Revoke a refresh token (and every token rotated from it)."""
+    try:
+        await revoke_refresh_token(request.refresh_token)
+    except InvalidRefreshToken:
+        # 이미 유효하지 않은 토큰이면 로그아웃된 것과 같음
+        pass
+    return {"message": "ログアウトしました"}
+
+
 @router.get("/me", response_model=User)
 async def read_users_me(current_user: dict = Depends(get_current_user)):
     """Get the current authenticated user."""
@@ -5,7 +5,7 @@ from app.models.fan_preference import (
     FanPreferenceCreate,
     FanPreferenceUpdate,
 )
-from app.services.auth import get_current_user
+from app.services.auth import get_current_claims, get_current_user
 from app.db.database import db_service
 
 router = APIRouter(
@@ -17,7 +17,7 @@ router = APIRouter(
 
 @router.get("/by-artist/{artist_id}", response_model=List[FanPreference])
 async def get_fan_preferences_by_artist(
-    artist_id: str, current_user: dict = Depends(get_current_user)
+    artist_id: str, current_user: dict = Depends(get_current_claims)
 ):
     """Get all fan preferences for an artist. Requires authentication."""
     return await db_service.get_fan_preferences_by_artist(artist_id)
@@ -25,7 +25,7 @@ async def get_fan_preferences_by_artist(
 
 @router.get("/by-user/{user_id}", response_model=List[FanPreference])
 async def get_fan_preferences_by_user(
-    user_id: str, current_user: dict = Depends(get_current_user)
+    user_id: str, current_user: dict = Depends(get_current_claims)
 ):
     """Get all fan preferences for a user. Requires authentication."""
     # Check if the user is requesting their own preferences
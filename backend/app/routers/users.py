@@ -1,8 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from typing import List, Optional
 from ..db.database import db_service
+from ..db.throttling import CosmosThrottledError
 from ..models.user import User, UserProfile
-from ..services.auth import get_current_user
+from ..models.user_summary import UserSummary
+from ..services.auth import get_current_claims, get_current_user
+from ..services.summary import get_summary
 
 router = APIRouter(prefix="/api/users", tags=["users"])
 
@@ -14,13 +17,12 @@ async def get_user_profile(current_user: User = Depends(get_current_user)):
     사용자 정보, 지역, 관심사, 선호 아티스트 정보를 포함합니다.
     """
     try:
-        # 사용자 ID를 통해 데이터베이스에서 정보 가져오기
-        user_id = (
-            current_user["userId"]
+        # get_current_user 가 이번 요청에서 읽은 사용자 문서를 그대로 사용
+        user_data = (
+            current_user
             if isinstance(current_user, dict)
-            else current_user.userId
+            else await db_service.get_user(current_user.userId)
         )
-        user_data = await db_service.get_user(user_id)
 
         if not user_data:
             raise HTTPException(
@@ -35,8 +37,19 @@ async def get_user_profile(current_user: User = Depends(get_current_user)):
             content_interests=user_data.get("content_interests", []),
         )
 
+    except CosmosThrottledError:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"프로필 정보를 가져오는 중 오류가 발생했습니다: {str(e)}",
         )
+
+
+@router.get("/summary", response_model=UserSummary)
+async def get_user_summary(current_user: dict = Depends(get_current_claims)):
+    """
+    현재 로그인한 사용자의 비용/저금 요약 정보를 가져옵니다.
+    누적 합계, 건수, 마지막 저장 시각, 월별 집계를 포함합니다.
+    """
+    return await get_summary(current_user["userId"])
@@ -7,8 +7,11 @@ from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from pydantic import BaseModel
-from app.db.database import db_service
+from app.db.database import CLAIM_FIELDS, CLAIMS_VERSION_FIELD, db_service
 from app.models.user import User, UserCreate
+from app.db.ledger import empty_summary
+from app.services.login_guard import create_login_guard
+from app.services.password_hashing import PasswordHasher, PasswordHashingBusyError
 import uuid
 
 # 로깅 설정
@@ -19,9 +22,15 @@ logger = logging.getLogger(__name__)
 SECRET_KEY = os.getenv("SECRET_KEY", "supersecretkey")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+# 액세스 토큰에 사용자 클레임을 담아 get_current_claims 가 DB 없이 동작하도록 (opt-in)
+ACCESS_TOKEN_CLAIMS = os.getenv("ACCESS_TOKEN_CLAIMS", "false").lower() == "true"
 
-# Password hashing
+# Password hashing (bcrypt 는 전용 스레드 풀에서 실행)
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+password_hasher = PasswordHasher(pwd_context)
+
+# 실패한 로그인 추적 (사용자 조회/bcrypt 전에 차단)
+login_guard = create_login_guard()
 
 # OAuth2 scheme
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/token")
@@ -30,6 +39,7 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/token")
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
     user: Optional[dict] = None
 
 
@@ -37,27 +47,29 @@ class TokenData(BaseModel):
     user_id: Optional[str] = None
 
 
-def verify_password(plain_password, hashed_password):
-    """Verify a password against a hash."""
+async def verify_password(plain_password, hashed_password):
+    """Verify a password against a hash (raises PasswordHashingBusyError when saturated)."""
     logger.debug(f"비밀번호 검증 시도")
     if not hashed_password:
         logger.warning("저장된 비밀번호가 없습니다")
         return False
 
     try:
-        result = pwd_context.verify(plain_password, hashed_password)
+        result = await password_hasher.verify(plain_password, hashed_password)
         logger.debug(f"비밀번호 검증 결과: {result}")
         return result
+    except PasswordHashingBusyError:
+        raise
     except Exception as e:
         logger.error(f"비밀번호 검증 중 오류 발생: {str(e)}")
         return False
 
 
-def get_password_hash(password):
-    """Hash a password."""
+async def get_password_hash(password):
+    """Hash a password (raises PasswordHashingBusyError when saturated)."""
     logger.debug("비밀번호 해싱 시도")
     try:
-        hashed = pwd_context.hash(password)
+        hashed = await password_hasher.hash(password)
         logger.debug("비밀번호 해싱 성공")
         return hashed
     except Exception as e:
@@ -65,8 +77,21 @@ def get_password_hash(password):
         raise
 
 
-async def authenticate_user(email: str, password: str):
-    """Authenticate a user by email and password."""
+async def authenticate_user(email: str, password: str, client_ip: Optional[str] = None):
+    """
+    Authenticate a user by email and password.
+    Raises LoginThrottledError before any lookup while the email or client is throttled.
+    """
+    await login_guard.check(email, client_ip)
+    user = await _verify_credentials(email, password)
+    if user:
+        await login_guard.record_success(email, client_ip)
+    else:
+        await login_guard.record_failure(email, client_ip)
+    return user
+
+
+async def _verify_credentials(email: str, password: str):
     logger.info(f"사용자 인증 시도: {email}")
     try:
         # In a real application, you would query the database by email
@@ -87,7 +112,7 @@ async def authenticate_user(email: str, password: str):
             logger.error(f"사용자 {email}의 비밀번호 필드가 없습니다")
             return False
 
-        if not verify_password(password, user.get("password")):
+        if not await verify_password(password, user.get("password")):
             logger.warning(f"비밀번호 불일치: {email}")
             return False
 
@@ -114,28 +139,77 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 
-async def get_current_user(token: str = Depends(oauth2_scheme)):
-    """Get the current user from a JWT token."""
-    credentials_exception = HTTPException(
+def user_claims(user: dict) -> dict:
+    """The versioned snapshot of a user that claims-carrying tokens embed."""
+    claims = {field: user.get(field) for field in CLAIM_FIELDS if user.get(field) is not None}
+    claims["cv"] = user.get(CLAIMS_VERSION_FIELD, 0)
+    return claims
+
+
+def create_user_access_token(user: dict, expires_delta: Optional[timedelta] = None):
+    """Access token for a user, carrying its claims when ACCESS_TOKEN_CLAIMS is on."""
+    data = {"sub": user["userId"]}
+    if ACCESS_TOKEN_CLAIMS:
+        data["claims"] = user_claims(user)
+        db_service.claims_versions.observe(user["userId"], data["claims"]["cv"])
+    return create_access_token(data, expires_delta)
+
+
+def _credentials_exception(detail="Could not validate credentials"):
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
+        detail=detail,
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+
+def _decode_access_token(token: str) -> dict:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
-        token_data = TokenData(user_id=user_id)
     except JWTError:
-        raise credentials_exception
+        raise _credentials_exception()
+    # 리프레시 토큰은 /api/auth/refresh 에서만 사용
+    if payload.get("sub") is None or payload.get("type", "access") != "access":
+        raise _credentials_exception()
+    return payload
+
+
+async def get_current_user(token: str = Depends(oauth2_scheme)):
+    """Get the current user from a JWT token."""
+    token_data = TokenData(user_id=_decode_access_token(token)["sub"])
 
-    user = await db_service.get_user(token_data.user_id)
+    # 메모리 조회 (짧은 TTL 의 principal 캐시, 사용자 수정 시 무효화)
+    user = await db_service.get_principal(token_data.user_id)
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
     return user
 
 
+async def get_current_claims(token: str = Depends(oauth2_scheme)):
+    """
+    Identity for endpoints that only need userId, area, content_interests and
+    preferences. Claims-carrying tokens are answered from the token alone
+    once this process knows the user's claims version (otherwise the user is
+    read first); a token issued before a profile change gets 401 so the
+    client refreshes it. Tokens without claims fall back to get_current_user.
+    """
+    payload = _decode_access_token(token)
+    user_id = payload["sub"]
+    claims = payload.get("claims")
+    if claims is None:
+        return await get_current_user(token)
+    versions = db_service.claims_versions
+    known = versions.get(user_id)
+    if known is None:
+        # 이 프로세스가 버전을 모르는 사용자 (재시작, 다른 워커에서 발급 등)
+        user = await get_current_user(token)
+        known = user.get(CLAIMS_VERSION_FIELD, 0)
+        versions.observe(user_id, known)
+    if not versions.is_current(claims.get("cv", 0), known):
+        raise _credentials_exception("Token claims are out of date; refresh the token")
+    return {**claims, "userId": user_id}
+
+
 async def register_user(user_data: UserCreate):
     """Register a new user."""
     # Skip checking for existing users due to Cosmos DB issues
@@ -147,7 +221,7 @@ async def register_user(user_data: UserCreate):
 
     # Create user object with all required fields
     user_dict = user_data.dict()
-    user_dict["password"] = get_password_hash(user_data.password)
+    user_dict["password"] = await get_password_hash(user_data.password)
     user_dict["userId"] = str(uuid.uuid4())
     user_dict["createdAt"] = datetime.utcnow()
     user_dict["updatedAt"] = datetime.utcnow()
@@ -156,6 +230,9 @@ async def register_user(user_data: UserCreate):
     # Save user to database with password field included
     created_user = await db_service.create_user(user_dict)
 
+    # Seed an empty financial summary so later writes only ever increment it
+    await db_service.upsert_user_summary(empty_summary(user_dict["userId"]))
+
     # Remove password from response
     if "password" in created_user:
         del created_user["password"]
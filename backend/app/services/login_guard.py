@@ -0,0 +1,228 @@
+"""
+Brute-force protection for password logins.
+
+Every login attempt costs a user lookup and a bcrypt verify, so a
+credential-stuffing burst is also a CPU denial of service. LoginGuard keeps
+recent failures per email and per client IP in sliding windows and rejects
+attempts before any of that work:
+- after LOGIN_GUARD_DELAY_AFTER failures for an email in the window, the
+  next attempt for it has to wait LOGIN_GUARD_BASE_DELAY_SECONDS, doubling with each further
+  failure (capped at LOGIN_GUARD_MAX_DELAY_SECONDS)
+- reaching the maximum failures in the window locks the key for
+  LOGIN_GUARD_LOCKOUT_SECONDS
+A successful login clears the email's failures (not the IP's: one address
+may try many accounts). Rejected attempts are answered with 429 and
+Retry-After and do not count as failures.
+
+The state lives in memory per worker by default. LOGIN_GUARD_STORE=database
+keeps it in the login_attempts collection instead, so all workers share it
+at the cost of one point read per attempt.
+"""
+
+import hashlib
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+
+LOGIN_ATTEMPTS_COLLECTION = "login_attempts"
+
+LOGIN_GUARD_ENABLED = os.getenv("LOGIN_GUARD_ENABLED", "true").lower() == "true"
+LOGIN_GUARD_STORE = os.getenv("LOGIN_GUARD_STORE", "memory").lower()
+LOGIN_GUARD_WINDOW_SECONDS = float(os.getenv("LOGIN_GUARD_WINDOW_SECONDS", "900"))
+LOGIN_GUARD_EMAIL_MAX_FAILURES = int(os.getenv("LOGIN_GUARD_EMAIL_MAX_FAILURES", "10"))
+LOGIN_GUARD_IP_MAX_FAILURES = int(os.getenv("LOGIN_GUARD_IP_MAX_FAILURES", "100"))
+LOGIN_GUARD_LOCKOUT_SECONDS = float(os.getenv("LOGIN_GUARD_LOCKOUT_SECONDS", "900"))
+LOGIN_GUARD_DELAY_AFTER = int(os.getenv("LOGIN_GUARD_DELAY_AFTER", "3"))
+LOGIN_GUARD_BASE_DELAY_SECONDS = float(os.getenv("LOGIN_GUARD_BASE_DELAY_SECONDS", "1"))
+LOGIN_GUARD_MAX_DELAY_SECONDS = float(os.getenv("LOGIN_GUARD_MAX_DELAY_SECONDS", "60"))
+# 프록시 뒤에서만 켤 것: 켜면 X-Forwarded-For 의 첫 주소를 클라이언트 IP 로 사용
+LOGIN_GUARD_TRUST_FORWARDED_FOR = (
+    os.getenv("LOGIN_GUARD_TRUST_FORWARDED_FOR", "false").lower() == "true"
+)
+# 메모리 저장소가 기억하는 키 수 (가장 오래 쓰지 않은 키부터 제거)
+LOGIN_GUARD_MAX_KEYS = int(os.getenv("LOGIN_GUARD_MAX_KEYS", "100000"))
+
+
+class LoginThrottledError(Exception):
+    """Too many failed logins for this email or client; surfaced as HTTP 429."""
+
+    def __init__(self, retry_after_seconds):
+        super().__init__(f"Too many failed login attempts (retry after {retry_after_seconds:.0f}s)")
+        self.retry_after_seconds = retry_after_seconds
+
+
+def client_ip(request) -> str:
+    """The client address of a request (X-Forwarded-For only when trusted)."""
+    if LOGIN_GUARD_TRUST_FORWARDED_FOR:
+        forwarded = request.headers.get("x-forwarded-for", "")
+        if forwarded.split(",")[0].strip():
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+class MemoryAttemptStore:
+    """Per-worker state: key -> {"failures": [timestamps], "lockedUntil": ts}."""
+
+    def __init__(self, max_keys=LOGIN_GUARD_MAX_KEYS):
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._states = OrderedDict()
+
+    async def read(self, key):
+        with self._lock:
+            state = self._states.get(key)
+            return dict(state) if state is not None else None
+
+    async def update(self, key, mutate):
+        with self._lock:
+            current = self._states.get(key)
+            updated = mutate(dict(current) if current is not None else None)
+            if updated is None:
+                self._states.pop(key, None)
+                return None
+            self._states[key] = updated
+            self._states.move_to_end(key)
+            while len(self._states) > self.max_keys:
+                self._states.popitem(last=False)
+            return updated
+
+
+class DatabaseAttemptStore:
+    """Shared state in the login_attempts collection (one document per key)."""
+
+    def __init__(self, db, collection_name=LOGIN_ATTEMPTS_COLLECTION):
+        self.db = db
+        self.collection_name = collection_name
+
+    @staticmethod
+    def _id(key):
+        # 이메일/IP 를 그대로 문서 ID 로 쓰지 않음
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    async def read(self, key):
+        return await self.db.read_document(self.collection_name, self._id(key))
+
+    async def update(self, key, mutate):
+        def apply(current):
+            updated = mutate(current)
+            if updated is None:
+                # 삭제 대신 비워 둠 (ttl 로 정리됨)
+                updated = {"failures": [], "lockedUntil": 0}
+            updated["ttl"] = int(LOGIN_GUARD_WINDOW_SECONDS + LOGIN_GUARD_LOCKOUT_SECONDS)
+            return updated
+
+        return await self.db.update_document(self.collection_name, self._id(key), apply)
+
+
+class LoginGuard:
+    def __init__(
+        self,
+        store=None,
+        window_seconds=LOGIN_GUARD_WINDOW_SECONDS,
+        email_max_failures=LOGIN_GUARD_EMAIL_MAX_FAILURES,
+        ip_max_failures=LOGIN_GUARD_IP_MAX_FAILURES,
+        lockout_seconds=LOGIN_GUARD_LOCKOUT_SECONDS,
+        delay_after=LOGIN_GUARD_DELAY_AFTER,
+        base_delay_seconds=LOGIN_GUARD_BASE_DELAY_SECONDS,
+        max_delay_seconds=LOGIN_GUARD_MAX_DELAY_SECONDS,
+        enabled=LOGIN_GUARD_ENABLED,
+        clock=time.time,
+    ):
+        self.store = store or MemoryAttemptStore()
+        self.window_seconds = window_seconds
+        self.email_max_failures = email_max_failures
+        self.ip_max_failures = ip_max_failures
+        self.lockout_seconds = lockout_seconds
+        self.delay_after = delay_after
+        self.base_delay_seconds = base_delay_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self.enabled = enabled
+        self._clock = clock
+        self.rejected = 0
+        self.failures = 0
+        self.lockouts = 0
+
+    def _keys(self, email, ip):
+        """(key, max failures, progressive delay) per tracked key."""
+        keys = [(f"email:{(email or '').strip().lower()}", self.email_max_failures, True)]
+        if ip:
+            # NAT 뒤의 여러 사용자가 같은 IP 를 쓰므로 IP 는 잠금만 적용
+            keys.append((f"ip:{ip}", self.ip_max_failures, False))
+        return keys
+
+    def _recent(self, state, now):
+        return [t for t in (state or {}).get("failures", []) if t > now - self.window_seconds]
+
+    def _wait(self, state, now, progressive):
+        """Seconds until the next attempt is allowed for one key (0: allowed)."""
+        if not state:
+            return 0.0
+        if state.get("lockedUntil", 0) > now:
+            return state["lockedUntil"] - now
+        if not progressive:
+            return 0.0
+        recent = self._recent(state, now)
+        if len(recent) < self.delay_after:
+            return 0.0
+        delay = min(
+            self.max_delay_seconds,
+            self.base_delay_seconds * 2 ** (len(recent) - self.delay_after),
+        )
+        return max(0.0, max(recent) + delay - now)
+
+    async def check(self, email, ip):
+        """Raise LoginThrottledError if the attempt must wait; no DB or bcrypt work."""
+        if not self.enabled:
+            return
+        now = self._clock()
+        wait = 0.0
+        for key, _, progressive in self._keys(email, ip):
+            wait = max(wait, self._wait(await self.store.read(key), now, progressive))
+        if wait > 0:
+            self.rejected += 1
+            raise LoginThrottledError(max(1, math.ceil(wait)))
+
+    async def record_failure(self, email, ip):
+        if not self.enabled:
+            return
+        now = self._clock()
+        self.failures += 1
+        for key, max_failures, _ in self._keys(email, ip):
+
+            def fail(state, max_failures=max_failures):
+                recent = self._recent(state, now) + [now]
+                # 창 안의 실패 수만 필요하므로 최대치 이상은 보관하지 않음
+                recent = recent[-max(max_failures, self.delay_after + 32):]
+                locked_until = (state or {}).get("lockedUntil", 0)
+                if len(recent) >= max_failures and locked_until <= now:
+                    locked_until = now + self.lockout_seconds
+                return {"failures": recent, "lockedUntil": locked_until}
+
+            state = await self.store.update(key, fail)
+            if state and state["lockedUntil"] == now + self.lockout_seconds:
+                self.lockouts += 1
+
+    async def record_success(self, email, ip):
+        if not self.enabled:
+            return
+        key = self._keys(email, ip)[0][0]
+        await self.store.update(key, lambda state: None)
+
+    def stats(self):
+        return {
+            "enabled": self.enabled,
+            "store": type(self.store).__name__,
+            "rejected": self.rejected,
+            "failures": self.failures,
+            "lockouts": self.lockouts,
+        }
+
+
+def create_login_guard(db=None):
+    if LOGIN_GUARD_STORE == "database":
+        if db is None:
+            from app.db.database import db_service as db
+        return LoginGuard(DatabaseAttemptStore(db))
+    return LoginGuard()
@@ -0,0 +1,37 @@
+import asyncio
+import logging
+import os
+from app.db.change_feed import CHANGE_FEED_ENABLED
+from app.db.database import db_service
+
+# 로깅 설정
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# 0 disables the periodic event cache report
+EVENT_CACHE_REPORT_INTERVAL_SECONDS = int(
+    os.getenv("EVENT_CACHE_REPORT_INTERVAL_SECONDS", "3600")
+)
+
+
+async def report_event_cache_periodically(interval=EVENT_CACHE_REPORT_INTERVAL_SECONDS):
+    """Log the event cache compaction report every interval seconds."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            report = await db_service.event_cache_report()
+            logger.info(f"Event cache report: {report}")
+        except Exception as e:
+            logger.error(f"Event cache report failed: {str(e)}")
+
+
+def start_background_jobs():
+    """Start periodic maintenance jobs; returns the created tasks."""
+    tasks = []
+    if EVENT_CACHE_REPORT_INTERVAL_SECONDS > 0:
+        tasks.append(asyncio.create_task(report_event_cache_periodically()))
+    if CHANGE_FEED_ENABLED:
+        from app.services.projections import start_change_feed
+
+        tasks.extend(start_change_feed())
+    return tasks
@@ -0,0 +1,130 @@
+"""
+Password hashing off the event loop.
+
+A bcrypt hash or verify costs tens to hundreds of milliseconds of CPU. Run
+inline in an async handler it stalls every other request on the worker, so
+PasswordHasher runs them on a small dedicated thread pool (bcrypt releases
+the GIL while hashing). At most PASSWORD_HASH_WORKERS run at once and at
+most PASSWORD_HASH_MAX_QUEUE more may wait; beyond that the call fails fast
+with PasswordHashingBusyError, which the API answers with 503 + Retry-After
+instead of letting a login storm queue without bound.
+"""
+
+import asyncio
+import math
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+PASSWORD_HASH_WORKERS = int(
+    os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1)))
+)
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "32"))
+
+# 최근 작업 시간으로 대기 시간을 추정 (Retry-After)
+LATENCY_WINDOW = 256
+
+
+class PasswordHashingBusyError(Exception):
+    """The password hashing queue is full; surfaced as HTTP 503."""
+
+    def __init__(self, retry_after_seconds):
+        super().__init__(
+            f"Password hashing is saturated (retry after {retry_after_seconds:.1f}s)"
+        )
+        self.retry_after_seconds = retry_after_seconds
+
+
+class PasswordHasher:
+    def __init__(self, context, workers=PASSWORD_HASH_WORKERS, max_queue=PASSWORD_HASH_MAX_QUEUE):
+        self.context = context
+        self.workers = max(1, workers)
+        self.max_queue = max(0, max_queue)
+        self._lock = threading.Lock()
+        self._executor = None
+        self.pending = 0  # running + waiting
+        self.completed = {"hash": 0, "verify": 0}
+        self.rejected = 0
+        self._wait_ms = deque(maxlen=LATENCY_WINDOW)
+        self._run_ms = deque(maxlen=LATENCY_WINDOW)
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="password-hash"
+                )
+            return self._executor
+
+    def _retry_after(self):
+        run_ms = sorted(self._run_ms)
+        typical = run_ms[len(run_ms) // 2] / 1000 if run_ms else 0.25
+        return max(1.0, math.ceil(self.pending / self.workers * typical))
+
+    async def _submit(self, kind, function, *args):
+        with self._lock:
+            if self.pending >= self.workers + self.max_queue:
+                self.rejected += 1
+                raise PasswordHashingBusyError(self._retry_after())
+            self.pending += 1
+        submitted = time.perf_counter()
+
+        def run():
+            started = time.perf_counter()
+            try:
+                return function(*args)
+            finally:
+                finished = time.perf_counter()
+                with self._lock:
+                    self.completed[kind] += 1
+                    self._wait_ms.append((started - submitted) * 1000)
+                    self._run_ms.append((finished - started) * 1000)
+
+        def done(_):
+            # 취소된 작업도 자리를 돌려받도록 완료 콜백에서 감소
+            with self._lock:
+                self.pending -= 1
+
+        try:
+            future = self._pool().submit(run)
+        except BaseException:
+            done(None)
+            raise
+        future.add_done_callback(done)
+        return await asyncio.wrap_future(future)
+
+    async def hash(self, password):
+        return await self._submit("hash", self.context.hash, password)
+
+    async def verify(self, password, hashed_password):
+        return await self._submit("verify", self.context.verify, password, hashed_password)
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self):
+        def percentile(samples, q):
+            if not samples:
+                return 0.0
+            ordered = sorted(samples)
+            return round(ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))], 3)
+
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "in_flight": min(self.pending, self.workers),
+                "queued": max(0, self.pending - self.workers),
+                "hashed": self.completed["hash"],
+                "verified": self.completed["verify"],
+                "rejected": self.rejected,
+                "wait_p50_ms": percentile(self._wait_ms, 0.5),
+                "wait_p95_ms": percentile(self._wait_ms, 0.95),
+                "run_p50_ms": percentile(self._run_ms, 0.5),
+                "run_p95_ms": percentile(self._run_ms, 0.95),
+            }
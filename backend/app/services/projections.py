@@ -0,0 +1,193 @@
+"""
+Change feed projections (app.db.change_feed).
+
+With CHANGE_FEED_ENABLED the write endpoints only insert the source
+document and these handlers keep the derived data up to date:
+- event_costs: each batch is folded into the users' summaries with one
+  ETag-guarded write per user (apply_cost); the ids of recently folded costs
+  stay on the summary, so a batch delivered twice is counted once. Then
+  total_estimated_expenses / monthly_savings_suggestion on the user document
+- savings_history: legacy entries are added to the user ledger through
+  add_savings (entry and balance in one transaction; an entry that is
+  already there is skipped)
+- fan_preferences: the artist's fanCount, recounted from the source
+rebuild_summary is only used for users that have no summary yet.
+
+The cache processor runs in every process, from the current position, and
+invalidates in-process caches when artists or users change anywhere.
+
+    python -m app.services.projections   # standalone projection worker
+"""
+
+import asyncio
+import logging
+from datetime import datetime
+from app.db.change_feed import CHANGE_FEED_BATCH_SIZE, ChangeFeedProcessor, LeaseStore
+from app.db.database import CLAIMS_VERSION_FIELD, db_service, init_db, close_db
+from app.db.ledger import PROJECTED_IDS_FIELD, apply_cost, empty_summary
+from app.services.summary import (
+    EVENT_COSTS_COLLECTION,
+    SAVINGS_HISTORY_COLLECTION,
+    add_savings,
+    rebuild_summary,
+)
+
+# 로깅 설정
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PROJECTIONS_PROCESSOR = "projections"
+CACHE_PROCESSOR = "cache"
+
+# 요약에 남기는 최근 반영 id 수: 다시 전달되는 배치보다 커야 함
+PROJECTED_IDS_LIMIT = CHANGE_FEED_BATCH_SIZE
+
+# collection -> [listener(document)], called for every changed document
+CACHE_LISTENERS = {
+    "artists": [lambda artist: db_service.artist_cache.invalidate(artist.get("artistId"))],
+    "users": [
+        lambda user: db_service.principal_cache.invalidate(user.get("userId")),
+        lambda user: db_service.claims_versions.observe(
+            user.get("userId"), user.get(CLAIMS_VERSION_FIELD)
+        ),
+    ],
+}
+
+
+def register_cache_listener(collection_name, listener):
+    """Call listener(document) whenever a document of the collection changes."""
+    CACHE_LISTENERS.setdefault(collection_name, []).append(listener)
+
+
+async def _sync_user(user_id, summary, set_fields=None):
+    fields = {"total_estimated_expenses": summary["total_estimated"], **(set_fields or {})}
+    return await db_service.increment_user_fields(user_id, {}, fields)
+
+
+async def _fold(user_id, items, apply):
+    """Fold one user's items into the summary in a single ETag-guarded write."""
+    missing = [False]
+
+    def mutate(current):
+        # ETag 충돌 시 다시 호출되므로 매번 새로 판단
+        missing[0] = current is None
+        if current is None:
+            current = empty_summary(user_id)
+        projected = list(current.get(PROJECTED_IDS_FIELD) or [])
+        for item in items:
+            if item["id"] in projected:
+                continue
+            apply(current, item)
+            projected.append(item["id"])
+        current[PROJECTED_IDS_FIELD] = projected[-PROJECTED_IDS_LIMIT:]
+        current["updatedAt"] = datetime.utcnow().isoformat()
+        return current
+
+    summary = await db_service.update_user_summary(user_id, mutate)
+    if missing[0]:
+        # 요약이 없던 사용자: 이전 이력까지 원본에서 재계산 (이 배치도 포함됨)
+        return await rebuild_summary(user_id)
+    return summary
+
+
+async def project_event_costs(documents):
+    """Add new costs to their users' summaries and copy the totals to the users."""
+    costs = {}
+    suggestions = {}
+    for item in sorted(documents, key=lambda d: d.get("saved_at") or ""):
+        user_id = item.get("user_id")
+        if not user_id:
+            continue
+        costs.setdefault(user_id, []).append(item)
+        suggestions.setdefault(user_id, {})
+        if "monthly_savings_suggestion" in item:
+            suggestions[user_id] = {
+                "monthly_savings_suggestion": item["monthly_savings_suggestion"]
+            }
+
+    for user_id, items in costs.items():
+        summary = await _fold(user_id, items, apply_cost)
+        await _sync_user(user_id, summary, suggestions[user_id])
+
+
+async def project_savings_history(documents):
+    """Move legacy savings entries into the user ledger."""
+    for item in documents:
+        if not item.get("user_id"):
+            continue
+        entry = {k: v for k, v in item.items() if not k.startswith("_")}
+        try:
+            await add_savings(entry["user_id"], entry)
+        except ValueError:
+            # 이미 원장에 있음 (마이그레이션 또는 이전 전달에서 반영됨)
+            pass
+
+
+async def project_fan_preferences(documents):
+    """Recount the fans of every artist with a new preference."""
+    artist_ids = {item.get("artistId") for item in documents if item.get("artistId")}
+    for artist_id in artist_ids:
+        # 캐시를 거치지 않고 현재 값을 읽음
+        artist = await db_service.db.get_artist(artist_id)
+        if artist is None:
+            continue
+        fan_count = len(await db_service.get_fan_preferences_by_artist(artist_id))
+        if artist.get("fanCount") != fan_count:
+            await db_service.update_artist(artist_id, {"fanCount": fan_count})
+
+
+def _notify(collection_name):
+    async def handler(documents):
+        for document in documents:
+            for listener in CACHE_LISTENERS.get(collection_name, []):
+                listener(document)
+
+    return handler
+
+
+def projection_processor(**options):
+    return ChangeFeedProcessor(
+        db_service,
+        PROJECTIONS_PROCESSOR,
+        {
+            EVENT_COSTS_COLLECTION: project_event_costs,
+            SAVINGS_HISTORY_COLLECTION: project_savings_history,
+            "fan_preferences": project_fan_preferences,
+        },
+        **options,
+    )
+
+
+def cache_processor(**options):
+    return ChangeFeedProcessor(
+        db_service,
+        CACHE_PROCESSOR,
+        {name: _notify(name) for name in CACHE_LISTENERS},
+        leases=LeaseStore.local(),
+        start_from_beginning=False,
+        **options,
+    )
+
+
+def start_change_feed():
+    """Start the projection and cache processors; returns the created tasks."""
+    return [
+        asyncio.create_task(projection_processor().run()),
+        asyncio.create_task(cache_processor().run()),
+    ]
+
+
+async def _run_worker():
+    processor = projection_processor()
+    logger.info(f"Change feed worker {processor.owner} started")
+    await processor.run()
+
+
+if __name__ == "__main__":
+    init_db()
+    try:
+        asyncio.run(_run_worker())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        close_db()
@@ -0,0 +1,180 @@
+"""
+Refresh tokens: keep active users signed in without repeating the login.
+
+A login costs a user lookup plus a bcrypt verify. Instead of sending users
+back to /api/auth/login whenever the 30-minute access token runs out, login
+also issues a long-lived refresh token, and /api/auth/refresh trades it for
+a new access token with a signature check and one point read.
+
+- The refresh token is a JWT (type "refresh") whose jti names a record in
+  the refresh_tokens collection. Only a SHA-256 of the token is stored.
+- Every refresh rotates: the record is marked replaced and a new token is
+  issued, expiring REFRESH_TOKEN_EXPIRE_DAYS after this use (sliding), but
+  never later than REFRESH_SESSION_MAX_DAYS after the login.
+- Presenting a token that was already rotated means it leaked: the whole
+  chain issued from it is revoked and the user has to log in again.
+"""
+
+import hashlib
+import hmac
+import logging
+import os
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+from jose import JWTError, jwt
+from app.db.database import db_service
+
+# 로깅 설정
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+REFRESH_TOKENS_COLLECTION = "refresh_tokens"
+REFRESH_TOKEN_TYPE = "refresh"
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "14"))
+REFRESH_SESSION_MAX_DAYS = int(os.getenv("REFRESH_SESSION_MAX_DAYS", "90"))
+
+# 회전 체인을 따라 폐기할 때의 상한 (정상적인 세션은 이보다 짧음)
+MAX_CHAIN_LENGTH = 10000
+
+
+class InvalidRefreshToken(Exception):
+    """The refresh token is malformed, expired, revoked or already used."""
+
+
+def _secret():
+    # 순환 import 를 피하기 위해 호출 시점에 읽음
+    from app.services.auth import ALGORITHM, SECRET_KEY
+
+    return SECRET_KEY, ALGORITHM
+
+
+def _digest(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+async def issue_refresh_token(
+    user_id: str,
+    session_started_at: Optional[datetime] = None,
+    now: Optional[datetime] = None,
+    token_id: Optional[str] = None,
+) -> str:
+    """Create a refresh token and store its hashed record."""
+    now = now or datetime.utcnow()
+    session_started_at = session_started_at or now
+    token_id = token_id or uuid.uuid4().hex
+    expires_at = min(
+        now + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+        session_started_at + timedelta(days=REFRESH_SESSION_MAX_DAYS),
+    )
+    if expires_at <= now:
+        raise InvalidRefreshToken("Session has reached its maximum lifetime")
+
+    secret, algorithm = _secret()
+    token = jwt.encode(
+        {
+            "sub": user_id,
+            "jti": token_id,
+            "type": REFRESH_TOKEN_TYPE,
+            "exp": expires_at,
+        },
+        secret,
+        algorithm=algorithm,
+    )
+    record = {
+        "id": token_id,
+        "user_id": user_id,
+        "token_hash": _digest(token),
+        "sessionStartedAt": session_started_at.isoformat(),
+        "createdAt": now.isoformat(),
+        "expiresAt": expires_at.isoformat(),
+        "replacedBy": None,
+        "revokedAt": None,
+        # Cosmos DB 가 만료된 기록을 자동 삭제 (컨테이너 default_ttl = -1)
+        "ttl": max(1, int((expires_at - now).total_seconds())),
+    }
+    # 새로 만든 id 이므로 읽지 않고 바로 생성
+    await db_service.create_document(REFRESH_TOKENS_COLLECTION, record)
+    return token
+
+
+def _decode(token: str) -> dict:
+    secret, algorithm = _secret()
+    try:
+        claims = jwt.decode(token, secret, algorithms=[algorithm])
+    except JWTError:
+        raise InvalidRefreshToken("Invalid refresh token")
+    if claims.get("type") != REFRESH_TOKEN_TYPE or not claims.get("jti") or not claims.get("sub"):
+        raise InvalidRefreshToken("Not a refresh token")
+    return claims
+
+
+async def rotate_refresh_token(token: str, now: Optional[datetime] = None):
+    """
+    Consume a refresh token: returns (user_id, new refresh token).
+    Raises InvalidRefreshToken; a reused token also revokes its successors.
+    """
+    now = now or datetime.utcnow()
+    claims = _decode(token)
+    token_id = claims["jti"]
+    next_id = uuid.uuid4().hex
+    outcome = {}
+
+    def consume(current):
+        outcome.clear()
+        if current is None or not hmac.compare_digest(
+            current.get("token_hash", ""), _digest(token)
+        ):
+            outcome["error"] = "unknown"
+            return None
+        if current.get("revokedAt"):
+            outcome["error"] = "revoked"
+            return None
+        if current.get("expiresAt", "") <= now.isoformat():
+            outcome["error"] = "expired"
+            return None
+        if current.get("replacedBy"):
+            outcome["error"] = "reused"
+            outcome["replacedBy"] = current["replacedBy"]
+            return None
+        current["replacedBy"] = next_id
+        current["rotatedAt"] = now.isoformat()
+        return current
+
+    # 포인트 읽기 한 번 + 조건부 교체: 같은 토큰으로 두 번 갱신할 수 없음
+    record = await db_service.update_document(REFRESH_TOKENS_COLLECTION, token_id, consume)
+    if record is None:
+        if outcome.get("error") == "reused":
+            logger.warning(f"Refresh token reuse for user {claims['sub']}; revoking the session")
+            await _revoke_chain(outcome["replacedBy"], now)
+        raise InvalidRefreshToken(f"Refresh token is {outcome.get('error', 'unknown')}")
+
+    session_started_at = datetime.fromisoformat(record["sessionStartedAt"])
+    # 회전 기록에 미리 적어 둔 id 로 발급 (재사용 시 체인을 따라갈 수 있도록)
+    new_token = await issue_refresh_token(record["user_id"], session_started_at, now, next_id)
+    return record["user_id"], new_token
+
+
+async def _revoke_chain(token_id: Optional[str], now: datetime):
+    for _ in range(MAX_CHAIN_LENGTH):
+        if not token_id:
+            return
+        following = {}
+
+        def revoke(current):
+            if current is None:
+                return None
+            following["id"] = current.get("replacedBy")
+            if current.get("revokedAt"):
+                return None
+            current["revokedAt"] = now.isoformat()
+            return current
+
+        await db_service.update_document(REFRESH_TOKENS_COLLECTION, token_id, revoke)
+        token_id = following.get("id")
+
+
+async def revoke_refresh_token(token: str, now: Optional[datetime] = None) -> None:
+    """Log out: revoke the token and everything rotated from it."""
+    claims = _decode(token)
+    await _revoke_chain(claims["jti"], now or datetime.utcnow())
@@ -0,0 +1,223 @@
+import asyncio
+import logging
+import sys
+from datetime import datetime
+from app.db.cosmos_db import ConcurrentUpdateError
+from app.db.database import db_service, get_collection, init_db
+from app.db.ledger import (
+    PROJECTED_IDS_FIELD,
+    SAVINGS_ENTRY_TYPE,
+    apply_cost,
+    apply_savings,
+    empty_summary,
+)
+
+# 로깅 설정
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+EVENT_COSTS_COLLECTION = "event_costs"
+USER_LEDGER_COLLECTION = "user_ledger"
+# 이전 버전의 저금 이력 컬렉션 (migrate_legacy_savings 로 user_ledger 에 이전)
+SAVINGS_HISTORY_COLLECTION = "savings_history"
+
+# 재계산하는 동안 요약이 계속 바뀌면 포기할 때까지의 시도 횟수
+REBUILD_ATTEMPTS = 5
+
+
+class _SummaryChanged(Exception):
+    """The summary was written by someone else while it was being recomputed."""
+
+
+def _version(summary):
+    """What identifies one stored version of a summary (its ETag, else updatedAt)."""
+    if summary is None:
+        return None
+    return summary.get("_etag") or summary.get("updatedAt")
+
+
+async def get_summary(user_id: str) -> dict:
+    """Get a user's summary with one point read, rebuilding it if it is missing."""
+    summary = await db_service.get_user_summary(user_id)
+    if summary:
+        return summary
+    return await rebuild_summary(user_id)
+
+
+async def _record(user_id: str, item: dict, apply) -> dict:
+    """Atomically fold one item into the user's summary."""
+    missing = []
+
+    def mutate(current):
+        if current is None:
+            missing.append(True)
+            current = empty_summary(user_id)
+        current["updatedAt"] = datetime.utcnow().isoformat()
+        return apply(current, item)
+
+    summary = await db_service.update_user_summary(user_id, mutate)
+    if missing:
+        # 요약 문서가 없었다면 기존 이력까지 포함하도록 원본에서 재계산
+        return await rebuild_summary(user_id)
+    return summary
+
+
+async def record_cost(user_id: str, cost_item: dict) -> dict:
+    """Incrementally add a saved cost calculation to the user's summary."""
+    return await _record(user_id, cost_item, apply_cost)
+
+
+async def add_savings(user_id: str, savings_item: dict) -> dict:
+    """
+    Record a savings entry and update the balance in one transaction.
+    The entry and the summary share the user's ledger partition, so the
+    balance can never drift from the ledger.
+    """
+    savings_item["user_id"] = user_id
+    savings_item["type"] = SAVINGS_ENTRY_TYPE
+    result = await db_service.add_savings_entry(savings_item)
+    if result["created"]:
+        # 요약 문서가 없었다면 기존 이력까지 포함하도록 원본에서 재계산
+        return await rebuild_summary(user_id)
+    return result["summary"]
+
+
+async def _user_items(
+    collection_name: str, user_id: str, query: str, parameters: list = ()
+) -> list:
+    collection = await get_collection(collection_name)
+    if not collection:
+        return []
+
+    def fetch():
+        items = collection.query_items(
+            query=query,
+            parameters=[{"name": "@user_id", "value": user_id}, *parameters],
+            enable_cross_partition_query=True,
+        )
+        return list(items)
+
+    # SDK 호출은 블로킹이므로 이벤트 루프 밖에서 실행
+    return await asyncio.to_thread(fetch)
+
+
+async def _recompute(user_id: str) -> dict:
+    summary = empty_summary(user_id)
+    costs = await _user_items(
+        EVENT_COSTS_COLLECTION,
+        user_id,
+        "SELECT * FROM c WHERE c.user_id = @user_id",
+    )
+    for item in costs:
+        apply_cost(summary, item)
+
+    entries = await _user_items(
+        USER_LEDGER_COLLECTION,
+        user_id,
+        "SELECT * FROM c WHERE c.user_id = @user_id AND c.type = @type",
+        [{"name": "@type", "value": SAVINGS_ENTRY_TYPE}],
+    )
+    for item in entries:
+        apply_savings(summary, item)
+    return summary
+
+
+async def rebuild_summary(user_id: str) -> dict:
+    """
+    Repair job: recompute a user's summary from event_costs and the savings
+    ledger. The result is only written if the summary is still the version
+    read before recomputing (the write itself is ETag-guarded), so a savings
+    entry or cost recorded meanwhile is never overwritten; then it starts over.
+    """
+    for attempt in range(1, REBUILD_ATTEMPTS + 1):
+        before = await db_service.get_user_summary(user_id)
+        summary = await _recompute(user_id)
+
+        def replace(current):
+            if _version(current) != _version(before):
+                raise _SummaryChanged()
+            if current and current.get(PROJECTED_IDS_FIELD):
+                # 이미 반영된 항목 기록은 유지 (다시 전달돼도 두 번 더하지 않도록)
+                summary[PROJECTED_IDS_FIELD] = list(current[PROJECTED_IDS_FIELD])
+            summary["updatedAt"] = datetime.utcnow().isoformat()
+            return summary
+
+        try:
+            saved = await db_service.update_user_summary(user_id, replace)
+        except _SummaryChanged:
+            logger.info(
+                f"Summary of user {user_id} changed during rebuild, "
+                f"retrying ({attempt}/{REBUILD_ATTEMPTS})"
+            )
+            continue
+
+        logger.info(
+            f"Rebuilt summary for user {user_id}: "
+            f"{summary['cost_count']} costs, {summary['savings_count']} savings"
+        )
+        return saved
+
+    raise ConcurrentUpdateError(
+        f"Gave up rebuilding the summary of '{user_id}' after {REBUILD_ATTEMPTS} attempts"
+    )
+
+
+async def copy_legacy_savings(items) -> set:
+    """Upsert savings_history items into the user ledger; returns the affected user IDs."""
+    ledger = await get_collection(USER_LEDGER_COLLECTION)
+    if not ledger:
+        return set()
+
+    user_ids = set()
+    for item in items:
+        if not item.get("user_id"):
+            continue
+        entry = {k: v for k, v in item.items() if not k.startswith("_")}
+        entry["type"] = SAVINGS_ENTRY_TYPE
+        # 같은 id 로 upsert 하므로 여러 번 실행해도 안전
+        await asyncio.to_thread(ledger.upsert_item, entry)
+        user_ids.add(entry["user_id"])
+    return user_ids
+
+
+async def migrate_legacy_savings() -> int:
+    """Copy entries from the old savings_history container into the user ledger."""
+    legacy = await get_collection(SAVINGS_HISTORY_COLLECTION)
+    if not legacy:
+        return 0
+
+    items = await asyncio.to_thread(
+        lambda: list(
+            legacy.query_items(query="SELECT * FROM c", enable_cross_partition_query=True)
+        )
+    )
+    user_ids = await copy_legacy_savings(items)
+    for user_id in user_ids:
+        await rebuild_summary(user_id)
+    logger.info(f"Migrated legacy savings history for {len(user_ids)} users")
+    return len(user_ids)
+
+
+async def rebuild_all_summaries() -> int:
+    """Repair job: recompute the summary of every user."""
+    users = await db_service.get_all_users()
+    for user in users:
+        user_id = user.get("userId") or user.get("id")
+        if user_id:
+            await rebuild_summary(user_id)
+    return len(users)
+
+
+if __name__ == "__main__":
+    # python -m app.services.summary [user_id ...]
+    # python -m app.services.summary --migrate-savings (python -m app.db.migrate 도 실행)
+    init_db()
+    user_ids = sys.argv[1:]
+    if user_ids == ["--migrate-savings"]:
+        asyncio.run(migrate_legacy_savings())
+    elif user_ids:
+        for uid in user_ids:
+            asyncio.run(rebuild_summary(uid))
+    else:
+        count = asyncio.run(rebuild_all_summaries())
+        logger.info(f"Rebuilt summaries for {count} users")
@@ -0,0 +1,218 @@
+"""
+Micro-benchmark of every database backend (app.db.base.DatabaseBackend).
+
+Runs the same operations against each available backend and reports
+ops/sec and latency percentiles per operation. The backends are the ones
+tests/test_backend_conformance.py checks for identical behaviour:
+- mock: the in-memory MockDB
+- sqlite: SQLiteDB on a temporary file
+- cosmos-local: CosmosDB through the SDK against app.db.cosmos_local
+- cosmos: CosmosDB, only when AZURE_COSMOS_DB_ENDPOINT/KEY are set (emulator)
+
+    cd backend
+    python -m benchmarks.backends --iterations 500
+    python -m benchmarks.backends --backend cosmos-local --latency-ms 5 --throttle-rate 0.05
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import tempfile
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from functools import partial
+
+from app.db.ledger import empty_summary
+
+
+@contextmanager
+def mock_backend():
+    from app.db.mock_db import MockDB
+
+    yield MockDB()
+
+
+@contextmanager
+def sqlite_backend():
+    from app.db.sqlite_db import SQLiteDB
+
+    with tempfile.TemporaryDirectory() as directory:
+        backend = SQLiteDB(os.path.join(directory, "app.db"))
+        backend.initialize()
+        try:
+            yield backend
+        finally:
+            backend.close()
+
+
+@contextmanager
+def cosmos_backend():
+    from app.db.cosmos_db import CosmosDB
+
+    backend = CosmosDB()
+    backend.initialize()
+    yield backend
+
+
+@contextmanager
+def cosmos_local_backend(latency_ms=0.0, throttle_rate=0.0):
+    """CosmosDB (the real SDK code path) against app.db.cosmos_local."""
+    from app.db.cosmos_db import CosmosDB
+    from app.db.cosmos_local import LocalCosmosServer
+
+    with LocalCosmosServer(latency_ms=latency_ms, throttle_rate=throttle_rate) as server:
+        backend = CosmosDB(server.endpoint, server.key)
+        backend.provision()
+        backend.initialize()
+        yield backend
+
+
+def available_backends():
+    """name -> context manager factory yielding a ready backend."""
+    backends = {"mock": mock_backend, "sqlite": sqlite_backend, "cosmos-local": cosmos_local_backend}
+    if os.getenv("AZURE_COSMOS_DB_ENDPOINT") and os.getenv("AZURE_COSMOS_DB_KEY"):
+        backends["cosmos"] = cosmos_backend
+    return backends
+
+
+class Scenario:
+    """Keys shared by the operations of one run, so every backend does the same work."""
+
+    def __init__(self):
+        self.prefix = f"bench-{uuid.uuid4().hex[:8]}"
+        self.artist_id = f"{self.prefix}-artist"
+
+    def user_id(self, i):
+        return f"{self.prefix}-user-{i}"
+
+    async def setup(self, backend):
+        await backend.create_artist({"artistId": self.artist_id, "name": "Bench", "fanCount": 0})
+
+
+def _cache(artist_id):
+    now = datetime.utcnow()
+    return {
+        "artistId": artist_id,
+        "events": [{"title": "Live", "date": now.date().isoformat()}],
+        "computedAt": now,
+        "expiresAt": now + timedelta(hours=1),
+    }
+
+
+async def _query_costs(backend, user_id):
+    collection = await backend.get_collection("event_costs")
+    return list(
+        collection.query_items(
+            query="SELECT * FROM c WHERE c.user_id = @user_id ORDER BY c.saved_at DESC",
+            parameters=[{"name": "@user_id", "value": user_id}],
+            enable_cross_partition_query=True,
+        )
+    )
+
+
+async def _create_cost(backend, user_id):
+    collection = await backend.get_collection("event_costs")
+    return collection.create_item(
+        {
+            "id": str(uuid.uuid4()),
+            "user_id": user_id,
+            "saved_at": datetime.utcnow().isoformat(),
+            "total_estimated": 1000,
+        }
+    )
+
+
+# (name, operation(backend, scenario, i)); later operations read what earlier ones wrote
+OPERATIONS = [
+    ("create_user", lambda b, s, i: b.create_user(
+        {"userId": s.user_id(i), "email": f"{s.user_id(i)}@example.com"}
+    )),
+    ("get_user", lambda b, s, i: b.get_user(s.user_id(i))),
+    ("update_user", lambda b, s, i: b.update_user(s.user_id(i), {"area": "東京"})),
+    ("increment_user_fields", lambda b, s, i: b.increment_user_fields(
+        s.user_id(i), {"total_expenses": 100}
+    )),
+    ("create_fan_preference", lambda b, s, i: b.create_fan_preference(
+        {"artistId": s.artist_id, "userId": s.user_id(i), "interests": ["live"]}
+    )),
+    ("get_fan_preferences_by_user", lambda b, s, i: b.get_fan_preferences_by_user(s.user_id(i))),
+    ("get_artist", lambda b, s, i: b.get_artist(s.artist_id)),
+    ("create_or_update_event_cache", lambda b, s, i: b.create_or_update_event_cache(
+        _cache(f"{s.artist_id}-{i}")
+    )),
+    ("get_event_cache", lambda b, s, i: b.get_event_cache(f"{s.artist_id}-{i}")),
+    ("upsert_user_summary", lambda b, s, i: b.upsert_user_summary(empty_summary(s.user_id(i)))),
+    ("add_savings_entry", lambda b, s, i: b.add_savings_entry(
+        {"user_id": s.user_id(i), "amount": 100, "saved_at": datetime.utcnow().isoformat()}
+    )),
+    ("get_user_summary", lambda b, s, i: b.get_user_summary(s.user_id(i))),
+    ("collection.create_item", lambda b, s, i: _create_cost(b, s.user_id(i))),
+    ("collection.query_items", lambda b, s, i: _query_costs(b, s.user_id(i))),
+]
+
+
+def _percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+async def run_benchmark(backend, iterations):
+    """Time each operation `iterations` times; one result row per operation."""
+    scenario = Scenario()
+    await scenario.setup(backend)
+    results = []
+    for name, operation in OPERATIONS:
+        samples = []
+        started = time.perf_counter()
+        for i in range(iterations):
+            op_started = time.perf_counter()
+            await operation(backend, scenario, i)
+            samples.append((time.perf_counter() - op_started) * 1000)
+        elapsed = time.perf_counter() - started
+        results.append(
+            {
+                "operation": name,
+                "ops_per_sec": round(iterations / elapsed, 1) if elapsed else 0.0,
+                "p50_ms": round(statistics.median(samples), 3),
+                "p95_ms": round(_percentile(samples, 0.95), 3),
+                "max_ms": round(max(samples), 3),
+            }
+        )
+    return results
+
+
+def format_report(name, results):
+    lines = [f"{name}", f"  {'operation':<30} {'ops/sec':>10} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}"]
+    for row in results:
+        lines.append(
+            f"  {row['operation']:<30} {row['ops_per_sec']:>10} {row['p50_ms']:>9} "
+            f"{row['p95_ms']:>9} {row['max_ms']:>9}"
+        )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--backend", action="append", help="limit to these backends")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="cosmos-local latency")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="cosmos-local 429 rate")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    for name, factory in available_backends().items():
+        if args.backend and name not in args.backend:
+            continue
+        if factory is cosmos_local_backend:
+            factory = partial(factory, args.latency_ms, args.throttle_rate)
+        with factory() as backend:
+            results = asyncio.run(run_benchmark(backend, args.iterations))
+        print(format_report(name, results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Micro-benchmark for the mock fan preference store.
+
+Loads N preferences (default 1M) into the keyed/indexed store and times
+the MockDB operations against a linear scan over the same records (how
+the store used to work). One artist holds POPULAR_SHARE of all fans.
+
+    cd backend
+    python -m benchmarks.fan_preferences --count 1000000
+"""
+
+import argparse
+import asyncio
+import gc
+import logging
+import random
+import time
+
+from app.db.mock_db import MockTable, TABLE_OPTIONS, mock_data, mock_db
+
+POPULAR_ARTIST = "artist_popular"
+POPULAR_SHARE = 0.1
+
+
+def _generate(count, artists, seed=0):
+    rng = random.Random(seed)
+    for i in range(count):
+        if rng.random() < POPULAR_SHARE:
+            artist_id = POPULAR_ARTIST
+        else:
+            artist_id = f"artist_{rng.randrange(artists)}"
+        yield {"artistId": artist_id, "userId": f"user_{i}", "interests": ["live"]}
+
+
+def _timed(label, func, repeat):
+    func()  # 첫 호출(워밍업)은 제외
+    # timeit 처럼 측정 중에는 GC 를 끔 (100만 객체 전체 수집이 끼어들지 않도록)
+    gc.disable()
+    try:
+        started = time.perf_counter()
+        for _ in range(repeat):
+            result = func()
+        elapsed_ms = (time.perf_counter() - started) * 1000 / repeat
+    finally:
+        gc.enable()
+    print(f"  {label:<32} {elapsed_ms:>10.3f} ms")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--count", type=int, default=1_000_000)
+    parser.add_argument("--artists", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    started = time.perf_counter()
+    key, indexed_fields = TABLE_OPTIONS["fan_preferences"]
+    table = MockTable(
+        _generate(args.count, args.artists), indexed_fields=indexed_fields, key=key
+    )
+    mock_data["fan_preferences"] = table
+    print(f"loaded {len(table):,} preferences in {time.perf_counter() - started:.1f}s")
+
+    records = list(table.values())
+    user_id = f"user_{args.count // 2}"
+    artist_id = "artist_0"
+    loop = asyncio.new_event_loop()
+    run = loop.run_until_complete
+
+    print("indexed store (MockDB)")
+    _timed(
+        "duplicate check",
+        lambda: key({"artistId": artist_id, "userId": user_id}) in table,
+        args.repeat,
+    )
+    _timed("by user", lambda: run(mock_db.get_fan_preferences_by_user(user_id)), args.repeat)
+    _timed("by artist", lambda: run(mock_db.get_fan_preferences_by_artist(artist_id)), args.repeat)
+    fans = _timed(
+        "by popular artist",
+        lambda: run(mock_db.get_fan_preferences_by_artist(POPULAR_ARTIST)),
+        args.repeat,
+    )
+    target = next(iter(table.values()))
+    _timed(
+        "update",
+        lambda: run(
+            mock_db.update_fan_preference(
+                target["artistId"], target["userId"], {"interests": ["goods"]}
+            )
+        ),
+        args.repeat,
+    )
+    print(f"  (popular artist has {len(fans):,} fans)")
+
+    print("linear scan (previous list store)")
+    _timed(
+        "duplicate check",
+        lambda: any(p["artistId"] == artist_id and p["userId"] == user_id for p in records),
+        args.repeat,
+    )
+    _timed("by user", lambda: [p for p in records if p["userId"] == user_id], args.repeat)
+    _timed("by artist", lambda: [p for p in records if p["artistId"] == artist_id], args.repeat)
+    loop.close()
+
+
+if __name__ == "__main__":
+    main()
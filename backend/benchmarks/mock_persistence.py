@@ -0,0 +1,67 @@
+"""
+Boot-time benchmark for the persistent mock database (MOCK_DB_PERSIST_DIR).
+
+Writes N user documents through the journal, closes it (final snapshot),
+then measures how long reopening takes and what the first read of the
+users table costs (the table is decoded lazily on first use).
+
+    cd backend
+    python -m benchmarks.mock_persistence --count 1000000
+"""
+
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+from app.db.mock_db import MockTable
+from app.db.mock_persistence import MockJournal
+
+
+def _directory_size(directory):
+    return sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--count", type=int, default=1_000_000)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    with tempfile.TemporaryDirectory() as directory:
+        journal = MockJournal(directory, snapshot_ops=args.count * 2)
+        journal.open()
+        table = MockTable()
+        table.attach("users", journal)
+        journal.start(lambda: {"users": table})
+
+        started = time.perf_counter()
+        for i in range(args.count):
+            table[f"user_{i}"] = {
+                "userId": f"user_{i}",
+                "email": f"user_{i}@example.com",
+                "preferences": ["music", "travel"],
+            }
+        print(f"wrote {args.count:,} documents in {time.perf_counter() - started:.1f}s")
+
+        started = time.perf_counter()
+        journal.close()
+        print(
+            f"final snapshot in {time.perf_counter() - started:.1f}s "
+            f"({_directory_size(directory) / 1e6:.1f} MB)"
+        )
+
+        started = time.perf_counter()
+        restored = MockJournal(directory).open()
+        print(f"boot (map snapshot, replay log): {(time.perf_counter() - started) * 1000:.2f} ms")
+
+        started = time.perf_counter()
+        users = MockTable()
+        users._load(restored["users"].load())
+        print(f"first use of users (decode + index): {time.perf_counter() - started:.2f}s")
+        assert len(users) == args.count
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import asyncio
+import uuid
+
+import pytest
+
+from app.db.artist_cache import ArtistCache
+from app.db.database import DatabaseService
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_catalog_is_served_from_memory_until_invalidated():
+    service = DatabaseService()
+    service.artist_cache = ArtistCache(ttl_seconds=60)
+    artist_id = f"artist-{uuid.uuid4().hex}"
+
+    async def scenario():
+        await service.create_artist({"artistId": artist_id, "name": "Before"})
+        first = await service.get_all_artists()
+        second = await service.get_all_artists()
+        by_id = await service.get_artist(artist_id)
+        await service.update_artist(artist_id, {"name": "After"})
+        after = await service.get_artist(artist_id)
+        return first, second, by_id, after
+
+    first, second, by_id, after = asyncio.run(scenario())
+
+    # 목록 로딩이 개별 조회도 채움 (hits 에 포함)
+    assert first == second
+    assert by_id in first
+    assert after["name"] == "After"
+
+    stats = service.artist_cache.stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 2
+    assert stats["hit_rate"] == 0.5
+
+
+def test_changing_a_cached_artist_does_not_change_the_cache():
+    cache = ArtistCache(ttl_seconds=60)
+
+    async def load():
+        return {"artistId": "a1", "name": "Name", "genre": ["Pop"]}
+
+    artist = asyncio.run(cache.get("a1", load))
+    artist["name"] = "changed"
+    artist["genre"].append("Rock")
+
+    again = asyncio.run(cache.get("a1", load))
+    assert again == {"artistId": "a1", "name": "Name", "genre": ["Pop"]}
+    assert cache.hits == 1
+
+
+def test_entries_expire_after_ttl():
+    clock = Clock()
+    cache = ArtistCache(ttl_seconds=10, clock=clock)
+    loads = []
+
+    async def load():
+        loads.append(1)
+        return [{"artistId": "a1", "name": "Name"}]
+
+    asyncio.run(cache.get_all(load))
+    clock.now = 5
+    asyncio.run(cache.get_all(load))
+    clock.now = 11
+    asyncio.run(cache.get_all(load))
+
+    assert len(loads) == 2
@@ -0,0 +1,289 @@
+"""
+The same scenarios against every backend (app.db.base.DatabaseBackend).
+cosmos-local runs CosmosDB through the SDK against app.db.cosmos_local; the
+Cosmos backend is included when AZURE_COSMOS_DB_ENDPOINT/KEY are set.
+"""
+
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.db.base import DatabaseBackend, missing_methods
+from app.db.database import CLAIMS_VERSION_FIELD, DatabaseService
+from app.db.ledger import empty_summary
+from benchmarks.backends import available_backends, run_benchmark
+
+
+@pytest.fixture(params=sorted(available_backends()))
+def backend(request):
+    with available_backends()[request.param]() as backend:
+        yield backend
+
+
+def _id(kind):
+    return f"conformance-{kind}-{uuid.uuid4().hex}"
+
+
+def test_implements_protocol(backend):
+    assert isinstance(backend, DatabaseBackend)
+    assert missing_methods(backend) == []
+
+
+def test_users(backend):
+    user_id = _id("user")
+
+    async def scenario():
+        await backend.create_user({"userId": user_id, "email": f"{user_id}@example.com"})
+        with pytest.raises(ValueError):
+            await backend.create_user({"userId": user_id, "email": "other@example.com"})
+        updated = await backend.update_user(user_id, {"area": "東京", "userId": "changed"})
+        await backend.increment_user_fields(user_id, {"total_expenses": 100})
+        await backend.increment_user_fields(
+            user_id, {"total_expenses": 50}, {"monthly_savings_suggestion": 10}
+        )
+        return (
+            updated,
+            await backend.get_user(user_id),
+            await backend.update_user(_id("missing"), {"area": "大阪"}),
+        )
+
+    updated, user, missing = asyncio.run(scenario())
+    assert updated["userId"] == user_id and updated["updatedAt"]
+    assert user["area"] == "東京"
+    assert user["total_expenses"] == 150
+    assert user["monthly_savings_suggestion"] == 10
+    assert missing is None
+
+
+def test_artists_and_fan_preferences(backend):
+    artist_id, user_id = _id("artist"), _id("user")
+
+    async def scenario():
+        await backend.create_artist({"artistId": artist_id, "name": "A", "fanCount": 0})
+        with pytest.raises(ValueError):
+            await backend.create_artist({"artistId": artist_id, "name": "B"})
+        await backend.update_artist(artist_id, {"genre": "J-POP", "artistId": "changed"})
+
+        preference = {"artistId": artist_id, "userId": user_id, "interests": ["live"]}
+        await backend.create_fan_preference(preference)
+        with pytest.raises(ValueError):
+            await backend.create_fan_preference(dict(preference))
+        await backend.update_fan_preference(
+            artist_id, user_id, {"interests": ["goods"], "userId": "changed"}
+        )
+        return (
+            await backend.get_artist(artist_id),
+            await backend.get_fan_preferences_by_artist(artist_id),
+            await backend.get_fan_preferences_by_user(user_id),
+        )
+
+    artist, by_artist, by_user = asyncio.run(scenario())
+    assert artist["genre"] == "J-POP" and artist["artistId"] == artist_id
+    # 중복 등록은 팬 수를 바꾸지 않음
+    assert artist["fanCount"] == 1
+    assert [p["userId"] for p in by_artist] == [user_id]
+    assert [list(p["interests"]) for p in by_user] == [["goods"]]
+
+
+def test_updates_with_the_loaded_document(backend):
+    user_id, artist_id = _id("user"), _id("artist")
+
+    async def scenario():
+        await backend.create_user({"userId": user_id, "email": f"{user_id}@example.com"})
+        await backend.create_artist({"artistId": artist_id, "name": "A"})
+        loaded_user = await backend.get_user(user_id)
+        loaded_artist = await backend.get_artist(artist_id)
+        await backend.update_user(user_id, {"area": "東京"}, loaded_user)
+        await backend.update_artist(artist_id, {"genre": "J-POP"}, loaded_artist)
+
+        # 다른 요청이 먼저 갱신한 뒤 오래된 사본으로 갱신해도 그 변경을 잃지 않음
+        stale = await backend.get_user(user_id)
+        await backend.update_user(user_id, {"area": "大阪"})
+        await backend.update_user(user_id, {"content_interests": ["ライブ"]}, stale)
+        return await backend.get_user(user_id), await backend.get_artist(artist_id)
+
+    user, artist = asyncio.run(scenario())
+    assert user["area"] == "大阪" and list(user["content_interests"]) == ["ライブ"]
+    assert artist["genre"] == "J-POP" and artist["name"] == "A"
+
+
+class _RecordingBackend:
+    """Forwards to a backend and records the name of every call."""
+
+    def __init__(self, backend, calls):
+        self._backend = backend
+        self._calls = calls
+
+    def __getattr__(self, name):
+        attribute = getattr(self._backend, name)
+        if not callable(attribute):
+            return attribute
+
+        def record(*args, **kwargs):
+            self._calls.append(name)
+            return attribute(*args, **kwargs)
+
+        return record
+
+
+def test_claim_changes_bump_the_claims_version_in_the_same_write(backend):
+    user_id = _id("user")
+    calls = []
+    service = DatabaseService("mock", profile=False)
+    service.db = _RecordingBackend(backend, calls)
+
+    async def scenario():
+        await backend.create_user({"userId": user_id, "email": f"{user_id}@example.com"})
+        claims = await service.update_user(user_id, {"area": "東京"})
+        claim_calls = list(calls)
+        profile = await service.update_user(user_id, {"username": "fan"})
+
+        # 읽어 둔 사본이 오래되었어도 증가분은 잃지 않음
+        stale = await backend.get_user(user_id)
+        await backend.update_user(user_id, {"area": "大阪"}, None, {CLAIMS_VERSION_FIELD: 1})
+        await backend.update_user(
+            user_id, {"preferences": {}}, stale, {CLAIMS_VERSION_FIELD: 1}
+        )
+        return claims, claim_calls, profile, await backend.get_user(user_id)
+
+    claims, claim_calls, profile, user = asyncio.run(scenario())
+    # 클레임 변경과 버전 증가는 한 번의 백엔드 쓰기
+    assert claim_calls == ["update_user"]
+    assert claims["area"] == "東京" and claims[CLAIMS_VERSION_FIELD] == 1
+    assert profile[CLAIMS_VERSION_FIELD] == 1
+    assert user[CLAIMS_VERSION_FIELD] == 3 and user["area"] == "大阪"
+
+
+def test_event_cache_expiry(backend):
+    fresh_id, stale_id = _id("fresh"), _id("stale")
+    now = datetime.utcnow()
+
+    async def scenario():
+        await backend.create_or_update_event_cache(
+            {"artistId": fresh_id, "events": [], "expiresAt": now + timedelta(hours=1)}
+        )
+        await backend.create_or_update_event_cache(
+            {"artistId": stale_id, "events": [], "expiresAt": now - timedelta(seconds=60)}
+        )
+        return (
+            await backend.get_event_cache(fresh_id),
+            await backend.get_event_cache(stale_id),
+            await backend.get_event_cache(stale_id, allow_stale=True),
+            await backend.event_cache_report(),
+        )
+
+    fresh, stale, allowed, report = asyncio.run(scenario())
+    assert fresh["artistId"] == fresh_id
+    assert stale is None
+    assert allowed["artistId"] == stale_id
+    assert {"documents", "size_kb", "stale", "purged"} <= set(report)
+    assert report["stale"] >= 1
+
+
+def test_summaries_and_savings_ledger(backend):
+    user_id, other_id = _id("user"), _id("user")
+
+    def add_cost(current):
+        summary = current or empty_summary(user_id)
+        summary["total_estimated"] += 1000
+        return summary
+
+    entry_id = _id("entry")
+
+    async def scenario():
+        await backend.upsert_user_summary(empty_summary(user_id))
+        await backend.update_user_summary(user_id, add_cost)
+        first = await backend.add_savings_entry(
+            {"id": entry_id, "user_id": user_id, "amount": 300}
+        )
+        # 같은 항목을 다시 보내도 잔액은 한 번만 늘어남
+        with pytest.raises(ValueError):
+            await backend.add_savings_entry({"id": entry_id, "user_id": user_id, "amount": 300})
+        new_user = await backend.add_savings_entry({"user_id": other_id, "amount": 50})
+        return first, new_user, await backend.get_user_summary(user_id)
+
+    first, new_user, summary = asyncio.run(scenario())
+    assert first["created"] is False
+    assert new_user["created"] is True
+    assert new_user["summary"]["total_savings"] == 50
+    assert summary["total_estimated"] == 1000
+    assert summary["total_savings"] == 300
+    assert summary["savings_count"] == 1
+
+
+def test_collection_surface(backend):
+    user_id = _id("user")
+    collection = asyncio.run(backend.get_collection("event_costs"))
+    for day in range(1, 4):
+        collection.create_item(
+            {"id": _id("cost"), "user_id": user_id, "saved_at": f"2024-01-0{day}"}
+        )
+
+    pages = collection.query_items(
+        query="SELECT * FROM c WHERE c.user_id = @user_id ORDER BY c.saved_at DESC",
+        parameters=[{"name": "@user_id", "value": user_id}],
+        enable_cross_partition_query=True,
+        max_item_count=2,
+    ).by_page()
+    first = list(next(pages))
+    second = list(next(pages))
+    assert [item["saved_at"] for item in first + second] == [
+        "2024-01-03",
+        "2024-01-02",
+        "2024-01-01",
+    ]
+
+
+def test_create_and_read_document(backend):
+    token_id = _id("token")
+
+    async def scenario():
+        created = await backend.create_document("refresh_tokens", {"id": token_id, "user_id": "a"})
+        with pytest.raises(ValueError):
+            await backend.create_document("refresh_tokens", {"id": token_id, "user_id": "b"})
+        return (
+            created,
+            await backend.read_document("refresh_tokens", token_id),
+            await backend.read_document("refresh_tokens", _id("missing")),
+        )
+
+    created, stored, missing = asyncio.run(scenario())
+    assert created["id"] == token_id
+    assert stored["id"] == token_id and stored["user_id"] == "a"
+    assert missing is None
+
+
+def test_update_document_and_change_feed(backend):
+    lease_id = _id("lease")
+
+    def claim(owner):
+        def mutate(current):
+            if current is not None and current.get("owner") not in (None, owner):
+                return None
+            return {**(current or {}), "owner": owner}
+
+        return mutate
+
+    async def scenario():
+        _, start = await backend.read_changes("leases", start_from_beginning=False)
+        first = await backend.update_document("leases", lease_id, claim("a"))
+        taken = await backend.update_document("leases", lease_id, claim("b"))
+        await backend.update_document("leases", lease_id, lambda d: {**d, "continuation": "1"})
+        changes, continuation = await backend.read_changes("leases", start)
+        empty, same = await backend.read_changes("leases", continuation)
+        return first, taken, changes, empty, same == continuation
+
+    first, taken, changes, empty, unchanged = asyncio.run(scenario())
+    assert first["id"] == lease_id and first["owner"] == "a"
+    assert taken is None
+    # 같은 문서의 여러 변경은 최신 버전 하나로 보임
+    assert [(d["id"], d["owner"], d["continuation"]) for d in changes] == [(lease_id, "a", "1")]
+    assert empty == [] and unchanged
+
+
+def test_benchmark_runs(backend):
+    results = asyncio.run(run_benchmark(backend, iterations=3))
+    assert all(row["ops_per_sec"] > 0 for row in results)
+    assert len({row["operation"] for row in results}) == len(results)
@@ -0,0 +1,186 @@
+import asyncio
+import uuid
+
+from app.db.change_feed import ChangeFeedProcessor, LeaseStore
+from app.db.database import db_service
+from app.db.mock_db import MockCollection
+from app.services import projections
+from app.services import summary as summary_service
+
+
+def _name(kind):
+    return f"feed-{kind}-{uuid.uuid4().hex}"
+
+
+def _drain(processor):
+    async def scenario():
+        total = 0
+        while True:
+            processed = await processor.run_once()
+            if not processed:
+                return total
+            total += processed
+
+    return asyncio.run(scenario())
+
+
+def test_processor_checkpoints_and_resumes():
+    collection_name = _name("docs")
+    collection = MockCollection(collection_name)
+    seen = []
+
+    async def handler(documents):
+        seen.extend(document["id"] for document in documents)
+
+    name = _name("processor")
+    for i in range(3):
+        collection.create_item({"id": f"d{i}"})
+    first = ChangeFeedProcessor(
+        db_service, name, {collection_name: handler}, owner="worker-1", batch_size=2
+    )
+    assert _drain(first) == 3
+
+    # 재시작한 작업자는 체크포인트 이후의 변경만 받음
+    collection.upsert_item({"id": "d1", "value": 1})
+    restarted = ChangeFeedProcessor(
+        db_service, name, {collection_name: handler}, owner="worker-1", batch_size=2
+    )
+    assert _drain(restarted) == 1
+    assert seen == ["d0", "d1", "d2", "d1"]
+
+
+def test_lease_is_exclusive_until_it_expires():
+    now = [1000.0]
+    leases = LeaseStore(db_service, clock=lambda: now[0])
+    lease_id = _name("lease")
+
+    async def scenario():
+        first = await leases.acquire(lease_id, "a", 30)
+        blocked = await leases.acquire(lease_id, "b", 30)
+        now[0] += 31
+        taken = await leases.acquire(lease_id, "b", 30)
+        stale_checkpoint = await leases.checkpoint(lease_id, "a", "x", 30)
+        released = await leases.release(lease_id, "b")
+        again = await leases.acquire(lease_id, "a", 30)
+        return first, blocked, taken, stale_checkpoint, released, again
+
+    first, blocked, taken, stale_checkpoint, released, again = asyncio.run(scenario())
+    assert first["owner"] == "a"
+    assert blocked is None
+    assert taken["owner"] == "b"
+    assert stale_checkpoint is False
+    assert released is True
+    assert again["owner"] == "a"
+
+
+def test_failed_batch_is_not_checkpointed():
+    collection_name = _name("docs")
+    MockCollection(collection_name).create_item({"id": "d0"})
+    attempts = []
+
+    async def flaky(documents):
+        attempts.append([document["id"] for document in documents])
+        if len(attempts) == 1:
+            raise RuntimeError("handler failed")
+
+    processor = ChangeFeedProcessor(db_service, _name("processor"), {collection_name: flaky})
+    assert asyncio.run(processor.run_once()) == 0
+    assert processor.failures == 1
+    assert asyncio.run(processor.run_once()) == 1
+    assert attempts == [["d0"], ["d0"]]
+
+
+def test_projections_update_summary_user_and_fan_count():
+    user_id, artist_id = _name("user"), _name("artist")
+    processor = ChangeFeedProcessor(
+        db_service,
+        _name("projections"),
+        {
+            "event_costs": projections.project_event_costs,
+            "fan_preferences": projections.project_fan_preferences,
+        },
+        batch_size=1000,
+    )
+
+    async def setup():
+        await db_service.create_user({"userId": user_id, "email": f"{user_id}@example.com"})
+        await db_service.create_artist({"artistId": artist_id, "name": "A", "fanCount": 0})
+        await db_service.db.create_fan_preference(
+            {"artistId": artist_id, "userId": user_id}, update_fan_count=False
+        )
+
+    asyncio.run(setup())
+    costs = MockCollection("event_costs")
+    for saved_at, total, suggestion in [("2024-05-01", 1000, 100), ("2024-05-02", 3000, 300)]:
+        costs.create_item(
+            {
+                "id": uuid.uuid4().hex,
+                "user_id": user_id,
+                "saved_at": saved_at,
+                "total_estimated": total,
+                "monthly_savings_suggestion": suggestion,
+            }
+        )
+    _drain(processor)
+    # 같은 배치를 다시 처리해도 결과는 같음
+    redelivered = costs.query_items(
+        query="SELECT * FROM c WHERE c.user_id = @user_id",
+        parameters=[{"name": "@user_id", "value": user_id}],
+    )
+    asyncio.run(projections.project_event_costs(list(redelivered)))
+
+    async def results():
+        return (
+            await summary_service.get_summary(user_id),
+            await db_service.get_user(user_id),
+            await db_service.get_artist(artist_id),
+        )
+
+    summary, user, artist = asyncio.run(results())
+    assert summary["total_estimated"] == 4000 and summary["cost_count"] == 2
+    assert user["total_estimated_expenses"] == 4000
+    assert user["monthly_savings_suggestion"] == 300
+    assert artist["fanCount"] == 1
+
+
+def test_cache_processor_invalidates_artist_cache():
+    artist_id = _name("artist")
+    asyncio.run(db_service.create_artist({"artistId": artist_id, "name": "A"}))
+    processor = projections.cache_processor()
+    asyncio.run(processor.run_once())
+
+    assert asyncio.run(db_service.get_artist(artist_id))["name"] == "A"
+    # 다른 작업자의 쓰기: 이 프로세스의 캐시를 거치지 않음
+    asyncio.run(db_service.db.update_artist(artist_id, {"name": "B"}))
+    asyncio.run(processor.run_once())
+    assert asyncio.run(db_service.get_artist(artist_id))["name"] == "B"
+
+
+def test_projections_fold_batches_without_rebuilding(monkeypatch):
+    user_id = _name("user")
+
+    async def setup():
+        await db_service.create_user({"userId": user_id, "email": f"{user_id}@example.com"})
+        await summary_service.add_savings(
+            user_id, {"id": uuid.uuid4().hex, "saved_at": "2024-05-01", "amount": 500}
+        )
+
+    asyncio.run(setup())
+
+    async def no_rebuild(uid):
+        raise AssertionError("a user with a summary must not be rebuilt from history")
+
+    monkeypatch.setattr(projections, "rebuild_summary", no_rebuild)
+    cost = {"id": uuid.uuid4().hex, "user_id": user_id, "saved_at": "2024-05-02", "total_estimated": 2000}
+    legacy = {"id": uuid.uuid4().hex, "user_id": user_id, "saved_at": "2024-04-01", "amount": 300}
+
+    async def deliver_twice():
+        for _ in range(2):
+            await projections.project_event_costs([cost])
+            await projections.project_savings_history([legacy])
+        return await summary_service.get_summary(user_id)
+
+    summary = asyncio.run(deliver_twice())
+    # 저금 (sproc 경로) 과 비용 (프로젝션) 이 서로를 덮어쓰지 않음
+    assert summary["total_estimated"] == 2000 and summary["cost_count"] == 1
+    assert summary["total_savings"] == 800 and summary["savings_count"] == 2
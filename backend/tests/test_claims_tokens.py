@@ -0,0 +1,100 @@
+import asyncio
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.db.database import CLAIMS_VERSION_FIELD, db_service
+from app.db.principal_cache import ClaimsVersions
+from app.main import app
+from app.routers import auth as auth_router
+from app.services import auth as auth_service
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(auth_service, "ACCESS_TOKEN_CLAIMS", True)
+    monkeypatch.setattr(auth_router, "ACCESS_TOKEN_CLAIMS", True)
+    with TestClient(app) as client:
+        yield client
+
+
+def _login(client):
+    email = f"claims-{uuid.uuid4().hex}@example.com"
+    client.post(
+        "/api/auth/register",
+        json={"email": email, "username": "claims", "password": "secret123"},
+    )
+    response = client.post("/api/auth/login", json={"email": email, "password": "secret123"})
+    return response.json()
+
+
+def _auth(tokens):
+    return {"Authorization": f"Bearer {tokens['access_token']}"}
+
+
+def test_read_endpoints_skip_the_user_lookup(client, monkeypatch):
+    tokens = _login(client)
+
+    async def no_user_reads(user_id):
+        raise AssertionError("identity must come from the token")
+
+    monkeypatch.setattr(db_service.db, "get_user", no_user_reads)
+    db_service.principal_cache.invalidate()
+    response = client.get("/api/users/summary", headers=_auth(tokens))
+    assert response.status_code == 200
+    assert response.json()["user_id"] == tokens["user"]["userId"]
+
+
+def test_profile_change_forces_a_new_token(client):
+    tokens = _login(client)
+    info = {"area": "大阪", "content_interests": ["ライブ"], "preferred_artists": ["yoasobi"]}
+    assert client.post("/api/auth/register/info", json=info, headers=_auth(tokens)).status_code == 200
+
+    # 프로필 변경 전 클레임을 가진 토큰은 거부됨
+    stale = client.get("/api/users/summary", headers=_auth(tokens))
+    assert stale.status_code == 401
+
+    refreshed = client.post("/api/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    fresh = refreshed.json()
+    claims = auth_service.jwt.decode(
+        fresh["access_token"], auth_service.SECRET_KEY, algorithms=[auth_service.ALGORITHM]
+    )["claims"]
+    assert claims["area"] == "大阪" and claims["cv"] == 1
+    assert client.get("/api/users/summary", headers=_auth(fresh)).status_code == 200
+
+
+def test_tokens_without_claims_fall_back_to_the_user(client, monkeypatch):
+    tokens = _login(client)
+    plain = auth_service.create_access_token({"sub": tokens["user"]["userId"]})
+    response = client.get("/api/users/summary", headers={"Authorization": f"Bearer {plain}"})
+    assert response.status_code == 200
+
+
+def test_untracked_users_are_checked_against_the_database(client, monkeypatch):
+    tokens = _login(client)
+    user_id = tokens["user"]["userId"]
+    # 다른 워커가 프로필을 바꾸고, 이 프로세스는 재시작되어 버전을 모름
+    asyncio.run(db_service.db.increment_user_fields(user_id, {CLAIMS_VERSION_FIELD: 1}))
+    monkeypatch.setattr(db_service, "claims_versions", ClaimsVersions())
+    db_service.principal_cache.invalidate()
+
+    response = client.get("/api/users/summary", headers=_auth(tokens))
+    assert response.status_code == 401
+
+
+def test_claims_versions_expire_without_the_change_feed():
+    now = [0.0]
+    versions = ClaimsVersions(ttl_seconds=30, clock=lambda: now[0])
+    versions.observe("u1", 2)
+    assert versions.get("u1") == 2
+    assert not versions.is_current(1, versions.get("u1"))
+
+    now[0] = 31
+    assert versions.get("u1") is None
+
+    # 변경 피드가 갱신하는 경우에는 만료되지 않음
+    fed = ClaimsVersions(ttl_seconds=None, clock=lambda: now[0])
+    fed.observe("u1", 2)
+    now[0] = 10_000
+    assert fed.get("u1") == 2
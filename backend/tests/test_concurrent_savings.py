@@ -0,0 +1,101 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.db import cosmos_db as cosmos_module
+from app.db.cosmos_db import USER_LEDGER_CONTAINER, USERS_CONTAINER, CosmosDB
+from app.db.cosmos_local import LocalCosmosServer
+from app.db.ledger import SAVINGS_ENTRY_TYPE
+
+WRITERS = 8
+ROUNDS = 5
+AMOUNT = 100
+
+
+@pytest.fixture
+def db():
+    # 요청마다 지연을 주어 스레드들의 읽기와 쓰기가 실제로 겹치게 함
+    with LocalCosmosServer(latency_ms=5, retry_after_ms=10) as server:
+        db = CosmosDB(server.endpoint, server.key)
+        assert db.provision()
+        db.initialize()
+        assert db.readiness()["ready"]
+        yield db
+
+
+def _run_writers(work):
+    with ThreadPoolExecutor(max_workers=WRITERS) as pool:
+        return list(pool.map(work, range(WRITERS)))
+
+
+def test_etag_retries_lose_no_updates(db, monkeypatch):
+    # 경쟁이 심해도 포기하지 않도록 재시도 한도를 넉넉히
+    monkeypatch.setattr(cosmos_module, "MAX_CONCURRENCY_RETRIES", WRITERS * ROUNDS)
+    container = db.get_container(USER_LEDGER_CONTAINER)
+    container.create_item(body={"id": "u1", "user_id": "u1", "total_savings": 0})
+
+    attempts = []
+    # 모든 스레드가 같은 버전을 읽은 뒤에 쓰므로 첫 라운드부터 충돌이 생김
+    first_read = threading.Barrier(WRITERS, timeout=10)
+    local = threading.local()
+
+    def work(_):
+        for round_ in range(ROUNDS):
+
+            def mutate(current):
+                attempts.append(1)
+                if round_ == 0 and not getattr(local, "waited", False):
+                    local.waited = True
+                    first_read.wait()
+                return {**current, "total_savings": current["total_savings"] + AMOUNT}
+
+            db._update_with_retry(container, "u1", "u1", mutate)
+
+    _run_writers(work)
+
+    stored = container.read_item(item="u1", partition_key="u1")
+    assert stored["total_savings"] == WRITERS * ROUNDS * AMOUNT
+    # 충돌한 쓰기는 ETag 검사로 거부되고 다시 읽어 재시도됨
+    assert len(attempts) >= WRITERS * ROUNDS + WRITERS - 1
+
+
+def test_parallel_increments_are_atomic(db):
+    asyncio.run(db.create_user({"userId": "u1", "email": "u1@example.com"}))
+
+    def work(_):
+        for _ in range(ROUNDS):
+            asyncio.run(db.increment_user_fields("u1", {"current_savings": AMOUNT}))
+
+    _run_writers(work)
+
+    user = db.get_container(USERS_CONTAINER).read_item(item="u1", partition_key="u1")
+    assert user["current_savings"] == WRITERS * ROUNDS * AMOUNT
+
+
+def test_parallel_savings_entries_update_the_summary_once_each(db):
+    def work(writer):
+        return [
+            asyncio.run(
+                db.add_savings_entry(
+                    {
+                        "id": f"entry-{writer}-{round_}",
+                        "user_id": "u1",
+                        "type": SAVINGS_ENTRY_TYPE,
+                        "amount": AMOUNT,
+                        "saved_at": f"2024-05-01T10:{writer:02d}:{round_:02d}",
+                    }
+                )
+            )
+            for round_ in range(ROUNDS)
+        ]
+
+    results = [result for batch in _run_writers(work) for result in batch]
+
+    summary = asyncio.run(db.get_user_summary("u1"))
+    assert summary["total_savings"] == WRITERS * ROUNDS * AMOUNT
+    assert summary["savings_count"] == WRITERS * ROUNDS
+    # 각 쓰기는 자기 항목까지 반영된 잔액을 받음: 100, 200, ... 이 한 번씩
+    balances = sorted(result["summary"]["total_savings"] for result in results)
+    assert balances == [AMOUNT * n for n in range(1, WRITERS * ROUNDS + 1)]
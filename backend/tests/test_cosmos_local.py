@@ -0,0 +1,110 @@
+import asyncio
+import time
+
+import pytest
+from azure.core import MatchConditions
+from azure.cosmos import exceptions
+
+from app.db.cosmos_db import CosmosDB
+from app.db.cosmos_local import LocalCosmosServer, apply_patch
+from app.db.pagination import InvalidContinuationToken, encode_continuation, query_page
+
+
+@pytest.fixture
+def server():
+    with LocalCosmosServer(retry_after_ms=10) as server:
+        yield server
+
+
+@pytest.fixture
+def db(server):
+    db = CosmosDB(server.endpoint, server.key)
+    assert db.provision()
+    db.initialize()
+    assert db.readiness()["ready"]
+    return db
+
+
+def test_throttled_requests_are_retried(server, db):
+    asyncio.run(db.create_user({"userId": "u1", "email": "u1@example.com"}))
+
+    server.throttle_next(2)
+    user = asyncio.run(db.get_user("u1"))
+
+    assert user["email"] == "u1@example.com"
+    assert server.stats()["throttled"] == 2
+
+
+def test_request_charge_and_etag(db):
+    container = db.get_container("users")
+    headers = {}
+    created = container.create_item(
+        body={"id": "u1", "userId": "u1"},
+        response_hook=lambda h, _: headers.update(h),
+    )
+    assert float(headers["x-ms-request-charge"]) > 0
+
+    container.replace_item(item="u1", body=dict(created, area="東京"))
+    with pytest.raises(exceptions.CosmosAccessConditionFailedError):
+        container.replace_item(
+            item="u1",
+            body=dict(created, area="大阪"),
+            etag=created["_etag"],
+            match_condition=MatchConditions.IfNotModified,
+        )
+    assert container.read_item(item="u1", partition_key="u1")["area"] == "東京"
+
+
+def test_query_pages_with_continuation(db):
+    collection = db.get_container("event_costs")
+    for day in range(1, 6):
+        collection.create_item({"id": f"c{day}", "user_id": "u1", "saved_at": f"2024-01-0{day}"})
+
+    query = "SELECT * FROM c WHERE c.user_id = @user_id ORDER BY c.saved_at DESC"
+    parameters = [{"name": "@user_id", "value": "u1"}]
+    first, continuation = query_page(collection, query, parameters, limit=3)
+    second, last = query_page(collection, query, parameters, limit=3, continuation=continuation)
+
+    assert [row["id"] for row in first + second] == ["c5", "c4", "c3", "c2", "c1"]
+    assert last is None
+
+
+def test_rejected_continuation_is_an_invalid_token(db):
+    collection = db.get_container("event_costs")
+    query = "SELECT * FROM c WHERE c.user_id = @user_id"
+    parameters = [{"name": "@user_id", "value": "u1"}]
+    # 형식은 맞지만 Cosmos DB 가 400 으로 거부하는 토큰
+    with pytest.raises(InvalidContinuationToken):
+        query_page(
+            collection, query, parameters, limit=3, continuation=encode_continuation("tampered")
+        )
+
+
+def test_latency_is_injected():
+    with LocalCosmosServer(latency_ms=30) as server:
+        db = CosmosDB(server.endpoint, server.key)
+        db.provision()
+        db.initialize()
+        started = time.perf_counter()
+        asyncio.run(db.get_user_summary("missing"))
+        assert time.perf_counter() - started >= 0.03
+
+
+def test_patch_operations():
+    document = {"id": "u1", "count": 1, "tags": ["a"], "monthly": {}}
+    apply_patch(
+        document,
+        [
+            {"op": "incr", "path": "/count", "value": 2},
+            {"op": "incr", "path": "/total", "value": 5},
+            {"op": "add", "path": "/tags/-", "value": "b"},
+            {"op": "set", "path": "/monthly/2024-01", "value": {"savings": 1}},
+            {"op": "remove", "path": "/id"},
+        ],
+    )
+    assert document == {
+        "count": 3,
+        "total": 5,
+        "tags": ["a", "b"],
+        "monthly": {"2024-01": {"savings": 1}},
+    }
@@ -0,0 +1,82 @@
+import time
+
+from azure.cosmos import exceptions
+
+from app.db.cosmos_db import CONTAINER_SPECS, USER_LEDGER_CONTAINER, CosmosDB
+
+LOOKUP_SECONDS = 0.2
+
+
+class FakeContainer:
+    def __init__(self, name, delay):
+        self.name = name
+        self.delay = delay
+
+    def read(self):
+        time.sleep(self.delay)
+        if self.name == USER_LEDGER_CONTAINER:
+            raise exceptions.CosmosResourceNotFoundError(message="not found")
+        return {"id": self.name}
+
+
+class FakeDatabase:
+    def __init__(self, delays=None):
+        self.delays = delays or {}
+
+    def get_container_client(self, name):
+        return FakeContainer(name, self.delays.get(name, LOOKUP_SECONDS))
+
+
+def test_containers_are_resolved_concurrently():
+    db = CosmosDB()
+    db.database = FakeDatabase()
+    db.initialized = True
+
+    started = time.perf_counter()
+    db._resolve_containers()
+    elapsed = time.perf_counter() - started
+
+    # 순차 조회였다면 컨테이너 수 * LOOKUP_SECONDS 가 걸림
+    assert elapsed < LOOKUP_SECONDS * len(CONTAINER_SPECS) / 2
+    assert db.container_states[USER_LEDGER_CONTAINER] == "missing"
+    assert db.container_states["users"] == "ready"
+    assert db.readiness()["ready"] is False
+
+
+def test_slow_containers_time_out():
+    db = CosmosDB()
+    db.database = FakeDatabase({"users": 2})
+    db.initialized = True
+
+    started = time.perf_counter()
+    db._resolve_containers(timeout=0.5)
+
+    assert time.perf_counter() - started < 1
+    assert db.container_states["users"] == "timeout"
+
+
+def test_readiness_retries_containers_that_were_not_ready():
+    database = FakeDatabase({"users": 2})
+    db = CosmosDB()
+    db.database = database
+    db.initialized = True
+    db._resolve_containers(timeout=0.5)
+    assert db.container_states["users"] == "timeout"
+
+    database.delays["users"] = 0
+    state = db.readiness()
+
+    assert state["containers"]["users"] == "ready"
+    # 없는 컨테이너는 다시 조회해도 missing
+    assert state["containers"][USER_LEDGER_CONTAINER] == "missing"
+
+
+def test_container_resolved_on_demand_is_ready():
+    db = CosmosDB()
+    db.database = FakeDatabase({"users": 2})
+    db.initialized = True
+    db._resolve_containers(timeout=0.5)
+
+    assert db.get_container("users") is not None
+    assert db.container_states["users"] == "ready"
+    assert db.container_states[USER_LEDGER_CONTAINER] == "missing"
@@ -0,0 +1,144 @@
+import asyncio
+
+from azure.core.paging import ItemPaged
+from fastapi.testclient import TestClient
+
+from app.db import metrics
+from app.db.metrics import (
+    BACKGROUND_ROUTE,
+    InstrumentedContainer,
+    begin_request,
+    db_metrics,
+    end_request,
+    normalize_query,
+)
+from app.db.cosmos_db import CosmosDB
+from app.db.cosmos_local import LocalCosmosServer
+from app.main import app
+
+client = TestClient(app)
+
+
+class FakeContainer:
+    """
+    Calls response_hook the way ContainerProxy does: once per page, and once
+    when the query is created with the previous operation's headers.
+    """
+
+    id = "users"
+
+    def __init__(self, charge, pages=2):
+        self.charge = charge
+        self.pages = pages
+        self.last_response_headers = {"x-ms-request-charge": "99"}
+
+    def read_item(self, item, partition_key, response_hook=None):
+        response_hook({"x-ms-request-charge": str(self.charge)}, {"id": item})
+        return {"id": item}
+
+    def query_items(self, query, response_hook=None, **kwargs):
+        def get_next(token):
+            index = int(token or 0)
+            page = [{"id": str(index)}]
+            response_hook({"x-ms-request-charge": str(self.charge)}, page)
+            return page, str(index + 1) if index + 1 < self.pages else None
+
+        items = ItemPaged(get_next, lambda response: (response[1], iter(response[0])))
+        response_hook(self.last_response_headers, items)
+        return items
+
+
+def test_normalize_query_strips_literals():
+    assert (
+        normalize_query("SELECT * FROM c WHERE c.userId = 'u-1'  AND c.age > 20")
+        == "SELECT * FROM c WHERE c.userId = ? AND c.age > ?"
+    )
+    assert normalize_query("SELECT * FROM c WHERE c.id = @id") == (
+        "SELECT * FROM c WHERE c.id = @id"
+    )
+
+
+def test_operations_are_attributed_to_the_current_request():
+    db_metrics.reset()
+    container = InstrumentedContainer(FakeContainer(charge=2.5))
+
+    cost, token = begin_request()
+    try:
+        container.read_item("u1", partition_key="u1")
+        list(container.query_items("SELECT * FROM c WHERE c.type = 'user'"))
+    finally:
+        end_request(token)
+    db_metrics.record_request("/api/auth/login", cost)
+
+    # 요청 밖의 호출은 background 로 집계
+    container.read_item("u2", partition_key="u2")
+
+    assert cost.request_charge == 7.5
+    assert len(cost.operations) == 3
+
+    report = db_metrics.snapshot()
+    login = report["routes"]["/api/auth/login"]
+    assert login["requests"] == 1
+    assert login["request_charge"]["sum"] == 7.5
+    assert report["routes"][BACKGROUND_ROUTE]["operations"] == 1
+
+    top = report["top_queries"][0]
+    assert top["query"] == "SELECT * FROM c WHERE c.type = ?"
+    assert top["request_charge"]["count"] == 2
+
+
+def test_query_records_one_operation_per_page():
+    container = InstrumentedContainer(FakeContainer(charge=1.5, pages=3))
+
+    cost, token = begin_request()
+    try:
+        items = list(container.query_items("SELECT * FROM c"))
+    finally:
+        end_request(token)
+
+    # 생성 시점 호출 (이전 작업의 헤더) 은 기록되지 않음
+    assert len(items) == 3
+    assert len(cost.operations) == 3
+    assert cost.request_charge == 4.5
+
+
+def test_stored_procedure_charge_comes_from_its_own_response():
+    with LocalCosmosServer() as server:
+        db = CosmosDB(server.endpoint, server.key)
+        assert db.provision()
+        db.initialize()
+        container = db.get_container("user_ledger")
+        # 다른 스레드의 응답이 공유 클라이언트에 남아 있어도 영향 없음
+        container.client_connection.last_response_headers = {"x-ms-request-charge": "99"}
+
+        cost, token = begin_request()
+        try:
+            asyncio.run(
+                db.add_savings_entry(
+                    {"id": "s1", "user_id": "u1", "saved_at": "2024-05-01", "amount": 100}
+                )
+            )
+        finally:
+            end_request(token)
+
+    (operation,) = [op for op in cost.operations if op[1] == "execute_stored_procedure"]
+    assert 0 < operation[3] < 99
+
+
+def test_metrics_endpoints_are_disabled_by_default():
+    assert client.get("/metrics/db").status_code == 404
+    assert client.get("/metrics/auth").status_code == 404
+
+
+def test_metrics_endpoint_and_server_timing_header(monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_ENDPOINTS_ENABLED", True)
+    db_metrics.reset()
+    db_metrics.server_timing = True
+    try:
+        response = client.get("/health")
+    finally:
+        db_metrics.server_timing = False
+
+    assert response.headers["Server-Timing"].startswith("db;dur=")
+    report = client.get("/metrics/db").json()
+    assert report["routes"]["/health"]["requests"] == 1
@@ -0,0 +1,54 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from app.db.event_cache import EVENT_CACHE_GRACE_SECONDS, item_ttl
+from app.db.mock_db import mock_data, mock_db
+
+
+def _cache(artist_id, expires_in):
+    return {
+        "artistId": artist_id,
+        "eventData": {"live": []},
+        "computedAt": datetime.utcnow(),
+        "expiresAt": datetime.utcnow() + expires_in,
+    }
+
+
+def test_item_ttl_covers_lifetime_plus_grace():
+    now = datetime.utcnow()
+    assert item_ttl(now + timedelta(hours=1), now) == 3600 + EVENT_CACHE_GRACE_SECONDS
+
+
+def test_soft_and_hard_expiry():
+    async def scenario():
+        await mock_db.create_or_update_event_cache(_cache("fresh", timedelta(hours=1)))
+        await mock_db.create_or_update_event_cache(_cache("stale", timedelta(seconds=-1)))
+        await mock_db.create_or_update_event_cache(
+            _cache("gone", timedelta(seconds=-EVENT_CACHE_GRACE_SECONDS - 1))
+        )
+        return (
+            await mock_db.get_event_cache("fresh"),
+            await mock_db.get_event_cache("stale"),
+            await mock_db.get_event_cache("stale", allow_stale=True),
+            await mock_db.get_event_cache("gone", allow_stale=True),
+        )
+
+    fresh, stale, stale_allowed, gone = asyncio.run(scenario())
+    assert fresh["ttl"] > 0
+    assert stale is None
+    assert stale_allowed["artistId"] == "stale"
+    assert gone is None
+    assert "gone" not in mock_data["event_cache"]
+
+
+def test_compaction_report_purges_expired():
+    async def scenario():
+        await mock_db.create_or_update_event_cache(
+            _cache("old", timedelta(seconds=-EVENT_CACHE_GRACE_SECONDS - 1))
+        )
+        return await mock_db.event_cache_report()
+
+    report = asyncio.run(scenario())
+    assert report["purged"] >= 1
+    assert "old" not in mock_data["event_cache"]
+    assert report["documents"] == len(mock_data["event_cache"])
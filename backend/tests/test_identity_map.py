@@ -0,0 +1,98 @@
+import asyncio
+import uuid
+
+from fastapi.testclient import TestClient
+
+from app.db import identity_map
+from app.db import metrics as db_metrics_module
+from app.db.database import DatabaseService, db_service
+from app.db.identity_map import identity_map_stats
+from app.db.principal_cache import PrincipalCache
+from app.main import app
+from app.services.auth import get_current_user
+
+
+def _counting(monkeypatch, service, method):
+    calls = []
+    original = getattr(service.db, method)
+
+    async def counted(*args):
+        calls.append(args)
+        return await original(*args)
+
+    monkeypatch.setattr(service.db, method, counted)
+    return calls
+
+
+def test_reads_are_served_once_per_request(monkeypatch):
+    service = DatabaseService()
+    service.principal_cache = PrincipalCache(ttl_seconds=0)
+    user_id = f"user-{uuid.uuid4().hex}"
+    reads = _counting(monkeypatch, service, "get_user")
+    updates = _counting(monkeypatch, service, "update_user")
+
+    async def scenario():
+        await service.create_user({"userId": user_id, "email": f"{user_id}@example.com"})
+        documents, token = identity_map.begin_request()
+        try:
+            principal = await service.get_principal(user_id)
+            again = await service.get_user(user_id)
+            await service.update_user(user_id, {"area": "東京"})
+            after_write = await service.get_user(user_id)
+        finally:
+            identity_map.end_request(token)
+        # 요청 밖에서는 매번 백엔드에서 읽음
+        await service.get_user(user_id)
+        return documents, principal, again, after_write
+
+    documents, principal, again, after_write = asyncio.run(scenario())
+    assert again is principal
+    assert after_write["area"] == "東京"
+    assert len(reads) == 2
+    # 갱신에는 이번 요청에서 읽은 문서가 전달됨
+    assert updates[0][2] is principal
+    assert documents.loads == 1 and documents.hits == 2
+
+
+def test_artist_update_reads_the_artist_once(monkeypatch):
+    monkeypatch.setattr(db_metrics_module, "METRICS_ENDPOINTS_ENABLED", True)
+    artist_id = f"artist-{uuid.uuid4().hex}"
+    asyncio.run(db_service.create_artist({"artistId": artist_id, "name": "Before"}))
+    reads = _counting(monkeypatch, db_service, "get_artist")
+    app.dependency_overrides[get_current_user] = lambda: {"userId": "editor"}
+    identity_map_stats.reset()
+    try:
+        with TestClient(app) as client:
+            response = client.put(f"/api/artists/{artist_id}", json={"name": "After"})
+            metrics = client.get("/metrics/db").json()["identity_map"]
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    assert response.json()["name"] == "After"
+    assert len(reads) == 1
+    assert metrics["routes"]["/api/artists/{artist_id}"]["redundant_reads"] == 0
+
+
+def test_update_keeps_the_written_user_when_the_claims_bump_finds_none(monkeypatch):
+    service = DatabaseService()
+    user_id = f"user-{uuid.uuid4().hex}"
+
+    async def deleted(*args):
+        return None
+
+    async def scenario():
+        await service.create_user({"userId": user_id, "email": f"{user_id}@example.com"})
+        # 두 쓰기 사이에 사용자가 삭제된 경우
+        monkeypatch.setattr(service.db, "increment_user_fields", deleted)
+        documents, token = identity_map.begin_request()
+        try:
+            updated = await service.update_user(user_id, {"area": "東京"})
+            loaded = documents.get("users", user_id)
+        finally:
+            identity_map.end_request(token)
+        return updated, loaded
+
+    updated, loaded = asyncio.run(scenario())
+    assert updated["area"] == "東京"
+    assert loaded is updated
@@ -0,0 +1,82 @@
+import json
+
+from app.db.indexing import (
+    DEFAULT_INDEXING_POLICY,
+    INDEXING_POLICIES,
+    document_paths,
+    estimate_write_ru,
+    indexed_terms,
+    is_indexed,
+    supports_query,
+)
+
+
+def _event_cost_document():
+    # save_cost_data 가 저장하는 모양: /api/events/multiple-costs 의 결과에
+    # id, user_id, saved_at 을 붙인 문서
+    return {
+        "id": "cost-1",
+        "user_id": "u1",
+        "saved_at": "2024-05-01T10:00:00",
+        "artist": "YOASOBI",
+        "calculation_date": "2024-05-01T09:59:00",
+        "upcoming_events": [
+            {
+                "event_id": f"event-{i}",
+                "event_type": "concert",
+                "location": "Tokyo Dome",
+                "date": "2024-06-01",
+                "estimated_cost": {
+                    "transportation": 14000,
+                    "ticket": 9800,
+                    "hotel": 12000,
+                    "other": 5000,
+                },
+                "total_estimated": 40800,
+                "confidence": "中",
+            }
+            for i in range(8)
+        ],
+        "upcoming_goods": [],
+        "total_estimated": 326400,
+        "recommendation": "毎月少しずつ貯金しましょう。",
+        "monthly_savings_suggestion": 54400,
+    }
+
+
+def test_event_costs_policy_indexes_only_query_paths():
+    document = _event_cost_document()
+    size = len(json.dumps(document).encode())
+    policy = INDEXING_POLICIES["event_costs"]
+
+    indexed = {path for path in document_paths(document) if is_indexed(path, policy)}
+    assert indexed == {"/user_id", "/artist", "/saved_at"}
+    # LLM 이 만든 이벤트별 비용은 전부 제외 경로에 걸림
+    event_paths = [
+        path for path in document_paths(document) if path.startswith("/upcoming_events/")
+    ]
+    assert "/upcoming_events/[]/estimated_cost/hotel" in event_paths
+    assert not any(is_indexed(path, policy) for path in event_paths)
+    assert all(is_indexed(path, DEFAULT_INDEXING_POLICY) for path in event_paths)
+
+    assert indexed_terms(document, policy) == 3
+    assert indexed_terms(document, DEFAULT_INDEXING_POLICY) > 50
+    assert estimate_write_ru(document, policy, size) < estimate_write_ru(
+        document, DEFAULT_INDEXING_POLICY, size
+    ) / 2
+
+
+def test_history_queries_are_served_by_composite_indexes():
+    assert supports_query(
+        INDEXING_POLICIES["event_costs"], ["user_id"], order_by=("saved_at", True)
+    )
+    assert supports_query(
+        INDEXING_POLICIES["user_ledger"],
+        ["user_id", "type"],
+        order_by=("saved_at", True),
+    )
+    assert supports_query(INDEXING_POLICIES["fan_preferences"], ["artistId", "type"])
+    # 인덱스가 없는 경로로 정렬하면 composite index 가 필요함
+    assert not supports_query(
+        INDEXING_POLICIES["event_costs"], ["user_id"], order_by=("total_estimated", True)
+    )
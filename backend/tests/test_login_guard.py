@@ -0,0 +1,140 @@
+import asyncio
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.db.database import db_service
+from app.main import app
+from app.services import auth as auth_service
+from app.services.login_guard import (
+    DatabaseAttemptStore,
+    LoginGuard,
+    LoginThrottledError,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _guard(clock, store=None, **kwargs):
+    options = dict(
+        window_seconds=900,
+        email_max_failures=5,
+        ip_max_failures=8,
+        lockout_seconds=600,
+        delay_after=2,
+        base_delay_seconds=1,
+        max_delay_seconds=60,
+        enabled=True,
+        clock=clock,
+    )
+    options.update(kwargs)
+    return LoginGuard(store, **options)
+
+
+def test_progressive_delay_then_lockout():
+    clock = FakeClock()
+    guard = _guard(clock)
+
+    async def scenario():
+        await guard.record_failure("a@example.com", "1.2.3.4")
+        await guard.record_failure("a@example.com", "1.2.3.4")
+        # 2번 실패 후 1초, 3번 후 2초 기다려야 함
+        with pytest.raises(LoginThrottledError) as first:
+            await guard.check("A@example.com", "1.2.3.4")
+        assert first.value.retry_after_seconds == 1
+        clock.now += 1
+        await guard.check("a@example.com", "1.2.3.4")
+        await guard.record_failure("a@example.com", "1.2.3.4")
+        with pytest.raises(LoginThrottledError) as second:
+            await guard.check("a@example.com", "1.2.3.4")
+        assert second.value.retry_after_seconds == 2
+
+        for _ in range(2):
+            clock.now += 60
+            await guard.record_failure("a@example.com", "1.2.3.4")
+        clock.now += 60
+        with pytest.raises(LoginThrottledError) as locked:
+            await guard.check("a@example.com", "1.2.3.4")
+        assert locked.value.retry_after_seconds == 540
+        clock.now += 540
+        await guard.check("a@example.com", "1.2.3.4")
+
+    asyncio.run(scenario())
+    assert guard.stats()["lockouts"] == 1
+
+
+def test_ip_is_locked_across_emails_and_success_clears_only_the_email():
+    clock = FakeClock()
+    guard = _guard(clock)
+
+    async def scenario():
+        for i in range(8):
+            await guard.record_failure(f"user{i}@example.com", "5.6.7.8")
+        with pytest.raises(LoginThrottledError):
+            await guard.check("new@example.com", "5.6.7.8")
+        # 다른 IP 에서는 같은 이메일로 시도 가능
+        await guard.check("new@example.com", "9.9.9.9")
+
+        await guard.record_failure("b@example.com", "9.9.9.9")
+        await guard.record_failure("b@example.com", "9.9.9.9")
+        await guard.record_success("b@example.com", "9.9.9.9")
+        await guard.check("b@example.com", "9.9.9.9")
+        with pytest.raises(LoginThrottledError):
+            await guard.check("b@example.com", "5.6.7.8")
+
+    asyncio.run(scenario())
+
+
+def test_database_store_is_shared_between_guards():
+    clock = FakeClock()
+    email = f"shared-{uuid.uuid4().hex}@example.com"
+    first = _guard(clock, DatabaseAttemptStore(db_service))
+    second = _guard(clock, DatabaseAttemptStore(db_service))
+
+    async def scenario():
+        await first.record_failure(email, None)
+        await first.record_failure(email, None)
+        with pytest.raises(LoginThrottledError):
+            await second.check(email, None)
+        await second.record_success(email, None)
+        await first.check(email, None)
+
+    asyncio.run(scenario())
+
+
+def test_throttled_login_is_rejected_before_the_user_lookup(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(auth_service, "login_guard", _guard(clock))
+    email = f"guard-{uuid.uuid4().hex}@example.com"
+
+    with TestClient(app) as client:
+        client.post(
+            "/api/auth/register",
+            json={"email": email, "username": "guard", "password": "secret123"},
+        )
+        for _ in range(2):
+            wrong = client.post("/api/auth/login", json={"email": email, "password": "nope"})
+            assert wrong.status_code == 401
+
+        async def no_lookups():
+            raise AssertionError("throttled attempts must not reach the database")
+
+        with monkeypatch.context() as patched:
+            patched.setattr(db_service, "get_all_users", no_lookups)
+            throttled = client.post(
+                "/api/auth/login", json={"email": email, "password": "secret123"}
+            )
+        assert throttled.status_code == 429
+        assert throttled.headers["Retry-After"] == "1"
+
+        clock.now += 1
+        assert client.post(
+            "/api/auth/login", json={"email": email, "password": "secret123"}
+        ).status_code == 200
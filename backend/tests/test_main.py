@@ -26,3 +26,9 @@ def test_read_item():
     response = client.get("/api/items/1")
     assert response.status_code == 200
     assert response.json()["id"] == 1
+
+
+def test_readiness_check():
+    response = client.get("/health/ready")
+    assert response.status_code == 200
+    assert response.json()["ready"] is True
@@ -0,0 +1,80 @@
+import asyncio
+import json
+import uuid
+
+import pytest
+
+from app.db.mock_db import mock_db
+
+
+def test_reads_are_copy_on_write_views():
+    async def scenario():
+        user = await mock_db.create_user(
+            {
+                "userId": str(uuid.uuid4()),
+                "email": "frozen@example.com",
+                "password": "x",
+                "preferences": ["music"],
+                "profile": {"area": "大阪"},
+            }
+        )
+        first = await mock_db.get_user(user["userId"])
+        # 호출자는 (복사 요청 없이) 자유롭게 수정할 수 있음
+        first["email"] = "changed@example.com"
+        first["preferences"].append("travel")
+        first["profile"]["area"] = "東京"
+        del first["password"]
+        second = await mock_db.get_user(user["userId"])
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first["preferences"] == ["music", "travel"]
+    assert "password" not in first
+    # 저장된 레코드는 그대로
+    assert second == {
+        "userId": second["userId"],
+        "email": "frozen@example.com",
+        "password": "x",
+        "preferences": ["music"],
+        "profile": {"area": "大阪"},
+    }
+    assert type(second["preferences"]) is list
+    assert json.loads(json.dumps(second))["profile"] == {"area": "大阪"}
+
+
+def test_update_builds_new_record():
+    async def scenario():
+        user_id = str(uuid.uuid4())
+        await mock_db.create_user({"userId": user_id, "area": "大阪", "password": "x"})
+        before = await mock_db.get_user(user_id)
+        await mock_db.update_user(user_id, {"area": "東京"})
+        after = await mock_db.get_user(user_id)
+        return before, after
+
+    before, after = asyncio.run(scenario())
+    # 이전에 읽은 스냅샷은 그대로 남음
+    assert before["area"] == "大阪"
+    assert after["area"] == "東京"
+    assert after["password"] == "x"
+
+
+def test_fan_preferences_are_keyed_and_indexed():
+    artist_id, user_id = str(uuid.uuid4()), str(uuid.uuid4())
+
+    async def scenario():
+        await mock_db.create_fan_preference(
+            {"artistId": artist_id, "userId": user_id, "interests": ["live"]}
+        )
+        with pytest.raises(ValueError):
+            await mock_db.create_fan_preference(
+                {"artistId": artist_id, "userId": user_id, "interests": ["goods"]}
+            )
+        await mock_db.update_fan_preference(artist_id, user_id, {"interests": ["goods"]})
+        return (
+            await mock_db.get_fan_preferences_by_artist(artist_id),
+            await mock_db.get_fan_preferences_by_user(user_id),
+        )
+
+    by_artist, by_user = asyncio.run(scenario())
+    assert by_artist == by_user
+    assert [pref["interests"] for pref in by_artist] == [["goods"]]
@@ -0,0 +1,59 @@
+import os
+
+from app.db.mock_db import MockTable
+from app.db.mock_persistence import MockJournal
+
+
+def _open(directory, **options):
+    journal = MockJournal(str(directory), fsync_interval=60, **options)
+    restored = journal.open()
+    table = MockTable()
+    if "users" in restored:
+        table._load(restored["users"].load())
+    table.attach("users", journal)
+    journal.start(lambda: {"users": table})
+    return journal, table
+
+
+def test_log_replay_after_crash(tmp_path):
+    journal, users = _open(tmp_path)
+    users["u1"] = {"userId": "u1", "tags": ["a", "b"]}
+    users["u2"] = {"userId": "u2"}
+    users["u1"] = {**users["u1"], "area": "東京"}
+    del users["u2"]
+    # 프로세스가 죽은 것처럼 스냅샷 없이 로그만 남김
+    journal.close(compact=False)
+
+    _, restored = _open(tmp_path)
+    assert restored == {"u1": {"userId": "u1", "tags": ("a", "b"), "area": "東京"}}
+    assert restored.candidates({"userId": "u1"}) == [restored["u1"]]
+
+
+def test_torn_tail_is_dropped(tmp_path):
+    journal, users = _open(tmp_path)
+    users["u1"] = {"userId": "u1"}
+    journal.close(compact=False)
+
+    (log,) = [name for name in os.listdir(tmp_path) if name.startswith("oplog-")]
+    with open(tmp_path / log, "ab") as f:
+        f.write(b"\x40\x00\x00\x00partial")
+
+    journal, restored = _open(tmp_path)
+    assert list(restored) == ["u1"]
+    restored["u2"] = {"userId": "u2"}
+    journal.close(compact=False)
+
+    _, restored = _open(tmp_path)
+    assert sorted(restored) == ["u1", "u2"]
+
+
+def test_compaction_starts_new_generation(tmp_path):
+    journal, users = _open(tmp_path)
+    users["u1"] = {"userId": "u1"}
+    journal.compact()
+    users["u2"] = {"userId": "u2"}
+    journal.close(compact=False)
+
+    assert sorted(os.listdir(tmp_path)) == ["oplog-00000001.log", "snapshot-00000001.bin"]
+    _, restored = _open(tmp_path)
+    assert sorted(restored) == ["u1", "u2"]
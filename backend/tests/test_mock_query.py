@@ -0,0 +1,80 @@
+import pytest
+
+from app.db.mock_db import MockCollection, MockTable, mock_data
+from app.db.mock_query import QuerySyntaxError, bind_parameters, execute, parse_query
+
+DOCS = [
+    {"id": "1", "user_id": "u1", "artist": "A", "saved_at": "2024-01-02", "upcoming_events": [1, 2]},
+    {"id": "2", "user_id": "u1", "artist": "B", "saved_at": "2024-01-03", "upcoming_events": [1]},
+    {"id": "3", "user_id": "u2", "artist": "A", "saved_at": "2024-01-01"},
+    {"id": "4", "user_id": "u1", "artist": "A", "saved_at": 20240104},
+]
+
+
+def _run(query, parameters=None):
+    return execute(parse_query(query), DOCS, bind_parameters(parameters))
+
+
+def test_where_order_and_parameters():
+    rows = _run(
+        "SELECT * FROM c WHERE c.user_id = @user_id ORDER BY c.saved_at DESC",
+        [{"name": "@user_id", "value": "u1"}],
+    )
+    # 숫자는 문자열보다 앞에 정렬됨 (Cosmos 타입 순서)
+    assert [row["id"] for row in rows] == ["2", "1", "4"]
+
+
+def test_duplicate_check_query_shape():
+    rows = _run(
+        """
+        SELECT * FROM c
+        WHERE c.user_id = 'u1'
+        AND c.artist = 'A'
+        AND ARRAY_LENGTH(c.upcoming_events) = 2
+        AND c.saved_at > '2024-01-01'
+        """
+    )
+    assert [row["id"] for row in rows] == ["1"]
+
+
+def test_missing_and_mismatched_types_do_not_match():
+    # saved_at 이 숫자인 문서는 문자열과 비교되지 않음
+    rows = _run("SELECT VALUE c.id FROM c WHERE c.saved_at > '2024-01-01'")
+    assert rows == ["1", "2"]
+    assert _run("SELECT VALUE COUNT(1) FROM c WHERE c.missing = 1") == [0]
+
+
+def test_projection_and_top():
+    rows = _run("SELECT TOP 2 c.id, c.artist AS name FROM c ORDER BY c.id")
+    assert rows == [{"id": "1", "name": "A"}, {"id": "2", "name": "B"}]
+
+
+def test_unsupported_sql_is_rejected():
+    with pytest.raises(QuerySyntaxError):
+        parse_query("SELECT * FROM c JOIN t IN c.tags")
+
+
+def test_collection_queries_use_hash_indexes():
+    name = "indexed_test"
+    mock_data[name] = MockTable(
+        {"user_id": f"u{i % 1000}", "type": "savings_entry", "amount": i}
+        for i in range(50000)
+    )
+    collection = MockCollection(name)
+
+    assert len(mock_data[name].candidates({"user_id": "u7", "type": "savings_entry"})) == 50
+    rows = list(
+        collection.query_items(
+            "SELECT * FROM c WHERE c.user_id = @user_id AND c.amount >= 40000",
+            parameters=[{"name": "@user_id", "value": "u7"}],
+        )
+    )
+    assert sorted(row["amount"] for row in rows) == [
+        i for i in range(40000, 50000) if i % 1000 == 7
+    ]
+
+    # 쓰기 후에도 인덱스가 유지됨
+    collection.upsert_item({**rows[0], "user_id": "moved"})
+    assert len(mock_data[name].candidates({"user_id": "u7"})) == 49
+    assert len(mock_data[name].candidates({"user_id": "moved"})) == 1
+    del mock_data[name]
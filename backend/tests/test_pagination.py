@@ -0,0 +1,78 @@
+import uuid
+
+from fastapi.testclient import TestClient
+
+from app.db.mock_db import MockCollection, mock_data
+from app.db.pagination import (
+    decode_continuation,
+    encode_continuation,
+    query_page,
+)
+from app.main import app
+from app.services.auth import get_current_claims
+
+client = TestClient(app)
+
+
+def _fill(collection_name, count):
+    mock_data[collection_name] = []
+    collection = MockCollection(collection_name)
+    for i in range(count):
+        collection.create_item({"user_id": "u1", "saved_at": f"2024-01-{i + 1:02d}"})
+    return collection
+
+
+def test_continuation_round_trip():
+    assert encode_continuation(None) is None
+    assert decode_continuation(encode_continuation("42")) == "42"
+
+
+def test_query_page_walks_all_pages():
+    collection = _fill(f"test_{uuid.uuid4().hex}", 25)
+
+    seen = []
+    continuation = None
+    pages = 0
+    while True:
+        items, continuation = query_page(
+            collection, "SELECT * FROM c", limit=10, continuation=continuation
+        )
+        assert len(items) <= 10
+        seen.extend(items)
+        pages += 1
+        if not continuation:
+            break
+
+    assert pages == 3
+    assert len({item["id"] for item in seen}) == 25
+
+
+def test_history_endpoint_is_paginated():
+    mock_data["user_ledger"] = {}
+    ledger = MockCollection("user_ledger")
+    for i in range(7):
+        ledger.create_item(
+            {"user_id": "u1", "type": "savings_entry", "amount": 100, "saved_at": f"2024-01-{i + 1:02d}"}
+        )
+    app.dependency_overrides[get_current_claims] = lambda: {"userId": "u1"}
+    try:
+        response = client.get("/api/savings/history", params={"limit": 5})
+        assert response.status_code == 200
+        body = response.json()
+        assert body["count"] == 5
+        assert body["current_savings"] == 700
+        assert body["continuation"]
+
+        response = client.get(
+            "/api/savings/history",
+            params={"limit": 5, "continuation": body["continuation"]},
+        )
+        assert response.json()["count"] == 2
+        assert response.json()["continuation"] is None
+
+        response = client.get(
+            "/api/savings/history", params={"continuation": "not-a-token"}
+        )
+        assert response.status_code == 400
+    finally:
+        app.dependency_overrides.clear()
@@ -0,0 +1,106 @@
+import asyncio
+import threading
+import time
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.db import metrics
+from app.main import app
+from app.services import auth as auth_service
+from app.services.password_hashing import PasswordHasher, PasswordHashingBusyError
+
+
+class SlowContext:
+    """Stands in for passlib's CryptContext with a controllable cost."""
+
+    def __init__(self, seconds=0.0, gate=None):
+        self.seconds = seconds
+        self.gate = gate
+
+    def hash(self, password):
+        if self.gate is not None:
+            self.gate.wait(5)
+        time.sleep(self.seconds)
+        return f"hashed:{password}"
+
+    def verify(self, password, hashed_password):
+        return self.hash(password) == hashed_password
+
+
+def test_hashing_does_not_block_the_event_loop():
+    hasher = PasswordHasher(SlowContext(seconds=0.2), workers=1)
+    ticks = []
+
+    async def ticker():
+        for _ in range(10):
+            ticks.append(time.perf_counter())
+            await asyncio.sleep(0.01)
+
+    async def scenario():
+        hashed, _ = await asyncio.gather(hasher.hash("pw"), ticker())
+        return hashed, await hasher.verify("pw", hashed)
+
+    hashed, verified = asyncio.run(scenario())
+    hasher.shutdown()
+    assert hashed == "hashed:pw" and verified
+    # 해싱 중에도 다른 코루틴이 계속 실행됨
+    assert len(ticks) == 10 and ticks[-1] - ticks[0] < 0.2
+    stats = hasher.stats()
+    assert stats["hashed"] == 1 and stats["verified"] == 1
+    assert stats["run_p50_ms"] >= 200
+
+
+def test_saturated_pool_sheds_load():
+    gate = threading.Event()
+    hasher = PasswordHasher(SlowContext(gate=gate), workers=1, max_queue=1)
+
+    async def scenario():
+        running = [asyncio.ensure_future(hasher.hash(f"pw{i}")) for i in range(2)]
+        await asyncio.sleep(0)
+        with pytest.raises(PasswordHashingBusyError) as busy:
+            await hasher.hash("one-too-many")
+        gate.set()
+        return busy.value, await asyncio.gather(*running)
+
+    busy, hashed = asyncio.run(scenario())
+    hasher.shutdown()
+    assert busy.retry_after_seconds >= 1
+    assert hashed == ["hashed:pw0", "hashed:pw1"]
+    stats = hasher.stats()
+    assert stats["rejected"] == 1 and stats["queued"] == 0 and stats["in_flight"] == 0
+
+
+def test_register_and_login_use_the_pool(monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_ENDPOINTS_ENABLED", True)
+    email = f"hash-{uuid.uuid4().hex}@example.com"
+    with TestClient(app) as client:
+        registered = client.post(
+            "/api/auth/register",
+            json={"email": email, "username": "hash", "password": "secret123"},
+        )
+        assert registered.status_code == 200
+        login = client.post("/api/auth/login", json={"email": email, "password": "secret123"})
+        assert login.status_code == 200
+        wrong = client.post("/api/auth/login", json={"email": email, "password": "nope"})
+        assert wrong.status_code == 401
+
+        stats = client.get("/metrics/auth").json()["password_hashing"]
+        assert stats["hashed"] >= 1 and stats["verified"] >= 2
+
+
+def test_login_answers_503_when_hashing_is_saturated(monkeypatch):
+    hasher = PasswordHasher(SlowContext(), workers=1, max_queue=0)
+    hasher.pending = 1  # 작업자 하나가 이미 사용 중
+    monkeypatch.setattr(auth_service, "password_hasher", hasher)
+
+    async def user_with_password(*args):
+        return [{"userId": "u1", "email": "busy@example.com", "password": "hashed:x"}]
+
+    monkeypatch.setattr(auth_service.db_service, "get_all_users", user_with_password)
+    with TestClient(app) as client:
+        response = client.post("/api/auth/login", json={"email": "busy@example.com", "password": "x"})
+
+    assert response.status_code == 503
+    assert int(response.headers["Retry-After"]) >= 1
@@ -0,0 +1,142 @@
+import asyncio
+import uuid
+
+import pytest
+
+from app.db.database import DatabaseService
+from app.db.principal_cache import PrincipalCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_principal_is_served_from_memory_until_invalidated():
+    service = DatabaseService()
+    service.principal_cache = PrincipalCache(ttl_seconds=30)
+    user_id = f"user-{uuid.uuid4().hex}"
+
+    async def scenario():
+        await service.create_user({"userId": user_id, "email": f"{user_id}@example.com"})
+        first = await service.get_principal(user_id)
+        second = await service.get_principal(user_id)
+        await service.update_user(user_id, {"area": "東京"})
+        updated = await service.get_principal(user_id)
+        await service.increment_user_fields(user_id, {"total_estimated_expenses": 100})
+        incremented = await service.get_principal(user_id)
+        return first, second, updated, incremented
+
+    first, second, updated, incremented = asyncio.run(scenario())
+
+    assert first == second
+    assert updated["area"] == "東京"
+    assert incremented["total_estimated_expenses"] == 100
+    # 캐시된 사용자를 고쳐도 캐시는 그대로
+    second["area"] = "大阪"
+    assert "area" not in first
+
+    stats = service.principal_cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 3
+
+
+def test_entries_expire_and_least_recently_used_is_evicted():
+    clock = Clock()
+    cache = PrincipalCache(ttl_seconds=30, max_entries=2, clock=clock)
+    loads = []
+
+    def loader(user_id):
+        async def load():
+            loads.append(user_id)
+            return {"userId": user_id}
+
+        return load
+
+    async def scenario():
+        for user_id in ["a", "b", "a", "c", "a", "b"]:
+            await cache.get(user_id, loader(user_id))
+        clock.now = 31
+        await cache.get("a", loader("a"))
+
+    asyncio.run(scenario())
+    # c 를 넣을 때 가장 오래 쓰지 않은 b 가 밀려남
+    assert loads == ["a", "b", "c", "b", "a"]
+    assert cache.stats()["evictions"] == 2
+
+
+def test_concurrent_misses_share_one_load():
+    cache = PrincipalCache(ttl_seconds=30)
+    loads = []
+
+    async def load():
+        loads.append(True)
+        await asyncio.sleep(0.01)
+        return {"userId": "u1"}
+
+    async def scenario():
+        return await asyncio.gather(*(cache.get("u1", load) for _ in range(20)))
+
+    users = asyncio.run(scenario())
+    assert len(loads) == 1
+    assert all(user == {"userId": "u1"} for user in users)
+    assert cache.stats()["coalesced"] == 19
+
+
+def test_waiters_load_again_when_the_leader_is_cancelled():
+    cache = PrincipalCache(ttl_seconds=30)
+    loads = []
+
+    async def scenario():
+        started = asyncio.Event()
+
+        async def hanging():
+            loads.append("leader")
+            started.set()
+            await asyncio.sleep(10)
+
+        async def load():
+            loads.append("waiter")
+            return {"userId": "u1"}
+
+        leader = asyncio.create_task(cache.get("u1", hanging))
+        await started.wait()
+        waiters = [asyncio.create_task(cache.get("u1", load)) for _ in range(2)]
+        await asyncio.sleep(0)
+        # 읽던 요청의 클라이언트가 연결을 끊은 경우
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await asyncio.gather(*waiters)
+
+    users = asyncio.run(scenario())
+    assert users == [{"userId": "u1"}, {"userId": "u1"}]
+    # 기다리던 요청 중 하나만 다시 읽고, 다른 하나는 그 결과를 함께 씀
+    assert loads == ["leader", "waiter"]
+
+
+def test_missing_users_and_failures_are_not_cached():
+    cache = PrincipalCache(ttl_seconds=30)
+    calls = []
+
+    async def missing():
+        calls.append("missing")
+        return None
+
+    async def failing():
+        calls.append("failing")
+        raise RuntimeError("db down")
+
+    async def scenario():
+        assert await cache.get("gone", missing) is None
+        assert await cache.get("gone", missing) is None
+        with pytest.raises(RuntimeError):
+            await cache.get("u1", failing)
+        with pytest.raises(RuntimeError):
+            await cache.get("u1", failing)
+
+    asyncio.run(scenario())
+    assert calls == ["missing", "missing", "failing", "failing"]
@@ -0,0 +1,91 @@
+import asyncio
+import uuid
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+from app.db import profiler
+from app.db.database import DatabaseService, db_service
+from app.db.profiler import ProfiledBackend, profile_llm
+from app.main import app
+
+
+def _types(report):
+    return sorted({finding["type"] for finding in report["findings"]})
+
+
+def test_flags_n_plus_one_scans_and_sequential_reads():
+    service = DatabaseService(profile=True)
+    artist_ids = [f"artist-{uuid.uuid4().hex}" for _ in range(5)]
+
+    async def scenario():
+        for artist_id in artist_ids:
+            await service.db.create_artist({"artistId": artist_id, "name": artist_id})
+        profile, token = profiler.begin_request()
+        try:
+            # 목록의 항목마다 한 번씩 읽는 전형적인 N+1
+            for artist_id in artist_ids:
+                await service.db.get_artist(artist_id)
+            await service.db.get_all_users()
+            collection = await service.get_collection("savings_history")
+            list(collection.query_items(query="SELECT * FROM c", enable_cross_partition_query=True))
+        finally:
+            profiler.end_request(token)
+        return profile.report()
+
+    report = asyncio.run(scenario())
+    assert report["db"]["operations"] == 7
+    assert _types(report) == ["full_scan", "n_plus_one", "select_star", "sequential"]
+    n_plus_one = next(f for f in report["findings"] if f["type"] == "n_plus_one")
+    assert n_plus_one == {
+        "type": "n_plus_one",
+        "operation": "MockDB.get_artist",
+        "shape": "get_artist",
+        "count": 5,
+    }
+    scans = [f["operation"] for f in report["findings"] if f["type"] == "full_scan"]
+    assert scans == ["MockDB.get_all_users", "savings_history.query_items"]
+
+
+def test_records_llm_calls_and_repeated_prompts(monkeypatch):
+    monkeypatch.setattr(profiler, "REQUEST_PROFILER_ENABLED", True)
+
+    class Completions:
+        def create(self, **kwargs):
+            return SimpleNamespace(usage=SimpleNamespace(total_tokens=42))
+
+    client = profile_llm(SimpleNamespace(chat=SimpleNamespace(completions=Completions())))
+    messages = [{"role": "user", "content": "予測して"}]
+
+    profile, token = profiler.begin_request()
+    try:
+        for _ in range(2):
+            client.chat.completions.create(model="gpt-4o", messages=messages)
+    finally:
+        profiler.end_request(token)
+
+    report = profile.report()
+    assert report["llm"]["calls"] == 2 and report["llm"]["tokens"] == 84
+    assert _types(report) == ["repeated_query"]
+    # 프로파일 밖의 호출은 기록되지 않음
+    client.chat.completions.create(model="gpt-4o", messages=messages)
+    assert len(profile.operations) == 2
+
+
+def test_login_full_scan_is_reported_in_the_header(monkeypatch):
+    email = f"profile-{uuid.uuid4().hex}@example.com"
+    with TestClient(app) as client:
+        client.post(
+            "/api/auth/register",
+            json={"email": email, "username": "profile", "password": "secret123"},
+        )
+        assert "X-Request-Profile" not in client.get("/health").headers
+
+        monkeypatch.setattr(profiler, "REQUEST_PROFILER_ENABLED", True)
+        monkeypatch.setattr(db_service, "db", ProfiledBackend(db_service.db))
+        response = client.post("/api/auth/login", json={"email": email, "password": "secret123"})
+
+    assert response.status_code == 200
+    header = response.headers["X-Request-Profile"]
+    assert header.startswith("db=")
+    assert "full_scan(MockDB.get_all_users)" in header
@@ -0,0 +1,114 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.db.database import db_service
+from app.main import app
+from app.services import refresh_tokens
+from app.services.refresh_tokens import InvalidRefreshToken
+
+
+@pytest.fixture
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+def _login(client):
+    email = f"refresh-{uuid.uuid4().hex}@example.com"
+    client.post(
+        "/api/auth/register",
+        json={"email": email, "username": "refresh", "password": "secret123"},
+    )
+    response = client.post("/api/auth/login", json={"email": email, "password": "secret123"})
+    assert response.status_code == 200
+    return response.json()
+
+
+def _me(client, access_token):
+    return client.get("/api/auth/me", headers={"Authorization": f"Bearer {access_token}"})
+
+
+def test_refresh_rotates_and_mints_a_new_access_token(client):
+    tokens = _login(client)
+
+    refreshed = client.post("/api/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert refreshed.status_code == 200
+    body = refreshed.json()
+    assert body["refresh_token"] != tokens["refresh_token"]
+    assert _me(client, body["access_token"]).status_code == 200
+
+    # 리프레시 토큰은 액세스 토큰으로 쓸 수 없음
+    assert _me(client, body["refresh_token"]).status_code == 401
+
+
+def test_reusing_a_rotated_token_revokes_the_session(client):
+    tokens = _login(client)
+    first = client.post("/api/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    latest = first.json()["refresh_token"]
+
+    reused = client.post("/api/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert reused.status_code == 401
+    # 도난 가능성이 있으므로 이후 발급된 토큰도 폐기됨
+    assert client.post("/api/auth/refresh", json={"refresh_token": latest}).status_code == 401
+
+
+def test_logout_revokes_the_refresh_token(client):
+    tokens = _login(client)
+    assert client.post("/api/auth/logout", json={"refresh_token": tokens["refresh_token"]}).status_code == 200
+    response = client.post("/api/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 401
+    assert client.post("/api/auth/refresh", json={"refresh_token": "garbage"}).status_code == 401
+
+
+def test_sessions_slide_but_not_past_the_maximum_lifetime(monkeypatch):
+    monkeypatch.setattr(refresh_tokens, "REFRESH_TOKEN_EXPIRE_DAYS", 14)
+    monkeypatch.setattr(refresh_tokens, "REFRESH_SESSION_MAX_DAYS", 20)
+    user_id = f"user-{uuid.uuid4().hex}"
+    started = datetime.utcnow()
+
+    async def scenario():
+        token = await refresh_tokens.issue_refresh_token(user_id, now=started)
+        # 10일 뒤 갱신: 만료가 다시 14일 뒤가 아니라 로그인 후 20일로 제한됨
+        _, token = await refresh_tokens.rotate_refresh_token(
+            token, now=started + timedelta(days=10)
+        )
+        claims = refresh_tokens._decode(token)
+        with pytest.raises(InvalidRefreshToken):
+            await refresh_tokens.rotate_refresh_token(token, now=started + timedelta(days=21))
+        return claims
+
+    claims = asyncio.run(scenario())
+    expires = datetime.utcfromtimestamp(claims["exp"])
+    assert abs(expires - (started + timedelta(days=20))) < timedelta(seconds=1)
+
+
+def test_rotation_reads_the_token_record_once(monkeypatch):
+    calls = []
+
+    def counting(name):
+        original = getattr(db_service.db, name)
+
+        async def counted(*args):
+            calls.append(name)
+            return await original(*args)
+
+        monkeypatch.setattr(db_service.db, name, counted)
+
+    counting("create_document")
+    counting("update_document")
+    user_id = f"user-{uuid.uuid4().hex}"
+
+    async def scenario():
+        token = await refresh_tokens.issue_refresh_token(user_id)
+        issued = list(calls)
+        await refresh_tokens.rotate_refresh_token(token)
+        return issued
+
+    issued = asyncio.run(scenario())
+    # 발급은 쓰기 한 번, 회전은 조건부 교체 (읽기 한 번) + 새 토큰 쓰기
+    assert issued == ["create_document"]
+    assert calls == ["create_document", "update_document", "create_document"]
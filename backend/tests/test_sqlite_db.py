@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+
+from app.db.ledger import empty_summary
+from app.db.pagination import query_page
+from app.db.sqlite_db import SQLiteDB
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = SQLiteDB(str(tmp_path / "app.db"), pool_size=4)
+    db.initialize()
+    yield db
+    db.close()
+
+
+def test_users_artists_and_preferences(db):
+    async def scenario():
+        await db.create_user({"userId": "u1", "email": "u1@example.com"})
+        with pytest.raises(ValueError):
+            await db.create_user({"userId": "u1", "email": "other@example.com"})
+        await db.update_user("u1", {"area": "東京", "userId": "ignored"})
+
+        await db.create_artist({"artistId": "a1", "name": "A", "fanCount": 0})
+        await db.create_fan_preference({"artistId": "a1", "userId": "u1", "interests": ["live"]})
+        with pytest.raises(ValueError):
+            await db.create_fan_preference({"artistId": "a1", "userId": "u1", "interests": []})
+        await db.update_fan_preference("a1", "u1", {"interests": ["goods"]})
+        return (
+            await db.get_user("u1"),
+            await db.get_artist("a1"),
+            await db.get_fan_preferences_by_artist("a1"),
+        )
+
+    user, artist, preferences = asyncio.run(scenario())
+    assert user["userId"] == "u1" and user["area"] == "東京"
+    # 중복 등록은 롤백되어 팬 수가 한 번만 증가
+    assert artist["fanCount"] == 1
+    assert [p["interests"] for p in preferences] == [["goods"]]
+
+
+def test_collection_queries_and_pagination(db):
+    collection = asyncio.run(db.get_collection("event_costs"))
+    for i in range(5):
+        collection.create_item(
+            {"user_id": "u1", "saved_at": f"2024-01-0{i + 1}", "upcoming_events": [1] * i}
+        )
+    collection.create_item({"user_id": "u2", "saved_at": "2024-01-09"})
+
+    rows = list(
+        collection.query_items(
+            "SELECT * FROM c WHERE c.user_id = 'u1' AND ARRAY_LENGTH(c.upcoming_events) = 2"
+        )
+    )
+    assert [row["saved_at"] for row in rows] == ["2024-01-03"]
+
+    query = "SELECT * FROM c WHERE c.user_id = @user_id ORDER BY c.saved_at DESC"
+    parameters = [{"name": "@user_id", "value": "u1"}]
+    first, continuation = query_page(collection, query, parameters, limit=3)
+    second, last = query_page(collection, query, parameters, limit=3, continuation=continuation)
+    assert [row["saved_at"] for row in first + second] == [
+        "2024-01-05",
+        "2024-01-04",
+        "2024-01-03",
+        "2024-01-02",
+        "2024-01-01",
+    ]
+    assert last is None
+
+
+def test_parallel_savings_entries_are_atomic(db):
+    asyncio.run(db.upsert_user_summary(empty_summary("u1")))
+
+    async def scenario():
+        await asyncio.gather(
+            *(db.add_savings_entry({"user_id": "u1", "amount": 100}) for _ in range(32))
+        )
+        return await db.get_user_summary("u1")
+
+    summary = asyncio.run(scenario())
+    assert summary["total_savings"] == 3200
+    assert summary["savings_count"] == 32
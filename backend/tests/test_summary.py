@@ -0,0 +1,131 @@
+import asyncio
+import uuid
+
+from fastapi.testclient import TestClient
+
+from app.db.database import get_collection
+from app.db.mock_db import MockCollection
+from app.main import app
+from app.services.auth import get_current_user
+from app.services import summary as summary_service
+
+
+def test_incremental_summary_matches_rebuild():
+    user_id = f"summary-{uuid.uuid4().hex}"
+    costs = MockCollection("event_costs")
+
+    async def scenario():
+        await summary_service.get_summary(user_id)
+
+        for saved_at, total in [("2024-04-30T10:00:00", 50000), ("2024-05-02T10:00:00", 80000)]:
+            item = {"user_id": user_id, "saved_at": saved_at, "total_estimated": total}
+            costs.create_item(item)
+            await summary_service.record_cost(user_id, item)
+
+        for saved_at, amount in [("2024-05-01T09:00:00", 1000), ("2024-05-03T09:00:00", 2500)]:
+            await summary_service.add_savings(
+                user_id, {"id": uuid.uuid4().hex, "saved_at": saved_at, "amount": amount}
+            )
+
+        incremental = await summary_service.get_summary(user_id)
+        rebuilt = await summary_service.rebuild_summary(user_id)
+        return incremental, rebuilt
+
+    incremental, rebuilt = asyncio.run(scenario())
+
+    assert incremental["total_estimated"] == 130000
+    assert incremental["cost_count"] == 2
+    assert incremental["total_savings"] == 3500
+    assert incremental["last_saved_at"] == "2024-05-03T09:00:00"
+    assert incremental["monthly"]["2024-04"]["estimated"] == 50000
+    assert incremental["monthly"]["2024-05"]["savings_count"] == 2
+
+    for key in ("total_estimated", "cost_count", "total_savings", "savings_count", "monthly"):
+        assert incremental[key] == rebuilt[key]
+
+
+def test_savings_entry_and_balance_commit_together():
+    user_id = f"ledger-{uuid.uuid4().hex}"
+    entry_id = uuid.uuid4().hex
+
+    async def scenario():
+        await summary_service.add_savings(
+            user_id, {"id": entry_id, "saved_at": "2024-06-01T00:00:00", "amount": 500}
+        )
+        try:
+            # 같은 id 의 항목은 거부되고 잔액도 바뀌지 않아야 함
+            await summary_service.add_savings(
+                user_id, {"id": entry_id, "saved_at": "2024-06-02T00:00:00", "amount": 900}
+            )
+        except ValueError:
+            pass
+        return await summary_service.get_summary(user_id)
+
+    summary = asyncio.run(scenario())
+    assert summary["total_savings"] == 500
+    assert summary["savings_count"] == 1
+
+
+def test_rebuild_does_not_overwrite_a_concurrent_entry(monkeypatch):
+    user_id = f"rebuild-{uuid.uuid4().hex}"
+    recompute = summary_service._recompute
+    calls = []
+
+    async def racing_recompute(uid):
+        summary = await recompute(uid)
+        if not calls:
+            # 재계산을 마친 뒤, 쓰기 전에 다른 요청이 저금을 추가
+            await summary_service.add_savings(
+                uid, {"id": uuid.uuid4().hex, "saved_at": "2024-07-01T00:00:00", "amount": 800}
+            )
+        calls.append(uid)
+        return summary
+
+    async def scenario():
+        await summary_service.add_savings(
+            user_id, {"id": uuid.uuid4().hex, "saved_at": "2024-06-01T00:00:00", "amount": 200}
+        )
+        monkeypatch.setattr(summary_service, "_recompute", racing_recompute)
+        return await summary_service.rebuild_summary(user_id)
+
+    rebuilt = asyncio.run(scenario())
+    assert len(calls) == 2
+    assert rebuilt["total_savings"] == 1000
+    assert rebuilt["savings_count"] == 2
+
+
+def test_legacy_savings_history_is_migrated_once():
+    user_id = f"legacy-{uuid.uuid4().hex}"
+
+    async def scenario():
+        legacy = await get_collection("savings_history")
+        for amount in (300, 400):
+            legacy.create_item(
+                {
+                    "id": uuid.uuid4().hex,
+                    "user_id": user_id,
+                    "amount": amount,
+                    "saved_at": "2024-03-01T00:00:00",
+                }
+            )
+        await summary_service.migrate_legacy_savings()
+        # 다시 실행해도 같은 항목이 두 번 더해지지 않음
+        await summary_service.migrate_legacy_savings()
+        return await summary_service.get_summary(user_id)
+
+    summary = asyncio.run(scenario())
+    assert summary["total_savings"] == 700
+    assert summary["savings_count"] == 2
+
+
+def test_profile_responses_carry_no_stored_balance():
+    # 잔액은 요약 문서에만 있음; 예전 사용자 문서의 current_savings 는 응답에 나오지 않음
+    user = {"userId": "u1", "email": "u1@example.com", "username": "u1", "current_savings": 5}
+    app.dependency_overrides[get_current_user] = lambda: user
+    try:
+        response = TestClient(app).get("/api/auth/me")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    assert "current_savings" not in response.json()
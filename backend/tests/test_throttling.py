@@ -0,0 +1,148 @@
+import asyncio
+import threading
+
+import pytest
+from azure.core.paging import ItemPaged
+from azure.cosmos import exceptions
+from fastapi.testclient import TestClient
+
+from app.db.cosmos_db import CosmosDB
+from app.db.database import db_service
+from app.db.metrics import begin_request, current_request, end_request
+from app.db.throttling import (
+    AdaptiveConcurrencyLimiter,
+    CosmosThrottledError,
+    RetryingQuery,
+    call_with_retry,
+)
+from app.main import app
+from app.services.auth import get_current_claims
+
+client = TestClient(app)
+
+
+def _throttled(retry_after_ms):
+    error = exceptions.CosmosHttpResponseError(status_code=429, message="throttled")
+    error.headers = {"x-ms-retry-after-ms": str(retry_after_ms)}
+    return error
+
+
+def test_retry_waits_at_least_retry_after():
+    attempts = []
+    waits = []
+
+    def operation():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise _throttled(200)
+        return "ok"
+
+    result = call_with_retry(
+        operation, limiter=AdaptiveConcurrencyLimiter(), sleep=waits.append
+    )
+
+    assert result == "ok"
+    assert len(attempts) == 3
+    assert all(wait >= 0.2 for wait in waits)
+
+
+def test_retry_gives_up_at_the_deadline():
+    def operation():
+        raise _throttled(5000)
+
+    with pytest.raises(CosmosThrottledError):
+        call_with_retry(
+            operation,
+            deadline_seconds=1,
+            limiter=AdaptiveConcurrencyLimiter(),
+            sleep=lambda _: None,
+        )
+
+
+def test_no_waiting_on_the_event_loop_thread():
+    waits = []
+
+    def operation():
+        raise _throttled(200)
+
+    async def on_loop():
+        call_with_retry(
+            operation, limiter=AdaptiveConcurrencyLimiter(), sleep=waits.append
+        )
+
+    with pytest.raises(CosmosThrottledError):
+        asyncio.run(on_loop())
+    assert waits == []
+
+
+def test_cosmos_calls_run_off_the_loop_with_the_request_context():
+    cosmos = CosmosDB(endpoint="https://example.invalid", key="key")
+    seen = []
+
+    async def scenario():
+        loop_thread = threading.get_ident()
+        cost, token = begin_request()
+        try:
+            await cosmos._run(lambda: seen.append((threading.get_ident(), current_request())))
+        finally:
+            end_request(token)
+        return loop_thread, cost
+
+    loop_thread, cost = asyncio.run(scenario())
+    assert seen[0][0] != loop_thread
+    assert seen[0][1] is cost
+
+
+def test_limiter_shrinks_on_throttling_and_recovers():
+    limiter = AdaptiveConcurrencyLimiter(initial=16, minimum=2, maximum=16, cooldown=0)
+
+    for _ in range(3):
+        assert limiter.acquire(timeout=0)
+        limiter.release(throttled=True)
+    assert limiter.snapshot()["limit"] == 2
+
+    # 슬롯이 다 차면 기다리다가 거절됨
+    assert limiter.acquire(timeout=0) and limiter.acquire(timeout=0)
+    assert not limiter.acquire(timeout=0.01)
+    limiter.release()
+    limiter.release()
+
+    for _ in range(200):
+        limiter.acquire(timeout=0)
+        limiter.release()
+    assert limiter.snapshot()["limit"] == 16
+
+
+def test_throttled_query_page_resumes_from_continuation():
+    pages = {None: (["a", "b"], "2"), "2": (["c"], "3"), "3": (["d"], None)}
+    requested = []
+
+    def start():
+        def get_next(token):
+            requested.append(token)
+            if token == "2" and requested.count("2") == 1:
+                raise _throttled(1)
+            items, next_token = pages[token]
+            return items, next_token
+
+        return ItemPaged(get_next, lambda response: (response[1], iter(response[0])))
+
+    assert list(RetryingQuery(start)) == ["a", "b", "c", "d"]
+    assert requested == [None, "2", "2", "3"]
+
+
+def test_sustained_throttling_is_a_503():
+    async def throttled(user_id):
+        raise CosmosThrottledError(2.5)
+
+    original = db_service.get_user_summary
+    db_service.get_user_summary = throttled
+    app.dependency_overrides[get_current_claims] = lambda: {"userId": "u1"}
+    try:
+        response = client.get("/api/users/summary")
+    finally:
+        db_service.get_user_summary = original
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "3"